@@ -5,363 +5,4158 @@ Created on Sun Jul 12 18:59:24 2020
 @author: Roberto Bullitta
 """
 
+import argparse
+import cProfile
+import functools
+import glob
+import gzip
+import hashlib
+import http.client
+import http.server
+import inspect
+import io
+import json
+import locale
+import math
+import multiprocessing
+import mmap
+import os
+import re
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import closing
+from itertools import accumulate, chain, compress, count, islice, repeat
+from operator import add, lshift, lt, ne, or_
+
 import requests
 
+try:
+    import resource                                   # Not available on Windows, where peak memory isn't measured
+except ImportError:
+    resource = None
+
+
+maf = 'C:\\Users\\Roberto Bullitta\\Desktop\\PROJETO BCM\\Estágio\\MAF\\MAF_file_1.txt'
+goa = 'C:\\Users\\Roberto Bullitta\\Desktop\\PROJETO BCM\\Estágio\\goa_human.gaf'
+
+
+# Layout of the sidecar files written by "build_maf_index" (magic, MAF size, MAF mtime, sample count, titles length)
+_INDEX_MAGIC = b"MGI1"
+_INDEX_HEADER = struct.Struct("<4sQqQI")
+
+# Largest number of bytes of a MAF file parsed by each task of "mutation_samples" when using several workers
+_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Consequences of the protein changes found by "parse_variants" (in the order they are numbered by)
+CONSEQUENCES = ("other", "missense", "nonsense", "synonymous", "frameshift", "inframe_deletion", "inframe_insertion",
+                "inframe_indel", "start_lost", "stop_lost", "splice")
+
+# Three letter codes of the amino acids and their one letter codes, and the parts of the HGVS changes read by "parse_variants"
+_AMINO_ACIDS = {"Ala": "A", "Arg": "R", "Asn": "N", "Asp": "D", "Cys": "C", "Gln": "Q", "Glu": "E", "Gly": "G", "His": "H",
+                "Ile": "I", "Leu": "L", "Lys": "K", "Met": "M", "Phe": "F", "Pro": "P", "Ser": "S", "Thr": "T", "Trp": "W",
+                "Tyr": "Y", "Val": "V", "Sec": "U", "Pyl": "O", "Xaa": "X", "Ter": "*"}
+_ONE_LETTER_CODES = set(_AMINO_ACIDS.values())
+_HGVSP = re.compile(r"p\.\(?([A-Z][a-z]{2}|[A-Z*])(\d+)(.*?)\)?$")
+_HGVSP_RANGE = re.compile(r"^_([A-Z][a-z]{2}|[A-Z*])\d+")
+_HGVSC_SPLICE = re.compile(r"c\.(\d+)[+-][12](?!\d)")
+
+# Layout of the header of the cache entries written for "all_goa_id" and "get_ontologies" (magic, source size, source mtime, source SHA-256)
+_CACHE_MAGIC = b"MGC1"
+_CACHE_HEADER = struct.Struct("<4sQq32s")
+
+# Average number of lines of the chunks a GOA file is cut into for "update_goa_id" (the chunks
+# that changed are read again), and the gene number of the lines left out by its filters
+_GOA_CHUNK_LINES = 16
+_NO_GENE = 0xFFFFFFFF
+
+# The GO ID of an OBO stanza (the last "id" tag of the stanza, as read by "_iter_obo_terms")
+_OBO_ID = re.compile(r"^\s*id: (.*?\S)\s*$", re.M)
+
+# Largest total size in bytes of a cache directory before its least recently used entries and downloads are deleted
+CACHE_SIZE_LIMIT = 1024 * 1024 * 1024
+
+# Evidence codes of the GO annotations backed by experiments (including high throughput ones), for "all_goa_id"
+EXPERIMENTAL_EVIDENCE = ["EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "HTP", "HDA", "HMP", "HGI", "HEP"]
+
+# General OBO file with all GO terms, used when no OBO file is given
+GO_OBO_URL = "http://current.geneontology.org/ontology/go.obo"
+
+# Seconds to wait for a server to respond before a download is given up, how many times a failed
+# download is tried again, and the HTTP session shared by downloads
+HTTP_TIMEOUT = 60
+HTTP_RETRIES = 3
+_SESSION = None
+
+# Port the service started by "serve" listens on when no other is given
+SERVICE_PORT = 8765
+
+# Largest number of sets of GO IDs whose GO terms are remembered by a "TermTranslator"
+TERM_CACHE_SIZE = 65536
+
+# Checkpoint files written by "save_checkpoint" start with a magic string, and their containers are tagged by type
+_CHECKPOINT_MAGIC = b"MGK1"
+_CONTAINER_TAGS = {list: b"l", tuple: b"t", set: b"e", frozenset: b"z", dict: b"d"}
+_CONTAINER_TYPES = {b"l": list, b"t": tuple, b"e": set, b"z": frozenset}
+_UINT = struct.Struct("<I")
+
+# Natural logarithms of the factorials used by "go_enrichment", grown as needed
+_LOG_FACTORIALS = [0.0]
+
+# Genes counted by the processes of "run_cohort" (None to count all genes)
+_COHORT_GENES = None
+
+# The Instrumentation recording function calls within an "instrument" block (None outside of it)
+_INSTRUMENTATION = None
+
+
+
+# ------------------------------ INSTRUMENTATION ------------------------------
+
+class Instrumentation:
+    """The calls of the MutantGene functions recorded while "instrument" is used.
+    
+    ATTRIBUTES:
+    - calls (list): A dictionary per finished call with its "stage" (the function name), "depth"
+    (0 for calls made directly by the user, 1 for the calls they make, and so on, counted apart
+    for each thread, so calls made by the threads of "load_sources" or "serve" start at 0), "seconds",
+    "rows" (the number of elements of the list or dictionary given to the function, or else of
+    the result it returns or yields), "bytes" (the size of the file it reads, if any) and
+    "peak_rss_mb" (the peak memory of the process so far, None where it can't be measured).
+    - cache (dict): A dictionary of cache types ("goa", "obo" and "download") as
+    keys and a dictionary with their number of "hits" and "misses" as values.
+    """
+    
+    def __init__(self, callback = None, profile_dir = None):
+        
+        self.calls = []
+        self.cache = {}
+        self._callback = callback
+        self._profile_dir = profile_dir
+        self._threads = threading.local()         # The depth of the calls running in each thread
+        self._lock = threading.Lock()
+    
+    
+    def report(self):
+        """Get the recorded calls, their totals by stage and the cache hits and misses.
+        
+        RETURN:
+        A dictionary with the "calls", the "stages" (a dictionary of function names as keys and the
+        number of "calls" and the total "seconds", "rows" and "bytes" of the calls made directly
+        by the user as values), the "cache" and the "peak_rss_mb" of the process.
+        """
+        
+        top = {}
+        for call in self.calls:
+            top[call["stage"]] = min(top.get(call["stage"], call["depth"]), call["depth"])
+        
+        stages = {}
+        for call in self.calls:
+            stage = stages.setdefault(call["stage"], {"calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0})
+            stage["calls"] += 1
+            if call["depth"] == top[call["stage"]]:
+                stage["seconds"] += call["seconds"]           # Recursive calls are already timed by their caller
+                stage["rows"] += call["rows"] or 0
+                stage["bytes"] += call["bytes"] or 0
+        
+        return {"calls": self.calls, "stages": stages, "cache": self.cache, "peak_rss_mb": _peak_rss()}
+    
+    
+    def to_json(self, file_name):
+        """Save the report (see "report") to a JSON file."""
+        
+        with open(file_name, "w") as save_file:
+            json.dump(self.report(), save_file, indent = 1)
+    
+    
+    def _call(self, function, args, kwargs):
+        
+        depth = getattr(self._threads, "depth", 0)
+        profiler = None
+        if self._profile_dir != None and depth == 0:
+            profiler = cProfile.Profile()
+        
+        size = _input_size(args)
+        start = time.perf_counter()
+        self._threads.depth = depth + 1
+        result = None
+        
+        try:
+            if profiler != None:
+                result = profiler.runcall(function, *args, **kwargs)
+            else:
+                result = function(*args, **kwargs)
+            return result
+        finally:
+            self._threads.depth = depth
+            rows = len(args[0]) if len(args) > 0 and _sized(args[0]) else len(result) if _sized(result) else None
+            number = self._record(function, time.perf_counter() - start, rows, size, depth)
+            if profiler != None:
+                os.makedirs(self._profile_dir, exist_ok = True)
+                profiler.dump_stats(os.path.join(self._profile_dir, str(number).zfill(3) + "_" + function.__qualname__ + ".prof"))
+    
+    
+    def _iterate(self, function, args, kwargs):
+        
+        # Generators are timed from their first to their last element, including the time spent
+        # by the code using the elements in between
+        size = _input_size(args)
+        depth = getattr(self._threads, "depth", 0)
+        rows = 0
+        start = time.perf_counter()
+        
+        try:
+            for element in function(*args, **kwargs):
+                rows += 1
+                yield element
+        finally:
+            self._record(function, time.perf_counter() - start, rows, size, depth)
+    
+    
+    def _record(self, function, seconds, rows, size, depth):
+        
+        call = {"stage": function.__qualname__, "depth": depth, "seconds": seconds,
+                "rows": rows, "bytes": size, "peak_rss_mb": _peak_rss()}
+        with self._lock:
+            self.calls.append(call)
+            number = len(self.calls)
+        
+        if self._callback != None:
+            self._callback(call)
+        
+        return number
+
+
+
+class instrument:
+    """Record the calls of the MutantGene functions made within a "with" block.
+    
+    PARAMETERS:
+    - callback (function): A function called with each call (a dictionary, see "Instrumentation")
+    as soon as it finishes (optional).
+    - profile_dir (str): A directory where a cProfile trace of each call made directly within the
+    block is saved, named after its number and function (optional). They can be read with the
+    "pstats" module or a viewer like snakeviz.
+    
+    RETURN:
+    Used as "with instrument() as stats:", gives an Instrumentation with the recorded calls, e.g.
+    "stats.to_json('report.json')" after the block. Outside of the block, functions only check
+    that nothing is being recorded.
+    """
+    
+    def __init__(self, callback = None, profile_dir = None):
+        
+        self._instrumentation = Instrumentation(callback, profile_dir)
+        self._previous = None
+    
+    
+    def __enter__(self):
+        
+        global _INSTRUMENTATION
+        
+        self._previous = _INSTRUMENTATION
+        _INSTRUMENTATION = self._instrumentation
+        
+        return self._instrumentation
+    
+    
+    def __exit__(self, *exception):
+        
+        global _INSTRUMENTATION
+        
+        _INSTRUMENTATION = self._previous
+        
+        return False
+
+
+
+def _instrumented(function):
+    """Make a function record its calls while "instrument" is used."""
+    
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _INSTRUMENTATION == None:
+                return function(*args, **kwargs)
+            return _INSTRUMENTATION._iterate(function, args, kwargs)
+    else:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _INSTRUMENTATION == None:
+                return function(*args, **kwargs)
+            return _INSTRUMENTATION._call(function, args, kwargs)
+    
+    return wrapper
+
+
+
+def _cache_event(kind, hit):
+    """Count a cache hit or miss while "instrument" is used."""
+    
+    instrumentation = _INSTRUMENTATION
+    if instrumentation != None:
+        with instrumentation._lock:
+            counts = instrumentation.cache.setdefault(kind, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+
+
+def _input_size(args):
+    """Get the size of the file named by the first argument of a call, or None if it isn't a file."""
+    
+    if len(args) > 0 and type(args[0]) is str and os.path.isfile(args[0]):
+        return os.path.getsize(args[0])
+    
+    return None
+
+
+
+def _sized(value):
+    
+    return type(value) in (list, tuple, set, frozenset, dict)
+
+
+
+def _peak_rss():
+    """Get the peak memory (resident set size) of the process in MB, or None if it can't be measured."""
+    
+    if resource == None:
+        return None
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024     # Bytes on macOS, KB elsewhere
+
+
+
+
+
+# ------------------------------ STEP 1 (Mutation samples) ------------------------------
+
+@_instrumented
+def iter_mutation_samples(maf_file, limit = None, start = 0, index_list = [0,34,35,95,93], filters = None):
+    """Lazily extract sample information from a MAF file, one sample at a time.
+    
+    PARAMETERS:
+    - maf_file (str): A MAF file directory or URL (gzip compressed files ending in ".gz" are also accepted).
+    - limit (int): A desired number of samples to be processed (optional).
+    - start (int): A desired starting index (optional).
+    - index_list (list): A list of indexes or attribute titles to use for information retrieval
+    (optional). Uses the same default indexes as "mutation_samples".
+    - filters (list): A list of (attribute, operator, value) tuples that samples must satisfy (optional).
+    See "mutation_samples".
+    
+    RETURN:
+    A generator of each processed sample information list. Only one line of the file is kept
+    in memory at a time. MAF URLs are read as they are downloaded.
+    """
+    
+    if _is_url(maf_file):
+        # The attribute titles come from the download itself, so the file is only downloaded once
+        file = _text_lines(maf_file)
+        index_list, checks = _resolve_columns(maf_file, index_list, filters, _maf_header(file))
+    else:
+        index_list, checks = _resolve_columns(maf_file, index_list, filters)
+
+        # Seek straight to the starting sample if an up to date index was built with "build_maf_index"
+        file = _open_indexed(maf_file, start)
+
+        if file != None:
+            start = 0
+        else:
+            file = _open_text(maf_file)
+            _maf_header(file)    # Skip the initial annotation lines that start with "#" and the attribute titles line
+
+    with closing(file):
+        rows = (line for line in file if line.strip() != "")
+        stop = None if limit == None else start + limit
+        
+        for line in islice(rows, start, stop):
+            sample = _extract_sample(line, index_list, checks)
+            if sample != None:
+                yield sample
+
+
+
+@_instrumented
+def mutation_samples(maf_file, limit = None, start = 0, index_list = [0,34,35,95,93], workers = 1, filters = None):
+    """Extract sample information from a MAF file.
+    
+    PARAMETERS:
+    - maf_file (str): A MAF file directory or URL (gzip compressed files ending in ".gz" are also accepted).
+    - limit (int): A desired number of samples to be processed (optional).
+    - start (int): A desired starting index (optional).
+    - index_list (list): A list of indexes to use for information retrieval (optional). If no list is specified,
+    returns a list of lists containing the gene names (HUGO_symbol), the gene mutation suffered (HGVSc), 
+    the effect on the protein produced (HGVSp), the type of mutation (VARIANT_CLASS) and how big the impact 
+    on protein viability is (IMPACT). Attribute titles (like "IMPACT") can be used instead of indexes.
+    - workers (int): The number of processes used to parse the file (optional). With more than 1,
+    the file is split into ranges of lines that are parsed in parallel (gzip compressed files and
+    URLs are always parsed by a single process). Scripts using it on Windows must call it from within an
+    'if __name__ == "__main__":' block.
+    - filters (list): A list of (attribute, operator, value) tuples that samples must satisfy to be
+    kept (optional). The attribute is an index or attribute title and the operator is "==" or "!="
+    (compared to a single value) or "in" or "not in" (compared to a collection of values), e.g.
+    [("IMPACT", "!=", "LOW"), ("VARIANT_CLASS", "in", {"SNV", "deletion"})]. Samples are filtered
+    while the file is read, and "limit" and "start" count samples before filtering. Values are
+    compared as text, so a number like 5 matches the column value "5".
+    
+    RETURN:
+    A list of each processed sample information lists.
+    """
+
+    if workers > 1 and not str(maf_file).endswith(".gz") and not _is_url(maf_file):
+        return _parallel_mutation_samples(maf_file, limit, start, index_list, workers, filters)
+
+    return list(iter_mutation_samples(maf_file, limit, start, index_list, filters))
+
+
+
+
+
+# ((((((((((AUXILIARY FUNCTIONS)))))))))):
+
+@_instrumented
+def maf_index(maf_file):
+    """Index each parameter of a MAF file.
+    
+    PARAMETERS:
+    - maf_file (str): A MAF file directory or URL (gzip compressed files ending in ".gz" are also accepted).
+    
+    RETURN:
+    A dictionary of attribute titles as keys and their corresponding indexes as values.
+    """
+    
+    # Only the lines up to the attribute titles line are read (or downloaded)
+    with closing(_text_lines(maf_file)) as file:
+        titles = _maf_header(file)
+
+    # Save titles with corresponding indexes 
+    all_indexes = {}
+
+    for i in range(len(titles)):
+        all_indexes[titles[i]] = i
+        
+    return all_indexes
+
+
+
+@_instrumented
+def build_maf_index(maf_file):
+    """Index the position of each sample line of a MAF file in a sidecar file.
+
+    PARAMETERS:
+    - maf_file (str): A MAF file directory (gzip compressed files can't be indexed).
+
+    RETURN:
+    Saves the byte offset of every sample line, the attribute titles and the size and
+    modification time of the MAF file in a file named after it with the ".idx" extension.
+    While the MAF file stays unchanged, "mutation_samples" uses it to jump straight to the
+    starting sample instead of reading every line before it. Returns the sidecar file name.
+    """
+
+    if str(maf_file).endswith(".gz"):
+        raise ValueError("Gzip compressed MAF files can't be indexed: " + str(maf_file))
+
+    stat = os.stat(maf_file)
+    offsets = array("Q")
+
+    with open(maf_file, "rb") as file:
+        position = 0
+        titles = None
+
+        for line in file:
+            if titles == None:
+                if not line.startswith(b"#"):
+                    titles = line.rstrip(b"\r\n")
+            elif line.strip() != b"":
+                offsets.append(position)
+            position = position + len(line)
+
+    if titles == None:
+        titles = b""
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    index_file = str(maf_file) + ".idx"
+
+    with open(index_file, "wb") as save_file:
+        save_file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets), len(titles)))
+        save_file.write(titles)
+        save_file.write(offsets.tobytes())
+
+    return index_file
+
+
+
+def _open_indexed(maf_file, start):
+    """Open a MAF file at a given sample using its sidecar index.
+
+    PARAMETERS:
+    - maf_file (str): A MAF file directory.
+    - start (int): The index of the sample to position the file at.
+
+    RETURN:
+    An open text file object positioned at the starting sample, or None if there is no
+    index for the MAF file or it is out of date.
+    """
+
+    offsets = _indexed_offsets(maf_file, [start])
+
+    if offsets == None:
+        return None
+
+    file = open(maf_file, "rb")
+    file.seek(offsets[0])
+
+    return io.TextIOWrapper(file)
+
+
+
+def _indexed_offsets(maf_file, samples):
+    """Look up the byte offsets of chosen samples in the sidecar index of a MAF file.
+
+    PARAMETERS:
+    - maf_file (str): A MAF file directory.
+    - samples (list): A list of sample indexes.
+
+    RETURN:
+    A list with the byte offset of each sample (the MAF file size for samples past the end of
+    the file), or None if there is no index for the MAF file or it is out of date.
+    """
+
+    index_file = str(maf_file) + ".idx"
+
+    if str(maf_file).endswith(".gz") or not os.path.isfile(index_file):
+        return None
+    if os.path.getsize(index_file) < _INDEX_HEADER.size:
+        return None
+
+    stat = os.stat(maf_file)
+
+    with open(index_file, "rb") as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as index:
+        magic, size, mtime, rows, titles_length = _INDEX_HEADER.unpack_from(index)
+        if magic != _INDEX_MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns:
+            return None
+
+        # Only the offsets of the chosen samples are read from the index
+        offsets = []
+        for s in samples:
+            if s < rows:
+                offsets.append(struct.unpack_from("<Q", index, _INDEX_HEADER.size + titles_length + 8 * s)[0])
+            else:
+                offsets.append(size)
+
+    return offsets
+
+
+
+def _parallel_mutation_samples(maf_file, limit, start, index_list, workers, filters):
+    """Extract sample information from a MAF file using several processes.
+
+    PARAMETERS:
+    - maf_file (str): An uncompressed MAF file directory.
+    - limit (int): A desired number of samples to be processed (None for all of them).
+    - start (int): A desired starting index.
+    - index_list (list): A list of indexes to use for information retrieval.
+    - workers (int): The number of processes to use.
+    - filters (list): A list of (attribute, operator, value) tuples that samples must satisfy.
+
+    RETURN:
+    A list of each processed sample information lists, in the same order as in the file.
+    """
+
+    index_list, checks = _resolve_columns(maf_file, index_list, filters)
+    end = os.path.getsize(maf_file)
+
+    # Only parse the requested samples if their positions are known from the sidecar index
+    if limit == None:
+        offsets = _indexed_offsets(maf_file, [start])
+    else:
+        offsets = _indexed_offsets(maf_file, [start, start + limit])
+
+    if offsets != None:
+        begin = offsets[0]
+        if limit != None:
+            end = offsets[1]
+        start = 0
+        limit = None
+    else:
+        with open(maf_file, "rb") as file:
+            for line in file:
+                if not line.startswith(b"#"):    # Skip up to and including the attribute titles line
+                    break
+            begin = file.tell()
+
+    # Split the samples into more ranges than processes so that the work is evenly spread
+    parts = max(workers * 4, (end - begin) // _CHUNK_SIZE + 1)
+    ranges = _maf_ranges(maf_file, begin, end, parts)
+
+    stop = None if limit == None else start + limit
+
+    with ProcessPoolExecutor(workers) as pool:
+        chunks = pool.map(_parse_maf_range, repeat(maf_file), [r[0] for r in ranges], [r[1] for r in ranges], repeat(index_list), repeat(checks))
+        samples = []
+        first = 0    # Index in the file of the first sample of each range
+
+        for count, positions, text in chunks:
+            chunk = _split_samples(text, len(positions), len(index_list))
+            if start == 0 and stop == None:
+                samples.extend(chunk)
+            else:                            # Keep the samples between "start" and "limit", counted before filtering
+                for p, sample in zip(positions, chunk):
+                    if first + p >= start and (stop == None or first + p < stop):
+                        samples.append(sample)
+            first = first + count
+
+    return samples
+
+
+
+def _maf_ranges(maf_file, begin, end, parts):
+    """Split a byte range of a MAF file into ranges that start and end at line boundaries.
+
+    PARAMETERS:
+    - maf_file (str): An uncompressed MAF file directory.
+    - begin (int): The byte offset where the first range starts (at the start of a line).
+    - end (int): The byte offset where the last range ends (at the end of a line).
+    - parts (int): The desired number of ranges.
+
+    RETURN:
+    A list of (start, end) byte offset tuples.
+    """
+
+    bounds = [begin]
+
+    with open(maf_file, "rb") as file:
+        for p in range(1, parts):
+            file.seek(begin + (end - begin) * p // parts - 1)
+            file.readline()    # Move to the start of the next line
+            position = file.tell()
+
+            if position >= end:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+
+    bounds.append(end)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+
+def _parse_maf_range(maf_file, begin, end, index_list, checks):
+    """Extract sample information from the lines within a byte range of a MAF file.
+
+    PARAMETERS:
+    - maf_file (str): An uncompressed MAF file directory.
+    - begin (int): The byte offset where the range starts (at the start of a line).
+    - end (int): The byte offset where the range ends (at the end of a line).
+    - index_list (list): A list of indexes to use for information retrieval.
+    - checks (list): A list of filters compiled by "_resolve_columns".
+
+    RETURN:
+    A tuple with the number of samples in the range, an array with the position of each
+    kept sample within the range and the kept sample information as a single string (see
+    "_split_samples"), which is much faster to send back to the main process than lists.
+    """
+
+    with open(maf_file, "rb") as file:
+        file.seek(begin)
+        text = file.read(end - begin).decode(locale.getpreferredencoding(False))
+
+    count = 0
+    positions = array("L")
+    samples = []
+
+    for line in text.split("\n"):
+        if line.strip() != "":
+            sample = _extract_sample(line, index_list, checks)
+            if sample != None:
+                positions.append(count)
+                samples.append("\t".join(sample))
+            count = count + 1
+
+    return count, positions, "\n".join(samples)
+
+
+
+def _split_samples(text, samples, columns):
+    """Turn the sample information joined by "_parse_maf_range" back into lists.
+
+    PARAMETERS:
+    - text (str): The information of the samples, with the values of each sample joined by tabs
+    and the samples joined by line breaks (neither can be part of a value read from a MAF line).
+    - samples (int): The number of samples.
+    - columns (int): The number of values of each sample.
+
+    RETURN:
+    A list of each sample information list.
+    """
+
+    if samples == 0 or columns == 0:
+        return [[] for s in range(samples)]
+
+    return list(map(str.split, text.split("\n"), repeat("\t")))
+
+
+
+def _resolve_columns(maf_file, index_list, filters, titles = None):
+    """Turn attribute titles into indexes and compile sample filters.
+
+    PARAMETERS:
+    - maf_file (str): A MAF file directory.
+    - index_list (list): A list of indexes or attribute titles.
+    - filters (list): A list of (attribute, operator, value) tuples, or None.
+    - titles (list): The attribute titles of the MAF file, if they were already read (optional).
+
+    RETURN:
+    A tuple with the list of indexes and a list of (index, include, values) filters, where
+    "include" tells if a sample's value must be in the set of values (turned into strings, like
+    the values read from the file) or not. The attribute titles line is only read if titles are used.
+    """
+
+    if filters == None:
+        filters = []
+
+    if titles != None:
+        titles = {t: i for i, t in enumerate(titles)}
+    elif any(type(c) is str for c in index_list) or any(type(f[0]) is str for f in filters):
+        titles = maf_index(maf_file)
+
+    def column(c):
+        if type(c) is not str:
+            return c
+        if c not in titles:
+            raise ValueError("Unknown MAF attribute: " + c)
+        return titles[c]
+
+    checks = []
+    for attribute, operator, value in filters:
+        if operator in ("==", "!="):
+            values = frozenset([str(value)])
+        elif operator in ("in", "not in"):
+            values = frozenset(map(str, value))
+        else:
+            raise ValueError("Unknown filter operator: " + str(operator))
+
+        checks.append((column(attribute), operator in ("==", "in"), values))
+
+    return [column(c) for c in index_list], checks
+
+
+
+def _extract_sample(line, index_list, checks):
+    """Extract the information of one sample line if it passes the filters.
+
+    PARAMETERS:
+    - line (str): A sample line of a MAF file.
+    - index_list (list): A list of indexes to use for information retrieval.
+    - checks (list): A list of filters compiled by "_resolve_columns".
+
+    RETURN:
+    The sample information list, or None if the sample was filtered out.
+    """
+
+    # Lines that don't contain a required value anywhere are rejected before being split
+    for _, include, values in checks:
+        if include and not any(v in line for v in values):
+            return None
+
+    extract = line.rstrip("\r\n").split("\t")
+
+    for i, include, values in checks:
+        if (extract[i] in values) != include:
+            return None
+
+    return [extract[i] for i in index_list]
+
+
+
+def _maf_header(file):
+    """Skip the initial annotation lines of an open MAF file and read its attribute titles.
+    
+    PARAMETERS:
+    - file (file): An open MAF file positioned at its first line.
+    
+    RETURN:
+    A list of the attribute titles. The file is left positioned at the first sample line.
+    """
+    
+    for line in file:
+        if not line.startswith("#"):
+            return line.rstrip("\r\n").split("\t")
+    
+    return []
+
+
+
+def _open_text(file_name):
+    """Open a text file for reading, decompressing it on the fly if it is gzip compressed.
+    
+    PARAMETERS:
+    - file_name (str): A file directory. Files ending in ".gz" are read as gzip files.
+    
+    RETURN:
+    An open text file object.
+    """
+    
+    if str(file_name).endswith(".gz"):
+        return gzip.open(file_name, "rt")
+    
+    return open(file_name)
+
+
+
+@_instrumented
+def parse_variants(samples, gene_index = 0, hgvsc_index = 1, hgvsp_index = 2):
+    """Turn the HGVSp (and HGVSc) changes of many samples into a table of protein positions and amino acids.
+    
+    PARAMETERS:
+    - samples (iterable): Sample information lists, like the ones of "mutation_samples" or "iter_mutation_samples".
+    - gene_index (int): The position of the gene names in the sample information lists (optional).
+    - hgvsc_index (int): The position of the HGVSc changes (like "c.818G>A") (optional).
+    - hgvsp_index (int): The position of the HGVSp changes (like "p.Arg273His" or "p.R273H") (optional).
+    The default indexes match the default "index_list" of "mutation_samples".
+    
+    RETURN:
+    A VariantTable with a row per sample. Each distinct change is only parsed once, however many
+    samples share it. Samples without an HGVSp change are described by their HGVSc change instead
+    (only splice site changes are recognised there).
+    """
+    
+    gene_numbers = _Numbering()
+    change_numbers = _Numbering()
+    genes = array("I")
+    changes = array("I")
+    
+    # Only the numbers of each sample's gene and change are kept while reading the samples
+    for s in samples:
+        genes.append(gene_numbers[s[gene_index]])
+        changes.append(change_numbers[s[hgvsp_index] or s[hgvsc_index]])
+    
+    # The columns of each distinct change are then copied to the samples that have it
+    parsed = [_parse_change(c) for c in change_numbers]
+    positions = [p[0] for p in parsed]
+    refs = bytes(ord(p[1]) for p in parsed)
+    alts = bytes(ord(p[2]) for p in parsed)
+    consequences = bytes(CONSEQUENCES.index(p[3]) for p in parsed)
+    
+    table = VariantTable()
+    table.genes = list(gene_numbers)
+    table.gene = genes
+    table.position = array("I", map(positions.__getitem__, changes))
+    table.ref = bytearray(map(refs.__getitem__, changes))
+    table.alt = bytearray(map(alts.__getitem__, changes))
+    table.consequence = bytearray(map(consequences.__getitem__, changes))
+    
+    return table
+
+
+
+class VariantTable:
+    """The protein changes of many samples, as a column per attribute (made by "parse_variants").
+    
+    ATTRIBUTES:
+    - genes (list): The gene names, in order of appearance.
+    - gene (array): The number of each sample's gene in the list of gene names.
+    - position (array): The position of each sample's first changed amino acid (0 if it isn't known).
+    - ref (bytearray): The one letter code of each sample's first changed amino acid ("*" for a stop
+    codon, "-" if it isn't known).
+    - alt (bytearray): The one letter code of the amino acid that replaces it ("-" for deletions, or if it isn't known).
+    - consequence (bytearray): The number of each sample's consequence in CONSEQUENCES.
+    
+    METHODS:
+    - count(): Gets a dictionary of consequences as keys and their number of samples as values.
+    """
+    
+    def __init__(self):
+        
+        self.genes = []
+        self.gene = array("I")
+        self.position = array("I")
+        self.ref = bytearray()
+        self.alt = bytearray()
+        self.consequence = bytearray()
+    
+    
+    def __len__(self):
+        
+        return len(self.gene)
+    
+    
+    def __getitem__(self, i):
+        """Get a sample's (gene name, position, ref, alt, consequence) tuple."""
+        
+        return (self.genes[self.gene[i]], self.position[i], chr(self.ref[i]), chr(self.alt[i]),
+                CONSEQUENCES[self.consequence[i]])
+    
+    
+    def count(self):
+        """Get a dictionary of consequences as keys and their number of samples as values."""
+        
+        return {CONSEQUENCES[c]: self.consequence.count(c) for c in set(self.consequence)}
+
+
+
+@_instrumented
+def find_hotspots(variants, window = 1, min_count = 3, consequences = None):
+    """Find the protein positions (or stretches of them) of each gene that are mutated in many samples.
+    
+    PARAMETERS:
+    - variants (VariantTable): The protein changes of the samples, from "parse_variants".
+    - window (int): The number of consecutive amino acids the samples of a hotspot have to be
+    found in (optional). The default only finds recurrent positions.
+    - min_count (int): The smallest number of samples in a hotspot (optional).
+    - consequences (list): The consequences (see CONSEQUENCES) of the samples considered (optional,
+    all but "synonymous" and "other" by default).
+    
+    RETURN:
+    A list of (gene name, first position, last position, number of samples) tuples, from the largest
+    hotspot to the smallest. Overlapping windows with enough samples are joined into a single hotspot.
+    Samples without a known position are left out.
+    """
+    
+    if consequences == None:
+        consequences = [c for c in CONSEQUENCES if c not in ("synonymous", "other")]
+    kept = bytes(c in consequences for c in CONSEQUENCES)
+    kept = bytes(map(min, map(kept.__getitem__, variants.consequence), map(bool, variants.position)))
+    
+    # Each sample becomes a single number (gene number and position), so sorting them groups the positions of each gene in order
+    keys = sorted(map(or_, map(lshift, compress(variants.gene, kept), repeat(32)), compress(variants.position, kept)))
+    
+    # The window starting at a sample has enough samples if the sample min_count - 1 places after it
+    # is still in the window, so only those windows are looked at (joining the ones that overlap into a
+    # hotspot), and a bisection finds where they end
+    starts = compress(count(), map(lt, islice(keys, max(min_count, 1) - 1, None), map(add, keys, repeat(window))))
+    hotspots = []
+    first = end = 0
+    
+    for i in starts:
+        if i >= end:
+            if end > 0:
+                hotspots.append(_hotspot(variants, keys, first, end))
+            first = i
+        end = max(end, bisect_left(keys, keys[i] + window))
+    
+    if end > 0:
+        hotspots.append(_hotspot(variants, keys, first, end))
+    hotspots.sort(key = lambda h: -h[3])
+    
+    return hotspots
+
+
+
+def _hotspot(variants, keys, first, end):
+    """Describe the samples from first to end (sorted keys of "find_hotspots") as a hotspot tuple."""
+    
+    return variants.genes[keys[first] >> 32], keys[first] & 0xFFFFFFFF, keys[end - 1] & 0xFFFFFFFF, end - first
+
+
+
+class _Numbering(dict):
+    """A dictionary that numbers its keys in order of appearance as they are looked up."""
+    
+    def __missing__(self, key):
+        
+        number = self[key] = len(self)
+        
+        return number
+
+
+
+def _parse_change(change):
+    """Parse an HGVSp change (or an HGVSc change) into a (position, ref, alt, consequence) tuple."""
+    
+    match = _HGVSP.match(change)
+    
+    if match == None:
+        splice = _HGVSC_SPLICE.match(change)
+        if splice != None:                           # The codon next to the splice site
+            return (int(splice.group(1)) + 2) // 3, "-", "-", "splice"
+        if change in ("p.=", "p.(=)"):
+            return 0, "-", "-", "synonymous"
+        return 0, "-", "-", "other"
+    
+    ref = _AMINO_ACIDS.get(match.group(1), match.group(1))
+    position = int(match.group(2))
+    change = _HGVSP_RANGE.sub("", match.group(3))   # The end of a range of amino acids ("_Arg12")
+    alt = _first_amino_acid(change)
+    
+    if "fs" in change:
+        return position, ref, alt, "frameshift"
+    if "ext" in change:
+        return position, ref, alt, "stop_lost" if ref == "*" else "start_lost"
+    if change.startswith("delins"):
+        return position, ref, _first_amino_acid(change[6:]), "inframe_indel"
+    if change.startswith("del"):
+        return position, ref, "-", "inframe_deletion"
+    if change.startswith("ins") or change.startswith("dup"):
+        return position, ref, _first_amino_acid(change[3:]), "inframe_insertion"
+    if change == "=":
+        return position, ref, ref, "synonymous"
+    if change == "?" and position == 1:
+        return position, ref, "-", "start_lost"
+    
+    if alt == "-" or len(change) not in (1, 3):
+        return position, ref, "-", "other"
+    if alt == ref:
+        return position, ref, alt, "synonymous"
+    if ref == "M" and position == 1:
+        return position, ref, alt, "start_lost"
+    if alt == "*":
+        return position, ref, alt, "nonsense"
+    if ref == "*":
+        return position, ref, alt, "stop_lost"
+    
+    return position, ref, alt, "missense"
+
+
+
+def _first_amino_acid(text):
+    """Get the one letter code of the amino acid a text starts with (three letter or one letter code), or "-"."""
+    
+    if text[:3] in _AMINO_ACIDS:
+        return _AMINO_ACIDS[text[:3]]
+    if text[:1] in _ONE_LETTER_CODES:
+        return text[:1]
+    
+    return "-"
+
+
+
+
+
+# ------------------------------ STEP 2 (GO IDs) ------------------------------
+
+@_instrumented
+def all_goa_id(goa_file, cache_dir = None, compact = "n", aspects = None, evidence = None, negated = "y", by_aspect = "n"):
+    """Retrieves all genes and corresponding GO IDs from a GOA file.
+    
+    PARAMETERS:
+    - goa_file (str): A GOA file directory or URL (gzip compressed files ending in ".gz" are also accepted).
+    - cache_dir (str): A directory where a compiled copy of the result is kept (optional). Later
+    calls with the same unchanged GOA file load it from there instead of parsing the file again.
+    The least recently used entries and downloads are deleted once the directory grows past CACHE_SIZE_LIMIT bytes.
+    With compact = "n", the copy made of a local file also keeps what "update_goa_id" starts from.
+    GOA URLs are also downloaded to it, and are only downloaded again if they have changed.
+    - compact (str): A character to decide if the result is a GOAnnotations, which works like the
+    dictionary but stores the GO IDs as numbers and uses several times less memory ("y"), or a
+    dictionary ("n") (optional).
+    - aspects (str): The aspects of the annotations to keep (optional, all by default): "P" (biological
+    process), "F" (molecular function) and/or "C" (cellular component), e.g. "C" or "PF".
+    - evidence (list): The evidence codes of the annotations to keep (optional, all by default), e.g.
+    EXPERIMENTAL_EVIDENCE for the annotations backed by experiments.
+    - negated (str): A character to decide if annotations with a NOT qualifier (which say that a gene
+    does not have a GO ID) are kept ("y") or left out ("n") (optional).
+    - by_aspect (str): A character to decide if the annotations of each aspect are kept apart ("y")
+    or together ("n") (optional).
+    
+    The annotations are filtered as the file is read, so a filtered GOA file takes less memory. Each
+    combination of filters has its own entries in the cache directory.
+    
+    RETURN: 
+    A dictionary containing all the gene names from the  selected GOA file as 
+    keys and a set of their respective GO IDs as values. Synonyms share the set
+    of their gene, and never replace a gene that is itself in the GOA file.
+    With by_aspect = "y", a dictionary with the aspects as keys and the result for each aspect as
+    values (the file is read once for all the aspects, and each aspect has its own cache entry).
+    """
+    
+    if by_aspect == "y":
+        return _all_goa_id_by_aspect(goa_file, cache_dir, compact, aspects or "PFC", evidence, negated)
+    
+    load = _load_goa_compact if compact == "y" else _load_goa
+    filters = (aspects, evidence, negated)
+    
+    kind = _goa_cache_kind(*filters)
+    
+    if cache_dir != None:
+        if not _is_url(goa_file) and compact == "y":
+            return _cached(goa_file, cache_dir, kind, lambda: all_goa_id(goa_file, None, compact, *filters), _dump_goa, load)
+        if not _is_url(goa_file):
+            result = _cached(goa_file, cache_dir, kind, lambda: _read_goa_release(goa_file, *filters), _dump_goa_release, load)
+            return result.complete_info if isinstance(result, _GOARelease) else result
+        
+        local_file, lines = _download(goa_file, cache_dir)
+        if lines == None:                             # The GOA URL didn't change since it was last downloaded
+            return all_goa_id(local_file, cache_dir, compact, *filters)
+    else:
+        lines = _text_lines(goa_file)
+    
+    if compact == "y":
+        with closing(lines) as file:
+            complete_info = GOAnnotations(_iter_goa_annotations(file, *filters))
+        if cache_dir != None:
+            _cached(local_file, cache_dir, kind, lambda: complete_info, _dump_goa, load)
+        return complete_info
+    
+    complete_info = {}
+    synonyms = {}    # The synonym columns seen for each gene
+    
+    # Read the GOA file one line at a time (as it is downloaded for URLs), in whatever order the genes come in
+    with closing(lines) as file:
+        for line in _iter_goa_annotations(file, *filters):
+            main_gene = sys.intern(line[2])
+            go_id = sys.intern(line[4])
+            
+            go_ids = complete_info.get(main_gene)
+            if go_ids == None:
+                complete_info[main_gene] = go_ids = set()
+                synonyms[main_gene] = set()
+            
+            go_ids.add(go_id)
+            synonyms[main_gene].add(line[10])    # Where synonyms are located
+    
+    _add_synonyms(complete_info, synonyms)
+    
+    # Keep a compiled copy of the downloaded file for the next time it doesn't change
+    if cache_dir != None:
+        _cached(local_file, cache_dir, kind, lambda: complete_info, _dump_goa, load)
+            
+    return complete_info
+
+
+
+def _all_goa_id_by_aspect(goa_file, cache_dir, compact, aspects, evidence, negated):
+    """Get the results of "all_goa_id" for each aspect of a GOA file, reading the file only once.
+    
+    PARAMETERS:
+    - goa_file, cache_dir, compact, evidence, negated: See "all_goa_id".
+    - aspects (str): The aspects to get the results of, e.g. "PFC".
+    
+    RETURN:
+    A dictionary with the aspects as keys and the result of "all_goa_id" for each aspect as values.
+    The results are cached under the same entries as "all_goa_id" with each aspect as the filter,
+    and the file is only read if any of them isn't in the cache.
+    """
+    
+    read = {}
+    
+    def result(a):
+        if len(read) == 0:
+            read.update(_read_goa_by_aspect(goa_file, aspects, evidence, negated))
+        if compact == "y":
+            return _load_goa_compact(_dump_goa(read[a]))
+        return read[a]
+    
+    if cache_dir == None:
+        return {a: result(a) for a in dict.fromkeys(aspects)}
+    
+    goa_file = _local_copy(goa_file, cache_dir)
+    load = _load_goa_compact if compact == "y" else _load_goa
+    
+    return {a: _cached(goa_file, cache_dir, _goa_cache_kind(a, evidence, negated), lambda a = a: result(a), _dump_goa, load)
+            for a in dict.fromkeys(aspects)}
+
+
+
+def _read_goa_by_aspect(goa_file, aspects, evidence, negated):
+    """Read a GOA file once into the results of "all_goa_id" for each aspect (as dictionaries).
+    
+    PARAMETERS:
+    - goa_file (str): A GOA file directory or URL.
+    - aspects (str): The aspects to read, e.g. "PFC".
+    - evidence, negated: See "all_goa_id".
+    
+    RETURN:
+    A dictionary with the aspects as keys and the dictionary of "all_goa_id" for each aspect as values.
+    """
+    
+    results = {a: {} for a in aspects}
+    synonyms = {a: {} for a in aspects}    # The synonym columns seen for each gene of each aspect
+    
+    with closing(_text_lines(goa_file)) as file:
+        for line in _iter_goa_annotations(file, aspects, evidence, negated):
+            complete_info = results.get(line[8])
+            if complete_info == None:
+                continue
+            
+            main_gene = sys.intern(line[2])
+            go_ids = complete_info.get(main_gene)
+            if go_ids == None:
+                complete_info[main_gene] = go_ids = set()
+                synonyms[line[8]][main_gene] = set()
+            
+            go_ids.add(sys.intern(line[4]))
+            synonyms[line[8]][main_gene].add(line[10])
+    
+    for a in aspects:
+        _add_synonyms(results[a], synonyms[a])
+    
+    return results
+
+
+
+def _add_synonyms(complete_info, synonyms):
+    """Give the synonyms of "all_goa_id" the same set of GO IDs as their gene (the first gene listing a synonym keeps it).
+    
+    PARAMETERS:
+    - complete_info (dict): The genes as keys and their sets of GO IDs as values.
+    - synonyms (dict): The genes, in the order they are found in the GOA file, as keys and a set
+    of their synonym columns as values (looked at in sorted order, so the synonyms always come in
+    the same order).
+    """
+    
+    genes = set(complete_info)
+    
+    for main_gene, fields in synonyms.items():
+        for field in sorted(fields):
+            for syn in field.split("|"):
+                if syn != "" and syn not in genes:
+                    complete_info.setdefault(sys.intern(syn), complete_info[main_gene])
+
+
+
+def _goa_cache_kind(aspects = None, evidence = None, negated = "y"):
+    """Name the cache entries of "all_goa_id" (results with filters are cached apart from the complete results)."""
+    
+    if (aspects, evidence, negated) == (None, None, "y"):
+        return "goa"
+    
+    return "goa-" + hashlib.sha256(repr((sorted(aspects or ""), sorted(evidence or []), negated)).encode("utf-8")).hexdigest()[:8]
+
+
+
+def _iter_goa_annotations(lines, aspects = None, evidence = None, negated = "y"):
+    """Read the annotation lines of a GOA file that pass some filters.
+    
+    PARAMETERS:
+    - lines (iterable): The lines of a GOA file.
+    - aspects, evidence, negated: Filters of the annotations (optional). See "all_goa_id".
+    
+    RETURN:
+    A generator of the annotation lines kept, split into a list of their first 11 columns and the rest.
+    """
+    
+    # Aspects are single letters, so "PF" is looked in as a set and an empty aspect column isn't kept
+    if aspects != None:
+        aspects = frozenset(aspects)
+    if evidence != None:
+        evidence = frozenset(evidence)
+    
+    for i in lines:
+        if i.startswith("!") or i.strip() == "":    # Skip the annotation lines that start with "!"
+            continue
+        
+        line = i.split("\t", 11)
+        
+        if aspects != None and line[8] not in aspects:
+            continue
+        if evidence != None and line[6] not in evidence:
+            continue
+        if negated == "n" and line[3].startswith("NOT"):     # Qualifiers like "NOT" or "NOT|enables"
+            continue
+        
+        yield line
+
+
+
+class GOAnnotations(Mapping):
+    """The genes of a GOA file and their GO IDs, stored as numbers to use little memory.
+    
+    Works like the dictionary made by "all_goa_id" (gene names and synonyms as keys and sets of
+    GO IDs as values), but each GO ID is stored as the number of its accession (5737 for
+    GO:0005737) in a flat array, where the sorted numbers of each gene come one after the other.
+    Gene names are kept once in a table of row numbers, shared by their synonyms. The set of GO IDs
+    of a gene is made the first time it is asked for and given again to the later lookups of the
+    gene and its synonyms, like the shared sets of the dictionary (so only the genes looked up take
+    the memory of their sets).
+    
+    ATTRIBUTES:
+    - genes (list): The gene names (without their synonyms), in the order they are read.
+    """
+    
+    def __init__(self, annotations):
+        """Store the annotations of a GOA file.
+        
+        PARAMETERS:
+        - annotations (iterable): The annotation lines of a GOA file, as read by "_iter_goa_annotations".
+        """
+        
+        genes = []
+        rows = {}
+        synonyms = []    # The synonym columns seen for each gene
+        pairs = array("Q")
+        
+        for line in annotations:
+            row = rows.get(line[2])
+            if row == None:
+                row = rows[sys.intern(line[2])] = len(genes)
+                genes.append(line[2])
+                synonyms.append(set())
+            
+            pairs.append(row << 32 | _go_number(line[4]))
+            synonyms[row].add(line[10])
+        
+        # Sort the pairs by gene and GO ID, leaving out repeated annotations
+        offsets = array("I", [0] * (len(genes) + 1))
+        numbers = array("I")
+        last = None
+        for pair in sorted(pairs):
+            if pair != last:
+                numbers.append(pair & 0xFFFFFFFF)
+                offsets[(pair >> 32) + 1] += 1
+                last = pair
+        
+        # Give the synonyms the same row as their gene (the first gene listing a synonym keeps it)
+        main_genes = set(rows)
+        for row, fields in enumerate(synonyms):
+            for field in sorted(fields):
+                for syn in field.split("|"):
+                    if syn != "" and syn not in main_genes:
+                        rows.setdefault(sys.intern(syn), row)
+        
+        self._build(genes, rows, array("I", accumulate(offsets)), numbers)
+    
+    
+    def _build(self, genes, rows, offsets, numbers):
+        
+        self.genes = genes
+        self._rows = rows
+        self._offsets = offsets
+        self._numbers = numbers
+        self._sets = {}              # The sets of GO IDs of the rows already looked up
+        self._go_ids = _GOIDs()
+    
+    
+    def __getitem__(self, gene):
+        
+        row = self._rows[gene]
+        go_ids = self._sets.get(row)
+        
+        if go_ids == None:
+            go_ids = self._sets[row] = set(self._decode(row))
+        
+        return go_ids
+    
+    
+    def __contains__(self, gene):
+        
+        return gene in self._rows
+    
+    
+    def __iter__(self):
+        
+        return iter(self._rows)
+    
+    
+    def __len__(self):
+        
+        return len(self._rows)
+    
+    
+    def keys(self):
+        
+        return self._rows.keys()     # Looked up by "get_goa_id" without going through __contains__
+    
+    
+    def go_numbers(self, gene):
+        """Get the GO IDs of a gene (or synonym) as the sorted numbers of their accessions, without making a set."""
+        
+        row = self._rows[gene]
+        
+        return self._numbers[self._offsets[row]:self._offsets[row + 1]]
+    
+    
+    def has(self, gene, go_id):
+        """Check if a gene (or synonym) has a GO ID, without making a set of its GO IDs."""
+        
+        row = self._rows.get(gene)
+        if row == None or not go_id.startswith("GO:"):
+            return False
+        
+        number = int(go_id[3:])
+        numbers = self._numbers
+        end = self._offsets[row + 1]
+        i = bisect_left(numbers, number, self._offsets[row], end)
+        
+        return i < end and numbers[i] == number
+    
+    
+    def to_dict(self):
+        """Get the dictionary made by "all_goa_id" (where synonyms share the set of their gene)."""
+        
+        sets = [set(self._decode(row)) for row in range(len(self.genes))]
+        
+        return {name: sets[row] for name, row in self._rows.items()}
+    
+    
+    def _decode(self, row):
+        
+        return map(self._go_ids.__getitem__, self._numbers[self._offsets[row]:self._offsets[row + 1]])
+
+
+
+class _GOIDs(dict):
+    """A dictionary that makes the GO ID of each accession number (GO:0005737 for 5737) as it is looked up, only once."""
+    
+    def __missing__(self, number):
+        
+        go_id = self[number] = "GO:%07d" % number
+        
+        return go_id
+
+
+
+def _go_number(go_id):
+    """Get the number of a GO ID's accession (5737 for GO:0005737)."""
+    
+    if not go_id.startswith("GO:"):
+        raise ValueError("Not a GO ID: " + str(go_id))
+    
+    return int(go_id[3:])
+
+
+
+@_instrumented
+def gene_aliases(goa_file, cache_dir = None):
+    """Find the gene that each gene name, synonym and UniProt accession of a GOA file stands for.
+    
+    PARAMETERS:
+    - goa_file (str): A GOA file directory or URL (gzip compressed files ending in ".gz" are also accepted).
+    - cache_dir (str): A directory where GOA URLs are downloaded to, so that they are only
+    downloaded again if they have changed (optional).
+    
+    RETURN:
+    A GeneAliases that turns gene names (like the "Hugo_Symbol" of MAF samples) into the gene
+    names used in the GOA file.
+    """
+    
+    with closing(_text_lines(goa_file, cache_dir)) as lines:
+        return GeneAliases(_iter_goa_annotations(lines))
+
+
+
+class GeneAliases:
+    """The gene names of a GOA file, with the synonyms and UniProt accessions that stand for each of them.
+    
+    Gene names always stand for themselves. A synonym or accession listed by a single gene stands
+    for that gene, while one listed by several genes is ambiguous and isn't resolved (unlike in
+    "all_goa_id", where the first gene listing a synonym keeps it), whatever order the GOA file is in.
+    
+    ATTRIBUTES:
+    - ambiguous (dict): A dictionary of ambiguous synonyms and accessions as keys and a sorted list
+    of the genes that list them as values.
+    """
+    
+    def __init__(self, annotations):
+        """Find the aliases of the genes of a GOA file.
+        
+        PARAMETERS:
+        - annotations (iterable): The annotation lines of a GOA file, as read by "_iter_goa_annotations".
+        """
+        
+        aliases = {}    # The synonym columns and accessions seen for each gene
+        
+        for line in annotations:
+            gene = line[2]
+            if gene not in aliases:
+                aliases[sys.intern(gene)] = set()
+            aliases[gene].add(line[10])
+            aliases[gene].add(line[1])                   # The UniProt accession (or ID of another database)
+        
+        table = {g: g for g in aliases}
+        self.ambiguous = {}
+        owners = {}
+        
+        for gene, fields in aliases.items():
+            for field in fields:
+                for alias in field.split("|"):
+                    if alias == "" or alias in table:
+                        continue
+                    if alias in self.ambiguous:
+                        self.ambiguous[alias].add(gene)
+                    elif owners.setdefault(alias, gene) != gene:
+                        self.ambiguous[alias] = set([owners.pop(alias), gene])
+        
+        self.ambiguous = {alias: sorted(genes) for alias, genes in self.ambiguous.items()}
+        
+        # A single table of every name that can be resolved, so resolving is one lookup per name
+        table.update(owners)
+        self._table = table
+        self._folded = None
+    
+    
+    def __len__(self):
+        """The number of names (genes, synonyms and accessions) that can be resolved."""
+        
+        return len(self._table)
+    
+    
+    def resolve(self, symbols, ignore_case = "n"):
+        """Find the genes that some names stand for.
+        
+        PARAMETERS:
+        - symbols (iterable): Gene names, synonyms or UniProt accessions (like the gene names of
+        all the samples of a MAF file).
+        - ignore_case (str): A character to decide if names that aren't found as they are written
+        are looked for again ignoring upper and lower case ("y") or not ("n") (optional).
+        
+        RETURN:
+        A list with the gene each name stands for, in the same order, or None for names that
+        aren't found or are ambiguous.
+        """
+        
+        symbols = list(symbols)
+        resolved = list(map(self._table.get, symbols))
+        
+        if ignore_case == "y":
+            folded = self._folded_table()
+            for i, r in enumerate(resolved):
+                if r == None:
+                    resolved[i] = folded.get(symbols[i].casefold())
+        
+        return resolved
+    
+    
+    def candidates(self, symbol):
+        """Get every gene a name could stand for (more than one for ambiguous synonyms), or an empty list."""
+        
+        if symbol in self._table:
+            return [self._table[symbol]]
+        
+        return list(self.ambiguous.get(symbol, []))
+    
+    
+    def _folded_table(self):
+        """Get (building it the first time) the table of names ignoring case. Names that stand
+        for different genes once their case is ignored are left out."""
+        
+        if self._folded == None:
+            folded = {}
+            clashes = set()
+            for alias, gene in self._table.items():
+                key = alias.casefold()
+                if folded.setdefault(key, gene) != gene:
+                    clashes.add(key)
+            for key in clashes:
+                del folded[key]
+            self._folded = folded
+        
+        return self._folded
+
+
+
+@_instrumented
+def get_goa_id(genes, id_dict, aliases = None, ignore_case = "n"):
+    """Obtain specified genes' GO IDs.
+    
+    PARAMETERS:
+    - genes (list): A list of gene names.
+    - id_dict (dict): A dictionary of gene names as keys and a list of GO IDs as values
+    - aliases (GeneAliases): The gene aliases of the GOA file, from "gene_aliases" (optional). Gene
+    names are then looked for as the genes, synonyms or accessions they stand for, and ambiguous
+    synonyms (listed by several genes) are left out.
+    - ignore_case (str): A character to decide if the aliases are also looked for ignoring upper
+    and lower case ("y") or not ("n") (optional). See "GeneAliases.resolve".
+    
+    RETURN: 
+    A dictionary containing the selected gene names as keys and set of
+    their associated GO IDs as values.
+    """
+    
+    result = {}
+    
+    if aliases != None:
+        genes = list(genes)
+        canonical = dict(zip(genes, aliases.resolve(genes, ignore_case)))
+
+    for g in genes:
+        
+        name = g
+        if aliases != None and canonical[g] != None:
+            name = canonical[g]
+        elif aliases != None and g in aliases.ambiguous:
+            continue
+                
+        if name in id_dict.keys():
+            result[g] = id_dict[name]    
+
+    return result
+        
+
+    
+@_instrumented
+def get_genes(samples, gene_index = 0):
+    """Filter gene names from sample information lists.
+    
+    PARAMETERS:
+    - samples (list): A list of sample information lists.
+    - gene_index (int): The index where the gene names are stored (optional).
+    
+    RETURN:
+    A set of unique gene names collected from the list of samples. 
+    """
+    
+    genes = set()
+    
+    for s in samples:
+        genes.add(s[gene_index])
+    
+    return genes
+
+
+
+class GeneOntologyMatrix:
+    """A sparse matrix of genes (rows) by GO IDs (columns), marking which GO IDs each gene has.
+    
+    Genes and GO IDs are numbered, and the matrix is stored twice in flat arrays of numbers:
+    by rows (the sorted GO ID numbers of each gene, CSR) and by columns (the sorted gene numbers
+    of each GO ID, CSC). Synonyms that share their gene's set of GO IDs in "all_goa_id" share
+    its row as well.
+    
+    ATTRIBUTES:
+    - genes (list): The gene names of the rows, in row order.
+    - go_ids (list): The GO IDs of the columns, in column order.
+    """
+    
+    def __init__(self, id_dict):
+        """Build the matrix.
+        
+        PARAMETERS:
+        - id_dict (dict): A dictionary of gene names as keys and a set of GO IDs as values (like
+        the result of "all_goa_id" or "get_goa_id").
+        """
+        
+        if isinstance(id_dict, GOAnnotations):
+            id_dict = id_dict.to_dict()
+        
+        go_numbers = {}
+        row_of_set = {}
+        genes = []
+        rows = {}
+        offsets = array("I", [0])
+        columns = array("I")
+        
+        for name, ids in id_dict.items():
+            if id(ids) in row_of_set:                  # A synonym of an earlier gene
+                rows[name] = row_of_set[id(ids)]
+                continue
+            
+            row_of_set[id(ids)] = rows[name] = len(genes)
+            genes.append(name)
+            columns.extend(sorted(set(go_numbers.setdefault(i, len(go_numbers)) for i in ids)))
+            offsets.append(len(columns))
+        
+        self._build(genes, rows, list(go_numbers), offsets, columns)
+    
+    
+    def _build(self, genes, rows, go_ids, row_offsets, row_columns):
+        """Store the matrix by rows and work out its storage by columns."""
+        
+        self.genes = genes
+        self.go_ids = go_ids
+        self._rows = rows
+        self._columns = {go_id: c for c, go_id in enumerate(go_ids)}
+        self._row_offsets = row_offsets
+        self._row_columns = row_columns
+        self._column_offsets, self._column_rows = _transpose(row_offsets, row_columns, len(go_ids))
+    
+    
+    @property
+    def shape(self):
+        """The number of genes and GO IDs of the matrix."""
+        
+        return len(self.genes), len(self.go_ids)
+    
+    
+    def __len__(self):
+        """The number of gene-GO ID pairs marked in the matrix."""
+        
+        return len(self._row_columns)
+    
+    
+    def rows(self, genes):
+        """Select the rows of some genes.
+        
+        PARAMETERS:
+        - genes (iterable): Gene names (or synonyms). Genes missing from the matrix are skipped.
+        
+        RETURN:
+        A GeneOntologyMatrix with one row per gene found (in the given order) and the same columns.
+        Synonyms of a gene that was already selected share its row.
+        """
+        
+        names = []
+        rows = {}
+        selected = {}    # Row numbers of this matrix as keys and of the new matrix as values
+        offsets = array("I", [0])
+        columns = array("I")
+        
+        for g in genes:
+            if g in self._rows and g not in rows:
+                r = self._rows[g]
+                if r in selected:                      # A synonym of a gene that was already selected
+                    rows[g] = selected[r]
+                    continue
+                rows[g] = selected[r] = len(names)
+                names.append(g)
+                columns.extend(self._row_columns[self._row_offsets[r]:self._row_offsets[r + 1]])
+                offsets.append(len(columns))
+        
+        matrix = GeneOntologyMatrix.__new__(GeneOntologyMatrix)
+        matrix._build(names, rows, self.go_ids, offsets, columns)
+        
+        return matrix
+    
+    
+    def columns(self, go_ids):
+        """Select the columns of some GO IDs (like the descendants of a term, from "go_graph").
+        
+        PARAMETERS:
+        - go_ids (iterable): GO IDs. GO IDs missing from the matrix are skipped.
+        
+        RETURN:
+        A GeneOntologyMatrix with the same rows and one column per GO ID found (in the given order).
+        """
+        
+        # Repeated GO IDs are left out, keeping the order they are first given in
+        selected = [go_id for go_id in dict.fromkeys(go_ids) if go_id in self._columns]
+        
+        # Store the selected columns by columns, and transpose them back into rows
+        offsets = array("I", [0])
+        column_rows = array("I")
+        for go_id in selected:
+            c = self._columns[go_id]
+            column_rows.extend(self._column_rows[self._column_offsets[c]:self._column_offsets[c + 1]])
+            offsets.append(len(column_rows))
+        
+        row_offsets, row_columns = _transpose(offsets, column_rows, len(self.genes))
+        
+        matrix = GeneOntologyMatrix.__new__(GeneOntologyMatrix)
+        matrix._build(self.genes, self._rows, selected, row_offsets, row_columns)
+        
+        return matrix
+    
+    
+    def propagate(self, graph):
+        """Add the ancestors of each gene's GO IDs to the gene.
+        
+        PARAMETERS:
+        - graph (GOGraph): The graph of GO terms (see "go_graph").
+        
+        RETURN:
+        A GeneOntologyMatrix where each gene also has every GO ID its GO IDs descend from, with
+        a new column for each ancestor that wasn't a column yet. GO IDs missing from the graph
+        are kept as they are.
+        """
+        
+        go_ids = list(self.go_ids)
+        columns = dict(self._columns)
+        
+        # The new columns of each column's GO ID and its ancestors
+        expand = []
+        for go_id in self.go_ids:
+            group = [columns[go_id]]
+            if go_id in graph._numbers:
+                n = graph._numbers[go_id]
+                for a in graph._ancestors[graph._ancestor_offsets[n]:graph._ancestor_offsets[n + 1]]:
+                    ancestor = graph.ids[a]
+                    if ancestor not in columns:
+                        columns[ancestor] = len(go_ids)
+                        go_ids.append(ancestor)
+                    group.append(columns[ancestor])
+            expand.append(group)
+        
+        offsets = array("I", [0])
+        row_columns = array("I")
+        for r in range(len(self.genes)):
+            found = set()
+            for c in self._row_columns[self._row_offsets[r]:self._row_offsets[r + 1]]:
+                found.update(expand[c])
+            row_columns.extend(sorted(found))
+            offsets.append(len(row_columns))
+        
+        matrix = GeneOntologyMatrix.__new__(GeneOntologyMatrix)
+        matrix._build(self.genes, self._rows, go_ids, offsets, row_columns)
+        
+        return matrix
+    
+    
+    def term_counts(self):
+        """Count the genes that have each GO ID.
+        
+        RETURN:
+        A dictionary of GO IDs as keys and their number of genes as values.
+        """
+        
+        offsets = self._column_offsets
+        
+        return {go_id: offsets[c + 1] - offsets[c] for c, go_id in enumerate(self.go_ids)}
+    
+    
+    def genes_with(self, go_ids):
+        """Find the genes that have any of some GO IDs.
+        
+        PARAMETERS:
+        - go_ids (iterable): GO IDs.
+        
+        RETURN:
+        A list of the gene names (of the rows) that have at least one of the GO IDs, in row order.
+        """
+        
+        found = set()
+        for go_id in go_ids:
+            if go_id in self._columns:
+                c = self._columns[go_id]
+                found.update(self._column_rows[self._column_offsets[c]:self._column_offsets[c + 1]])
+        
+        return [self.genes[r] for r in sorted(found)]
+    
+    
+    def go_ids_of(self, gene):
+        """Get the GO IDs of a gene (or synonym).
+        
+        RETURN:
+        A set of the gene's GO IDs.
+        """
+        
+        r = self._rows[gene]
+        
+        return set(self.go_ids[c] for c in self._row_columns[self._row_offsets[r]:self._row_offsets[r + 1]])
+    
+    
+    def to_dict(self):
+        """Turn the matrix back into a dictionary of gene names (and synonyms) as keys and a set
+        of their GO IDs as values, with synonyms sharing their gene's set."""
+        
+        sets = [self.go_ids_of(g) for g in self.genes]
+        
+        return {name: sets[r] for name, r in self._rows.items()}
+
+
+
+@_instrumented
+def go_enrichment(genes, background, graph = None):
+    """Find the GO IDs that are over-represented among a set of genes (like mutated genes).
+    
+    PARAMETERS:
+    - genes (iterable): Gene names (like the result of "get_genes").
+    - background (dict or GeneOntologyMatrix): All the genes that could have been picked and their
+    GO IDs, like the result of "all_goa_id". When running many analyses against the same background,
+    build a GeneOntologyMatrix from it once (and propagate it with "graph" if needed) and pass that.
+    - graph (GOGraph): A graph of GO terms (see "go_graph") used to also count each gene for every
+    ancestor of its GO IDs (optional).
+    
+    RETURN:
+    A dictionary with each GO ID that at least one of the genes has as keys, in increasing order of
+    p-value, and tuples with the number of the genes that have it, the number of background genes
+    that have it, its p-value (one-sided hypergeometric test, the same as Fisher's exact test) and
+    its false discovery rate (Benjamini-Hochberg correction over all the background's GO IDs) as values.
+    """
+    
+    if type(background) is not GeneOntologyMatrix:
+        background = GeneOntologyMatrix(background)
+    if graph != None:
+        background = background.propagate(graph)
+    
+    study = background.rows(genes)
+    
+    total = len(background.genes)     # N: background genes
+    picked = len(study.genes)         # n: genes found in the background
+    log_factorials = _log_factorials(total)
+    
+    def log_choose(a, b):
+        return log_factorials[a] - log_factorials[b] - log_factorials[a - b]
+    
+    results = []
+    offsets = study._column_offsets
+    background_offsets = background._column_offsets
+    
+    for c in range(len(study.go_ids)):
+        k = offsets[c + 1] - offsets[c]
+        if k == 0:
+            continue
+        K = background_offsets[c + 1] - background_offsets[c]
+        
+        # P(X >= k), adding up the hypergeometric probabilities of k, k + 1, ... min(n, K)
+        pmf = math.exp(log_choose(K, k) + log_choose(total - K, picked - k) - log_choose(total, picked))
+        p_value = 0.0
+        for x in range(k, min(picked, K) + 1):
+            p_value = p_value + pmf
+            pmf = pmf * (K - x) * (picked - x) / ((x + 1) * (total - K - picked + x + 1))
+        
+        results.append((min(p_value, 1.0), study.go_ids[c], k, K))
+    
+    results.sort()
+    
+    # Benjamini-Hochberg false discovery rates, where every background GO ID counts as a test
+    tests = len(background.go_ids)
+    fdrs = [0.0] * len(results)
+    lowest = 1.0
+    for i in range(len(results) - 1, -1, -1):
+        lowest = min(lowest, results[i][0] * tests / (i + 1))
+        fdrs[i] = lowest
+    
+    return {go_id: (k, K, p_value, fdr) for (p_value, go_id, k, K), fdr in zip(results, fdrs)}
+
+
+
+def _log_factorials(n):
+    """Get a list of the natural logarithms of the factorials of 0 to (at least) n."""
+    
+    while len(_LOG_FACTORIALS) <= n:
+        _LOG_FACTORIALS.append(_LOG_FACTORIALS[-1] + math.log(len(_LOG_FACTORIALS)))
+    
+    return _LOG_FACTORIALS
+
+
+
+def _transpose(offsets, values, size):
+    """Transpose a sparse matrix stored as runs of sorted numbers in flat arrays.
+    
+    PARAMETERS:
+    - offsets (array): The position where each run starts (plus the end of the last run).
+    - values (array): The runs one after the other.
+    - size (int): The number of runs of the transposed matrix.
+    
+    RETURN:
+    A tuple with the offsets and values arrays of the transposed matrix, with sorted runs.
+    """
+    
+    counts = array("I", [0]) * (size + 1)
+    for v in values:
+        counts[v + 1] = counts[v + 1] + 1
+    
+    new_offsets = array("I", accumulate(counts))
+    fill = array("I", new_offsets)
+    new_values = array("I", [0]) * len(values)
+    
+    for run in range(len(offsets) - 1):
+        for i in range(offsets[run], offsets[run + 1]):
+            v = values[i]
+            new_values[fill[v]] = run
+            fill[v] = fill[v] + 1
+    
+    return new_offsets, new_values
+
+
+
+
+# ------------------------------ STEP 3 (GO Terms) ------------------------------
+
+@_instrumented
+def get_ontologies(obo_file = None, cache_dir = None):
+    """Extract all GO IDs and their corresponding GO terms from an OBO file.
+    
+    PARAMETERS:
+    - obo_file (str): An optional text file name containing ontologies in OBO format
+    or an OBO URL (optional).
+    - cache_dir (str): A directory where a compiled copy of the result is kept (optional). Later
+    calls with the same unchanged OBO file load it from there instead of parsing the file again.
+    OBO URLs are also downloaded to it, and are only downloaded again if they have changed.
+    
+    RETURN:
+    A dictionary with all GO IDs as keys and their corresponding terms as values.
+    """
+    
+    if obo_file == None:
+        obo_file = GO_OBO_URL
+    
+    if cache_dir != None:
+        if not _is_url(obo_file):
+            return _cached(obo_file, cache_dir, "obo", lambda: get_ontologies(obo_file), _dump_terms, _load_terms)
+        
+        local_file, lines = _download(obo_file, cache_dir)
+        if lines == None:                             # The OBO URL didn't change since it was last downloaded
+            return get_ontologies(local_file, cache_dir)
+    else:
+        lines = _text_lines(obo_file)
+    
+    # Find and store each GO ID in the OBO file as keys and their associated term as values
+    id_term = {}
+    
+    for term in _iter_obo_terms(lines):
+        id_term[term["id"]] = term["name"]
+    
+    # Keep a compiled copy of the downloaded file for the next time it doesn't change
+    if cache_dir != None:
+        _cached(local_file, cache_dir, "obo", lambda: id_term, _dump_terms, _load_terms)
+    
+    return id_term
+
+
+
+@_instrumented
+def go_graph(obo_file = None, relations = ["is_a", "part_of"], cache_dir = None):
+    """Build the graph of GO terms stored in an OBO file.
+    
+    PARAMETERS:
+    - obo_file (str): An optional text file name containing ontologies in OBO format
+    or an OBO URL (optional). Uses the same default OBO URL as "get_ontologies".
+    - relations (list): The relations between terms that link a term to its parents (optional).
+    - cache_dir (str): A directory where OBO URLs are downloaded to, so that they are only
+    downloaded again if they have changed (optional).
+    
+    RETURN:
+    A GOGraph with the ancestors and descendants of every GO term.
+    """
+    
+    if obo_file == None:
+        obo_file = GO_OBO_URL
+    
+    return GOGraph(_iter_obo_terms(_text_lines(obo_file, cache_dir)), relations)
+
+
+
+class GOGraph:
+    """A graph of GO terms with the ancestors and descendants of every term precomputed.
+    
+    Terms are numbered in the order they are read, and the ancestors and descendants of
+    each term are stored as sorted runs of term numbers in flat arrays, so that checking
+    if a term descends from another doesn't need to walk the graph.
+    
+    ATTRIBUTES:
+    - ids (list): The GO IDs of the terms, in term number order.
+    - terms (dict): A dictionary with all GO IDs as keys and their corresponding terms as values.
+    - obsolete (set): The GO IDs of obsolete terms.
+    """
+    
+    def __init__(self, terms, relations = ["is_a", "part_of"]):
+        """Build the graph.
+        
+        PARAMETERS:
+        - terms (iterable): The terms of an OBO file, as read by "_iter_obo_terms".
+        - relations (list): The relations between terms that link a term to its parents (optional).
+        """
+        
+        self.ids = []
+        self.terms = {}
+        self.obsolete = set()
+        self._numbers = {}    # GO IDs and alternative GO IDs as keys and term numbers as values
+        
+        parent_ids = []
+        alt_ids = []
+        for term in terms:
+            self._numbers[term["id"]] = len(self.ids)
+            self.ids.append(term["id"])
+            self.terms[term["id"]] = term["name"]
+            if term["is_obsolete"]:
+                self.obsolete.add(term["id"])
+            
+            parent_ids.append([p for relation, p in term["parents"] if relation in relations])
+            alt_ids.append(term["alt_id"])
+        
+        for number, alternatives in enumerate(alt_ids):
+            for alt in alternatives:
+                self._numbers.setdefault(alt, number)
+        
+        # Link each term to its parents (parents missing from the file are ignored)
+        parents = [set(self._numbers[p] for p in ids if p in self._numbers) for ids in parent_ids]
+        
+        # Visit parents before their children (Kahn's algorithm)
+        children = [[] for _ in self.ids]
+        waiting = [len(p) for p in parents]
+        for child, ps in enumerate(parents):
+            for p in ps:
+                children[p].append(child)
+        
+        order = [n for n in range(len(self.ids)) if waiting[n] == 0]
+        for n in order:
+            for child in children[n]:
+                waiting[child] = waiting[child] - 1
+                if waiting[child] == 0:
+                    order.append(child)
+        
+        if len(order) != len(self.ids):
+            raise ValueError("The OBO file has cyclic relations between its terms")
+        
+        ancestors = [None] * len(self.ids)
+        for n in order:
+            found = set(parents[n])
+            for p in parents[n]:
+                found.update(ancestors[p])
+            ancestors[n] = found
+        
+        descendants = [[] for _ in self.ids]
+        for n in range(len(self.ids)):
+            for a in ancestors[n]:
+                descendants[a].append(n)    # Already sorted, since "n" goes up
+        
+        self._ancestor_offsets, self._ancestors = _pack_runs(sorted(a) for a in ancestors)
+        self._descendant_offsets, self._descendants = _pack_runs(descendants)
+    
+    
+    def number(self, go_id):
+        """Get the term number of a GO ID (alternative GO IDs are also accepted)."""
+        
+        if go_id not in self._numbers:
+            raise KeyError("Unknown GO ID: " + str(go_id))
+        
+        return self._numbers[go_id]
+    
+    
+    def ancestors(self, go_id, include_self = "n"):
+        """Get the ancestors of a GO term.
+        
+        PARAMETERS:
+        - go_id (str): A GO ID.
+        - include_self (str): A character to decide if the GO ID itself is included ("y") or not ("n") (optional).
+        
+        RETURN:
+        A list of the GO IDs of all the terms the given term descends from.
+        """
+        
+        return self._run(go_id, self._ancestor_offsets, self._ancestors, include_self)
+    
+    
+    def descendants(self, go_id, include_self = "n"):
+        """Get the descendants of a GO term.
+        
+        PARAMETERS:
+        - go_id (str): A GO ID.
+        - include_self (str): A character to decide if the GO ID itself is included ("y") or not ("n") (optional).
+        
+        RETURN:
+        A list of the GO IDs of all the terms that descend from the given term.
+        """
+        
+        return self._run(go_id, self._descendant_offsets, self._descendants, include_self)
+    
+    
+    def is_descendant(self, go_id, ancestor_id):
+        """Check if a GO term descends from another.
+        
+        PARAMETERS:
+        - go_id (str): The GO ID of the possible descendant.
+        - ancestor_id (str): The GO ID of the possible ancestor.
+        
+        RETURN:
+        True if the first term descends from the second, or False otherwise.
+        """
+        
+        n = self.number(go_id)
+        a = self.number(ancestor_id)
+        start, end = self._ancestor_offsets[n], self._ancestor_offsets[n + 1]
+        i = bisect_left(self._ancestors, a, start, end)
+        
+        return i < end and self._ancestors[i] == a
+    
+    
+    def _run(self, go_id, offsets, values, include_self):
+        """Get the GO IDs of the term numbers stored for a term in a pair of flat arrays."""
+        
+        n = self.number(go_id)
+        ids = [self.ids[v] for v in values[offsets[n]:offsets[n + 1]]]
+        
+        if include_self == "y":
+            ids.insert(0, self.ids[n])
+        
+        return ids
+
+
+
+def _pack_runs(runs):
+    """Store lists of unsigned integers in a flat array.
+    
+    PARAMETERS:
+    - runs (iterable): The lists of integers to store.
+    
+    RETURN:
+    A tuple with an array of the position where each list starts (plus the end of the last
+    list) and an array with all the lists one after the other.
+    """
+    
+    offsets = array("I", [0])
+    values = array("I")
+    
+    for run in runs:
+        values.extend(run)
+        offsets.append(len(values))
+    
+    return offsets, values
+
+
+
+def _text_lines(file_name, cache_dir = None):
+    """Read the lines of a text file or URL, one at a time.
+    
+    PARAMETERS:
+    - file_name (str): A file name or URL (gzip compressed files ending in ".gz" are also accepted).
+    - cache_dir (str): A directory where URLs are downloaded to (optional).
+    
+    RETURN:
+    A generator of the lines of the file. URLs are read as they are downloaded.
+    """
+    
+    if _is_url(file_name):                           # In case a URL is given
+        local_file, lines = _download(file_name, cache_dir)
+        if lines != None:
+            yield from lines
+            return
+        file_name = local_file
+    
+    with _open_text(file_name) as file:              # In case a file is given
+        yield from file
+
+
+
+def _local_copy(file_name, cache_dir):
+    """Get the local copy of a file: the file itself, or a URL downloaded to the cache directory
+    (only downloaded again if it changed)."""
+    
+    if not _is_url(file_name):
+        return file_name
+    
+    local_file, lines = _download(file_name, cache_dir)
+    if lines != None:
+        with closing(lines):
+            for line in lines:                       # Saves the new version of the file in the cache directory
+                pass
+    
+    return local_file
+
+
+
+def _is_url(file_name):
+    """Check if a file name is an HTTP(S) URL."""
+    
+    return type(file_name) is str and (file_name.startswith("http://") or file_name.startswith("https://"))
+
+
+
+def _download(url, cache_dir = None):
+    """Download a text file, reusing an earlier download if the file didn't change.
+    
+    PARAMETERS:
+    - url (str): The URL of the file. Files ending in ".gz" are decompressed as they arrive.
+    - cache_dir (str): A directory where the file is downloaded to (optional). The "ETag" and
+    "Last-Modified" headers of the response are kept with it, so that the next download only
+    happens if the server reports a change.
+    
+    RETURN:
+    A tuple with the name of the downloaded file (None without a cache directory) and a
+    generator of the lines of the file as they arrive, or None instead of the generator if
+    the file didn't change since it was last downloaded. Connection errors and server errors
+    are tried again up to HTTP_RETRIES times, waiting longer each time, before the file starts arriving.
+    """
+    
+    local_file = None
+    headers = {}
+    compressed = url.split("?")[0].endswith(".gz")
+    
+    if cache_dir != None:
+        os.makedirs(cache_dir, exist_ok = True)
+        local_file = _download_path(url, cache_dir)
+        
+        if os.path.isfile(local_file) and os.path.isfile(local_file + ".json"):
+            with open(local_file + ".json") as file:
+                validators = json.load(file)
+            if validators.get("etag") != None:
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified") != None:
+                headers["If-Modified-Since"] = validators["last_modified"]
+    
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            response = _session().get(url, headers = headers, stream = True, timeout = HTTP_TIMEOUT)
+            if response.status_code < 500 or attempt == HTTP_RETRIES:
+                break
+            response.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == HTTP_RETRIES:
+                raise
+        
+        time.sleep(2 ** attempt)                      # Wait 1, 2, 4... seconds before trying again
+    
+    if response.status_code == 304:
+        response.close()
+        _cache_event("download", True)
+        os.utime(local_file)      # Keep track of the most recently used downloads
+        return local_file, None
+    
+    response.raise_for_status()
+    if local_file != None:
+        _cache_event("download", False)
+    
+    return local_file, _response_lines(response, local_file, compressed)
+
+
+
+def _download_path(url, cache_dir):
+    """Get the file name a URL is downloaded to in a cache directory (see "_download")."""
+    
+    local_file = os.path.join(cache_dir, "download-" + hashlib.sha256(url.encode("utf-8")).hexdigest()[:16])
+    if url.split("?")[0].endswith(".gz"):
+        local_file += ".gz"                           # Kept compressed, as downloaded
+    
+    return local_file
+
+
+
+def _response_lines(response, local_file, compressed = False):
+    """Read the lines of a streamed HTTP response as they arrive.
+    
+    PARAMETERS:
+    - response (requests.Response): A streamed response.
+    - local_file (str): A file name to save the response to, or None.
+    - compressed (bool): True if the response is a gzip file, to decompress it as it arrives (optional).
+    
+    RETURN:
+    A generator of the lines of the response. The response is only saved (together with
+    its "ETag" and "Last-Modified" headers) once it has been completely read.
+    """
+    
+    save_file = None
+    if local_file != None:
+        save_file = open(local_file + ".tmp", "wb")
+    
+    complete = False
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compressed else None
+    
+    try:
+        rest = b""
+        
+        for chunk in response.iter_content(1024 * 1024):
+            if save_file != None:
+                save_file.write(chunk)
+            
+            if decompressor != None:
+                data = decompressor.decompress(chunk)
+                # Gzip files can be made of several compressed parts one after the other
+                while decompressor.eof and decompressor.unused_data != b"":
+                    unused = decompressor.unused_data
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    data += decompressor.decompress(unused)
+                chunk = data
+            
+            lines = (rest + chunk).split(b"\n")
+            rest = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8") + "\n"
+        
+        if rest != b"":
+            yield rest.decode("utf-8")
+        
+        complete = True
+    
+    finally:
+        response.close()
+        
+        if save_file != None:
+            save_file.close()
+            
+            if complete:
+                os.replace(local_file + ".tmp", local_file)
+                with open(local_file + ".json", "w") as file:
+                    json.dump({"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}, file)
+                _evict_cache(os.path.dirname(local_file), local_file)
+            else:
+                os.remove(local_file + ".tmp")
+
+
+
+def _session():
+    """Get the HTTP session shared by all downloads, so that connections are reused."""
+    
+    global _SESSION
+    
+    if _SESSION == None:
+        _SESSION = requests.Session()
+    
+    return _SESSION
+
+
+
+def _iter_obo_terms(lines):
+    """Read the [Term] stanzas of an OBO file.
+    
+    PARAMETERS:
+    - lines (iterable): The lines of an OBO file.
+    
+    RETURN:
+    A generator of a dictionary per term with its "id", "name", "namespace", "alt_id" (a list),
+    "parents" (a list of (relation, GO ID) tuples, including "is_a") and "is_obsolete" (a bool).
+    Tags can come in any order.
+    """
+    
+    term = None
+    
+    for line in lines:
+        line = line.strip()
+        
+        if line.startswith("["):                        # A new stanza starts
+            if term != None and term["id"] != None:
+                yield term
+            term = None
+            if line == "[Term]":
+                term = {"id": None, "name": "", "namespace": "", "alt_id": [], "parents": [], "is_obsolete": False}
+            continue
+        
+        if term == None or ": " not in line:
+            continue
+        
+        tag, value = line.split(": ", 1)
+        
+        if tag == "id":
+            term["id"] = value
+        elif tag == "name":
+            term["name"] = value
+        elif tag == "namespace":
+            term["namespace"] = value
+        elif tag == "alt_id":
+            term["alt_id"].append(value)
+        elif tag == "is_a":
+            term["parents"].append(("is_a", value.split()[0]))          # Skip the "! term name" comment
+        elif tag == "relationship":
+            relation, target = value.split()[:2]
+            term["parents"].append((relation, target))
+        elif tag == "is_obsolete":
+            term["is_obsolete"] = value == "true"
+    
+    if term != None and term["id"] != None:
+        yield term
+            
+
+
+@_instrumented
+def id_to_term(gene_ids, all_go_ids):
+    """Get the desired gene's GO terms through their GO IDs.
+    
+    PARAMETERS:
+    - gene_ids (dict): A dictionary with gene names as keys and a list of their associated
+    GO IDs as values
+    - all_go_ids (dict or TermTranslator): A dictionary of GO IDs as keys and their corresponding
+    terms as values, or a "TermTranslator" of one (to share the terms of genes with the same GO IDs).
+    
+    RETURN:
+    A dictionary of gene names as keys and the terms of their corresponding GO IDs as values
+    (lists, or tuples shared by the genes with the same GO IDs when given a "TermTranslator").
+    """
+    
+    if isinstance(all_go_ids, TermTranslator):
+        return all_go_ids.translate(gene_ids)
+
+    # Prepare a dictionary to store the GO terms converted from their GO IDs
+    gene_terms = {}
+    for g in gene_ids:
+        terms = []
+        
+        for i in gene_ids[g]:
+        
+            if i in all_go_ids:
+                terms.append(all_go_ids[i])
+        
+        gene_terms[g] = terms
+    
+    return gene_terms
+
+
+
+class TermTranslator:
+    """Turns GO IDs into GO terms, remembering the terms of each set of GO IDs it has translated.
+    
+    The GO terms of a set of GO IDs are given as a tuple (in the order of their GO IDs), and the
+    same tuple is given again for every set with the same GO IDs, like a gene and its synonyms or
+    a gene mutated in many samples. Translating the genes of a whole cohort then only makes one
+    tuple for each distinct set of GO IDs, and the GO terms in them are interned strings. Once
+    more than max_size sets are remembered, the least recently used one is forgotten.
+    
+    ATTRIBUTES:
+    - all_go_ids (dict): A dictionary of GO IDs as keys and their corresponding terms as values (made by "get_ontologies").
+    - max_size (int): The largest number of sets of GO IDs remembered.
+    - hits (int): The number of sets of GO IDs whose terms were remembered.
+    - misses (int): The number of sets of GO IDs whose terms had to be looked up.
+    
+    METHODS:
+    - terms(go_ids): Gets the tuple of GO terms of some GO IDs.
+    - translate(gene_ids, genes = None): Gets a dictionary of genes and their tuples of GO terms, like "id_to_term".
+    - clear(): Forgets the remembered sets of GO IDs.
+    """
+    
+    def __init__(self, all_go_ids, max_size = TERM_CACHE_SIZE):
+        """Prepare to translate GO IDs.
+        
+        PARAMETERS:
+        - all_go_ids (dict): A dictionary of GO IDs as keys and their corresponding terms as values.
+        - max_size (int): The largest number of sets of GO IDs remembered (optional).
+        """
+        
+        self.all_go_ids = all_go_ids
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._remembered = {}       # Sets of GO IDs and their terms, from the least to the most recently used
+    
+    
+    def __len__(self):
+        
+        return len(self._remembered)
+    
+    
+    def terms(self, go_ids):
+        """Get the GO terms of some GO IDs (the GO IDs that aren't in all_go_ids are left out).
+        
+        PARAMETERS:
+        - go_ids (iterable): The GO IDs, like the value of a gene in the dictionary made by "all_goa_id".
+        
+        RETURN:
+        A tuple of the GO terms, the same one for every call with the same GO IDs.
+        """
+        
+        if not isinstance(go_ids, (set, frozenset)):
+            go_ids = set(go_ids)
+        key = tuple(sorted(go_ids))     # Smaller than a frozenset of the GO IDs
+        remembered = self._remembered
+        
+        terms = remembered.pop(key, None)
+        if terms == None:
+            self.misses += 1
+            terms = tuple([sys.intern(self.all_go_ids[i]) for i in key if i in self.all_go_ids])
+            if len(remembered) >= self.max_size:
+                del remembered[next(iter(remembered))]
+        else:
+            self.hits += 1
+        
+        remembered[key] = terms      # Moved (or added) to the end, as the most recently used
+        
+        return terms
+    
+    
+    def translate(self, gene_ids, genes = None):
+        """Get the GO terms of many genes at once.
+        
+        PARAMETERS:
+        - gene_ids (dict): A dictionary with gene names as keys and their GO IDs as values (like the
+        result of "all_goa_id" or "get_goa_id").
+        - genes (iterable): The genes to translate (optional, all the genes of gene_ids by default).
+        Genes that aren't in gene_ids are left out.
+        
+        RETURN:
+        A dictionary of gene names as keys and the tuples of GO terms of their GO IDs as values.
+        """
+        
+        if genes == None:
+            genes = gene_ids
+        
+        # The genes that share a set of GO IDs (synonyms) only look it up once. The sets are kept
+        # along with their terms, so their ids aren't given to other sets made meanwhile
+        by_set = {}
+        gene_terms = {}
+        for g in genes:
+            ids = gene_ids.get(g)
+            if ids == None:
+                continue
+            
+            found = by_set.get(id(ids))
+            if found == None:
+                found = by_set[id(ids)] = (ids, self.terms(ids))
+            gene_terms[g] = found[1]
+        
+        return gene_terms
+    
+    
+    def clear(self):
+        """Forget the remembered sets of GO IDs and their terms."""
+        
+        self._remembered.clear()
+
+
+
+
+
+# ------------------------------ UPDATES (New releases of the GOA and OBO files) ------------------------------
+
+@_instrumented
+def update_goa_id(id_dict, old_goa_file, new_goa_file, cache_dir, aspects = None, evidence = None, negated = "y"):
+    """Update the result of "all_goa_id" for a GOA file to a new release of the file.
+    
+    PARAMETERS:
+    - id_dict (dict): The dictionary made by "all_goa_id" for the old release, which is updated in place.
+    - old_goa_file (str): The GOA file directory or URL of the old release.
+    - new_goa_file (str): The GOA file directory or URL of the new release (it can be the same as
+    old_goa_file, for a file replaced by its new release).
+    - cache_dir (str): A cache directory. The cache entry of "all_goa_id" for a release also keeps
+    the state the next update starts from (the hashes of the chunks and lines of the file, and the
+    gene, GO ID and synonym column of each line). It is written by "all_goa_id" (for a local file,
+    with compact = "n") and by every update, and the old release is only read if it has no such
+    entry. URLs are downloaded to it.
+    - aspects, evidence, negated: The filters the dictionary was made with (optional). See "all_goa_id".
+    
+    RETURN:
+    A dictionary with the "added" and "removed" annotations and the "changed" ones (kept, but with
+    another evidence code, reference or other column), each a sorted list of (gene name, GO ID)
+    tuples. The dictionary ends up the same as "all_goa_id" for the new release, but the new release
+    is read once and only its lines that aren't in the old release are read as annotations: the
+    other genes keep their sets of GO IDs, and only the synonyms are given out again. After any
+    update, indexes made of the dictionary (like "value_index") have to be made again.
+    
+    A ValueError is raised if id_dict isn't the result of "all_goa_id" for the old release (as last
+    read into the cache) with the same filters.
+    """
+    
+    kind = _goa_cache_kind(aspects, evidence, negated)
+    filters = (frozenset(aspects) if aspects != None else None, frozenset(evidence) if evidence != None else None, negated)
+    
+    # The old release as it was last read, even if its file changed since (or is gone)
+    old = None
+    sections = _cached_sections(_download_path(old_goa_file, cache_dir) if _is_url(old_goa_file) else old_goa_file, cache_dir, kind)
+    if sections != None:
+        old = _load_goa_release(sections)
+    if old == None:
+        old = _read_goa_release(_local_copy(old_goa_file, cache_dir), *filters)
+    
+    # Genes with lines are the genes of the dictionary, with as many GO IDs as their lines have
+    if (not isinstance(id_dict, dict) or len(id_dict) != old.size
+            or list(map(len, map(id_dict.get, compress(old.genes, old.gene_sizes), repeat(())))) != list(filter(None, old.gene_sizes))):
+        raise ValueError("The dictionary isn't the result of \"all_goa_id\" for the old release with these filters")
+    
+    new_goa_file = _local_copy(new_goa_file, cache_dir)
+    stat = os.stat(new_goa_file)
+    data, digest = _goa_release_data(new_goa_file)
+    ends, chunks = _goa_chunks(data, old.separator)
+    
+    new = _GOARelease(old.separator, old.genes, old.go_ids, old.fields)
+    numbers = (_Numbering(zip(old.genes, count())), _Numbering(zip(old.go_ids, count())), _Numbering(zip(old.fields, count())))
+    old_chunks = dict(zip(old.chunks, count()))
+    old_counts, new_counts = Counter(old.chunks), Counter(chunks)
+    if len(old_counts) == len(old.chunks) and len(new_counts) == len(chunks):    # No chunk is found twice
+        lost, copied = dict.fromkeys(old_counts.keys() - new_counts.keys(), 1), {}
+    else:
+        lost, copied = old_counts - new_counts, new_counts - old_counts
+    
+    # The lines of the chunks found fewer times than before, which can still be found in the chunks
+    # that changed, as lists of their (hash, gene, GO ID, synonym column) numbers for each hash
+    pool = {}
+    for h, n in lost.items():
+        for line in _chunk_lines(old, old_chunks[h]) * n:
+            pool.setdefault(line[0], []).append(line)
+    
+    # The lines added (1) and removed (-1), as (gene, GO ID, synonym column, sign)
+    changes = []
+    for h, n in copied.items():
+        if h in old_chunks:                           # Copies of a chunk that was already there
+            for line in _chunk_lines(old, old_chunks[h]) * n:
+                if len(pool.get(line[0], ())) > 0:
+                    pool[line[0]].pop()
+                else:
+                    changes.append(line[1:] + (1,))
+    
+    # The number of each chunk in the old release (-2 for the chunks that changed), and the chunks
+    # that start a run of chunks coming one after the other in the old release (each chunk that
+    # changed is a run of its own)
+    found = list(map(old_chunks.get, chunks, repeat(-2)))
+    runs = list(compress(count(), map(ne, found, map(add, chain([-4], found), repeat(1)))))
+    
+    # The lines of the chunks that changed are read at once, and the runs are copied at once
+    changed = [i for i in runs if found[i] < 0]
+    begins = [ends[i - 1] if i > 0 else 0 for i in changed]
+    changed_ends = list(map(ends.__getitem__, changed))
+    sizes = iter(list(map(data.count, repeat(b"\n"), begins, changed_ends)))
+    text = b"".join(map(data.__getitem__, map(slice, begins, changed_ends)))
+    lines = _read_goa_lines(text, locale.getpreferredencoding(False), filters, pool, numbers, changes)
+    del data, text
+    
+    line = 0
+    for first, last in zip(runs, runs[1:] + [len(found)]):
+        if found[first] >= 0:
+            new.copy_chunks(old, found[first], found[first] + last - first)
+        else:
+            size = next(sizes)
+            new.add_chunk(chunks[first], lines[line:line + size])
+            line += size
+    
+    for line in chain.from_iterable(pool.values()):
+        changes.append(line[1:] + (-1,))
+    
+    new.genes, new.go_ids, new.fields = list(numbers[0]), list(numbers[1]), list(numbers[2])
+    new.go_counts, new.field_counts = old.go_counts, old.field_counts
+    had_go_ids = list(map(bool, old.gene_sizes)) + [False] * (len(new.genes) - len(old.gene_sizes))
+    new.gene_sizes = old.gene_sizes
+    new.gene_sizes.extend(repeat(0, len(new.genes) - len(old.gene_sizes)))
+    
+    # Count the lines of each gene with each GO ID and synonym column, as [before, after] for the GO IDs
+    counts = {}
+    for g, go, field, sign in changes:
+        if g == _NO_GENE:
+            continue
+        key = g << 32 | go
+        if key not in counts:
+            n = new.go_counts.get(key) or int(had_go_ids[g] and new.go_ids[go] in id_dict[new.genes[g]])
+            counts[key] = [n, n]
+        counts[key][1] += sign
+        key = g << 32 | field
+        new.field_counts[key] = new.field_counts.get(key, 0) + sign
+        if new.field_counts[key] == 0:
+            del new.field_counts[key]
+    
+    report = {"added": [], "removed": [], "changed": []}
+    added = {}
+    removed = {}
+    for key, (n, after) in counts.items():
+        g, go = key >> 32, key & 0xFFFFFFFF
+        if after > 1:
+            new.go_counts[key] = after
+        else:
+            new.go_counts.pop(key, None)
+        if n == 0 and after > 0:
+            report["added"].append((new.genes[g], new.go_ids[go]))
+            added.setdefault(g, set()).add(new.go_ids[go])
+            new.gene_sizes[g] += 1
+        elif n > 0 and after == 0:
+            report["removed"].append((new.genes[g], new.go_ids[go]))
+            removed.setdefault(g, set()).add(new.go_ids[go])
+            new.gene_sizes[g] -= 1
+        elif n > 0:
+            report["changed"].append((new.genes[g], new.go_ids[go]))
+    for r in report.values():
+        r.sort()
+    
+    # The genes in the order of their first line kept in the new release
+    order = dict.fromkeys(new.line_genes)
+    order.pop(_NO_GENE, None)
+    
+    fields = {}
+    for key in new.field_counts:
+        fields.setdefault(key >> 32, set()).add(new.fields[key & 0xFFFFFFFF])
+    
+    complete_info = {}
+    synonyms = {}
+    for g in order:
+        gene = new.genes[g]
+        if not had_go_ids[g]:
+            complete_info[gene] = added[g]
+        else:
+            complete_info[gene] = go_ids = id_dict[gene]      # The same set, so anything sharing it sees the new GO IDs
+            if g in removed:
+                go_ids.difference_update(removed[g])
+            if g in added:
+                go_ids.update(added[g])
+        synonyms[gene] = fields[g]
+    
+    _add_synonyms(complete_info, synonyms)
+    id_dict.clear()
+    id_dict.update(complete_info)
+    
+    new.size = len(id_dict)
+    new.complete_info = id_dict
+    _save_cached(new_goa_file, cache_dir, kind, new, _dump_goa_release, stat, digest)
+    
+    return report
+
+
+
+class _GOARelease:
+    """A release of a GOA file as "update_goa_id" keeps it in the cache, with the result of "all_goa_id".
+    
+    The file is cut into chunks of lines (see "_goa_chunks"), each stored as a 64 bit hash, so the
+    chunks found again in the next release aren't read. Each line is stored as a 64 bit hash (see
+    "_line_hashes") and the numbers of its gene (_NO_GENE for the lines left out by the filters),
+    GO ID and synonym column in the tables of genes, GO IDs and synonym columns, so a line of the
+    old release found again in a chunk that changed isn't read as a new line. The lines
+    of each gene with each synonym column are counted, and so are the lines of each gene with each
+    GO ID when there are more than one (there is one line if the gene has the GO ID in the result,
+    else none), with the number of the gene shifted 32 bits to the left, plus the number of the GO
+    ID or synonym column, as keys.
+    """
+    
+    def __init__(self, separator, genes = None, go_ids = None, fields = None):
+        
+        self.separator = separator
+        self.chunks = array("Q")
+        self.chunk_lines = array("I", [0])     # The number of lines before each chunk, and in all of them
+        self.hashes = array("Q")
+        self.line_genes = array("I")
+        self.line_go = array("I")
+        self.line_fields = array("I")
+        self.genes = genes if genes != None else []
+        self.go_ids = go_ids if go_ids != None else []
+        self.fields = fields if fields != None else []
+        self.go_counts = {}                   # Only the counts above 1
+        self.field_counts = {}
+        self.gene_sizes = array("I")          # The number of GO IDs of each gene
+        self.size = 0                         # The number of genes and synonyms of the result
+        self.complete_info = None             # The result of "all_goa_id"
+    
+    
+    def copy_chunks(self, other, first, last):
+        """Add the chunks numbered from first to last (not included) of another _GOARelease with the same tables."""
+        
+        begin, end = other.chunk_lines[first], other.chunk_lines[last]
+        
+        self.chunks.extend(other.chunks[first:last])
+        self.chunk_lines.extend(map(add, other.chunk_lines[first + 1:last + 1], repeat(self.chunk_lines[-1] - begin)))
+        self.hashes.extend(other.hashes[begin:end])
+        self.line_genes.extend(other.line_genes[begin:end])
+        self.line_go.extend(other.line_go[begin:end])
+        self.line_fields.extend(other.line_fields[begin:end])
+    
+    
+    def add_chunk(self, chunk, lines):
+        """Add a chunk with the hash of the chunk and a list of (hash, gene, GO ID, synonym column) numbers of its lines."""
+        
+        self.chunks.append(chunk)
+        self.chunk_lines.append(self.chunk_lines[-1] + len(lines))
+        for h, g, go, field in lines:
+            self.hashes.append(h)
+            self.line_genes.append(g)
+            self.line_go.append(go)
+            self.line_fields.append(field)
+
+
+
+def _chunk_lines(release, chunk):
+    """Get the (hash, gene, GO ID, synonym column) numbers of the lines of a chunk of a _GOARelease."""
+    
+    begin, end = release.chunk_lines[chunk], release.chunk_lines[chunk + 1]
+    
+    return list(zip(release.hashes[begin:end], release.line_genes[begin:end], release.line_go[begin:end], release.line_fields[begin:end]))
+
+
+
+def _read_goa_lines(data, encoding, filters, pool, numbers, changes):
+    """Read the lines of the chunks of a new release of a GOA file that changed, for "update_goa_id".
+    
+    PARAMETERS:
+    - data (bytes): The chunks, one after the other.
+    - encoding (str): The encoding of the file.
+    - filters (tuple): The aspects, evidence codes (as frozensets) and negated filters.
+    - pool (dict): The lines of the old release that aren't found anymore (see "update_goa_id").
+    The lines found again are taken out of it.
+    - numbers (tuple): The _Numbering of the genes, GO IDs and synonym columns.
+    - changes (list): The list of lines added and removed, which the lines added are added to.
+    
+    RETURN:
+    A list of (hash, gene, GO ID, synonym column) numbers of the lines of the chunks.
+    """
+    
+    if data == b"":
+        return []
+    texts = data.decode(encoding)[:-1].split("\n")
+    lines = []
+    
+    for h, text in zip(_line_hashes(data[:-1].split(b"\n")), texts):
+        if len(pool.get(h, ())) > 0:                 # A line of the old release, found somewhere else
+            lines.append(pool[h].pop())
+            continue
+        
+        line = _goa_columns(text, *filters)
+        if line == None:
+            lines.append((h, _NO_GENE, 0, 0))
+        else:
+            lines.append((h, numbers[0][sys.intern(line[2])], numbers[1][sys.intern(line[4])], numbers[2][line[10]]))
+            changes.append(lines[-1][1:] + (1,))
+    
+    return lines
+
+
+
+def _read_goa_release(goa_file, aspects = None, evidence = None, negated = "y"):
+    """Read a local GOA file into the result of "all_goa_id" and the _GOARelease of "update_goa_id".
+    
+    PARAMETERS:
+    - goa_file (str): A GOA file directory.
+    - aspects, evidence, negated: See "all_goa_id".
+    
+    RETURN:
+    A _GOARelease with the dictionary of "all_goa_id" as its "complete_info".
+    """
+    
+    aspects = frozenset(aspects) if aspects != None else None
+    evidence = frozenset(evidence) if evidence != None else None
+    
+    data = _goa_release_data(goa_file)[0]
+    release = _GOARelease(_goa_separator(data))
+    ends, release.chunks = _goa_chunks(data, release.separator)
+    release.chunk_lines = array("I", accumulate(map(data.count, repeat(b"\n"), chain([0], ends), ends), initial = 0))
+    release.hashes = _line_hashes(data[:-1].split(b"\n") if data != b"" else [])
+    texts = data.decode(locale.getpreferredencoding(False))[:-1].split("\n") if data != b"" else []
+    del data
+    
+    complete_info = {}
+    synonyms = {}
+    genes, go_ids, fields = _Numbering(), _Numbering(), _Numbering()
+    line_genes, line_go, line_fields = release.line_genes, release.line_go, release.line_fields
+    
+    # Read the lines like "all_goa_id", numbering the gene, GO ID and synonym column of each
+    for line in map(_goa_columns, texts, repeat(aspects), repeat(evidence), repeat(negated)):
+        if line == None:
+            line_genes.append(_NO_GENE)
+            line_go.append(0)
+            line_fields.append(0)
+            continue
+        
+        main_gene = sys.intern(line[2])
+        go_id = sys.intern(line[4])
+        
+        go_ids_of_gene = complete_info.get(main_gene)
+        if go_ids_of_gene == None:
+            complete_info[main_gene] = go_ids_of_gene = set()
+            synonyms[main_gene] = set()
+        
+        go_ids_of_gene.add(go_id)
+        synonyms[main_gene].add(line[10])
+        line_genes.append(genes[main_gene])
+        line_go.append(go_ids[go_id])
+        line_fields.append(fields[line[10]])
+    
+    release.genes, release.go_ids, release.fields = list(genes), list(go_ids), list(fields)
+    release.gene_sizes = array("I", map(len, complete_info.values()))
+    
+    kept = list(map(ne, line_genes, repeat(_NO_GENE)))
+    shifted = list(map(lshift, compress(line_genes, kept), repeat(32)))
+    release.field_counts = Counter(map(or_, shifted, compress(line_fields, kept)))
+    if sum(release.gene_sizes) < len(shifted):       # Some genes have a GO ID on more than one line
+        go_counts = Counter(map(or_, shifted, compress(line_go, kept)))
+        release.go_counts = {key: n for key, n in go_counts.items() if n > 1}
+    
+    _add_synonyms(complete_info, synonyms)
+    release.size = len(complete_info)
+    release.complete_info = complete_info
+    
+    return release
+
+
+
+def _goa_columns(line, aspects = None, evidence = None, negated = "y"):
+    """Split an annotation line of a GOA file like "_iter_goa_annotations", or get None if it is left out
+    (the aspects and evidence codes are given as frozensets)."""
+    
+    if line.startswith("!") or line.strip() == "":
+        return None
+    
+    line = line.split("\t", 11)
+    
+    if aspects != None and line[8] not in aspects:
+        return None
+    if evidence != None and line[6] not in evidence:
+        return None
+    if negated == "n" and line[3].startswith("NOT"):
+        return None
+    
+    return line
+
+
+
+def _goa_release_data(goa_file):
+    """Read a local GOA file at once, as bytes with "\\n" line ends and a "\\n" after the last line,
+    and get them with the SHA-256 of the file (see "_file_digest")."""
+    
+    with open(goa_file, "rb") as file:
+        data = file.read()
+    digest = hashlib.sha256(data).digest()
+    if str(goa_file).endswith(".gz"):
+        data = gzip.decompress(data)
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n")
+    if data != b"" and not data.endswith(b"\n"):
+        data = data + b"\n"
+    
+    return data, digest
+
+
+
+def _goa_separator(data):
+    """Choose the pair of bytes that chunks of a GOA file end after (see "_goa_chunks"): the one found
+    in the lines closest to one out of every _GOA_CHUNK_LINES in a part of the file, or "\\n" if the
+    file is too small."""
+    
+    middle = len(data) // 2
+    sample = data[middle:middle + 65536].split(b"\n")[1:-1]        # Whole lines
+    lines = len(sample)
+    pairs = Counter(chain.from_iterable(set(zip(line, line[1:])) for line in sample))
+    
+    best = min(((abs(n * _GOA_CHUNK_LINES - lines), pair) for pair, n in pairs.items() if 10 not in pair and 13 not in pair),
+               default = None)
+    if best == None or lines < _GOA_CHUNK_LINES:
+        return b"\n"
+    
+    return bytes(best[1])
+
+
+
+def _goa_chunks(data, separator):
+    """Cut a GOA file into chunks of lines, each ending with a line that has the separator in it.
+    
+    The chunks depend on the content of the file rather than on line numbers, so a line added or
+    removed only changes its own chunk, and the other chunks are found again in the next release.
+    
+    PARAMETERS:
+    - data (bytes): The GOA file, as read by "_goa_release_data".
+    - separator (bytes): The separator chosen for the file by "_goa_separator".
+    
+    RETURN:
+    A tuple with a list of the positions where the chunks end and an array of a 64 bit hash of each
+    chunk (like "_line_hashes").
+    """
+    
+    ends = [m.end() for m in re.finditer(re.escape(separator) + b"[^\\n]*\\n", data)]
+    if len(data) > 0 and (len(ends) == 0 or ends[-1] != len(data)):
+        ends.append(len(data))
+    
+    view = memoryview(data)
+    
+    return ends, _line_hashes(list(map(view.__getitem__, map(slice, chain([0], ends), ends))))
+
+
+
+def _line_hashes(lines):
+    """Get a 64 bit hash of each line (its CRC-32 and Adler-32 checksums), the same in every process unlike "hash"."""
+    
+    return array("Q", map(or_, map(lshift, map(zlib.crc32, lines), repeat(32)), map(zlib.adler32, lines)))
+
+
+
+@_instrumented
+def update_ontologies(id_term, old_obo_file, new_obo_file = None, cache_dir = None):
+    """Update the result of "get_ontologies" for an OBO file to a new release of the file.
+    
+    PARAMETERS:
+    - id_term (dict): The dictionary made by "get_ontologies" for the old release, which is updated in place.
+    - old_obo_file (str): The OBO file directory or URL of the old release.
+    - new_obo_file (str): The OBO file directory or URL of the new release (optional, the general OBO file by default).
+    - cache_dir (str): A cache directory (optional). URLs are downloaded to it, and the updated
+    dictionary is kept in it as the result of "get_ontologies" for the new release.
+    
+    RETURN:
+    A dictionary with the "added" and "removed" GO IDs and the "changed" ones (whose GO term
+    changed), each a sorted list. The dictionary ends up the same as "get_ontologies" for the new
+    release (with its GO IDs in the same order), but only the stanzas that differ between the
+    releases are read as terms. Raises a ValueError if the dictionary doesn't have the GO IDs of
+    the old release.
+    """
+    
+    if new_obo_file == None:
+        new_obo_file = GO_OBO_URL
+    if cache_dir != None:
+        old_obo_file = _local_copy(old_obo_file, cache_dir)
+        new_obo_file = _local_copy(new_obo_file, cache_dir)
+    
+    old_stanzas = set(_obo_stanzas(_release_text(old_obo_file)))
+    new_stanzas = _obo_stanzas(_release_text(new_obo_file))
+    
+    # Only the stanzas that aren't in the old release are read as terms, the others just give their GO ID
+    added = {t["id"]: t["name"] for s in new_stanzas if s not in old_stanzas for t in _iter_obo_terms(("[" + s).split("\n"))}
+    go_ids = dict.fromkeys(_obo_term_id(s) for s in new_stanzas)
+    go_ids.pop(None, None)
+    
+    if any(i not in id_term and i not in added for i in go_ids):
+        raise ValueError('The dictionary isn\'t the result of "get_ontologies" for the old release')
+    
+    # Rebuild the dictionary in the order of the new release
+    old_terms = dict(id_term)
+    id_term.clear()
+    id_term.update((i, added[i] if i in added else old_terms[i]) for i in go_ids)
+    changed = sorted(i for i in added if i in old_terms and old_terms[i] != added[i])
+    
+    if cache_dir != None:
+        _save_cached(new_obo_file, cache_dir, "obo", id_term, _dump_terms)
+    
+    return {"added": sorted(id_term.keys() - old_terms.keys()), "removed": sorted(old_terms.keys() - id_term.keys()), "changed": changed}
+
+
+
+def _obo_term_id(stanza):
+    """Get the GO ID of a stanza split by "_obo_stanzas" (None if it isn't a [Term] stanza with a GO ID)."""
+    
+    if not stanza.startswith("Term]\n") and stanza.split("\n", 1)[0].strip() != "Term]":
+        return None
+    
+    # Most stanzas have a single "id" tag at the start of a line, found without the regular expression
+    start = stanza.find("\nid: ") + 5
+    if start > 4 and stanza.count("id: ") == 1:
+        end = stanza.find("\n", start)
+        go_id = stanza[start:end if end >= 0 else None].rstrip()
+        if go_id != "":
+            return go_id
+    
+    ids = _OBO_ID.findall(stanza)
+    return ids[-1] if ids else None
+
+
+
+def _obo_stanzas(text):
+    """Split the text of an OBO file into the text of each stanza, without its starting "[" (the first is the header)."""
+    
+    return ("\n" + text).split("\n[")
+
+
+
+def _release_text(file_name):
+    """Read the whole text of a release of a GOA or OBO file (a file or URL) at once."""
+    
+    if _is_url(file_name):
+        with closing(_text_lines(file_name)) as lines:
+            return "".join(lines)
+    
+    with _open_text(file_name) as file:
+        return file.read()
+
+
+
+
+
+# ------------------------------ DOWNLOADS (Many files at once) ------------------------------
+
+@_instrumented
+def load_sources(maf_files = [], goa_file = None, obo_file = None, index_list = [0,34,35,95,93], filters = None,
+                 connections = 4, cache_dir = None):
+    """Read many MAF files, a GOA file and an OBO file (local files or URLs) at the same time.
+    
+    PARAMETERS:
+    - maf_files (list): A list of MAF file directories or URLs (optional).
+    - goa_file (str): A GOA file directory or URL (optional).
+    - obo_file (str): An OBO file directory or URL (optional).
+    - index_list (list): The indexes or attribute titles to retrieve from the MAF files (optional). See "mutation_samples".
+    - filters (list): Filters that samples must satisfy to be kept (optional). See "mutation_samples".
+    - connections (int): The largest number of files downloaded (or read) at the same time (optional).
+    - cache_dir (str): A cache directory for the GOA and OBO files (optional). See "all_goa_id".
+    
+    RETURN:
+    A tuple with a dictionary of MAF files as keys and their samples (like "mutation_samples") as
+    values, the result of "all_goa_id" for the GOA file and the result of "get_ontologies" for the
+    OBO file (None if a file isn't given). Each file is read as it is downloaded, so waiting for
+    one download overlaps with reading the others. An error reading any file is raised once the
+    files being read have finished.
+    """
+    
+    with ThreadPoolExecutor(max(connections, 1)) as pool:
+        # The reference files are started first, as they are usually the largest downloads
+        goa_job = pool.submit(all_goa_id, goa_file, cache_dir) if goa_file != None else None
+        obo_job = pool.submit(get_ontologies, obo_file, cache_dir) if obo_file != None else None
+        maf_jobs = {m: pool.submit(mutation_samples, m, index_list = index_list, filters = filters) for m in maf_files}
+        
+        samples = {m: job.result() for m, job in maf_jobs.items()}
+        go_ids = goa_job.result() if goa_job != None else None
+        terms = obo_job.result() if obo_job != None else None
+    
+    return samples, go_ids, terms
+
+
+
+
+
+# ------------------------------ COHORTS (Many MAF files) ------------------------------
+
+@_instrumented
+def run_cohort(maf_files, output_file, goa_file = None, obo_file = None, filters = None, workers = 1,
+               annotated_only = "n", resume = "y", progress = "y", cache_dir = None):
+    """Count the mutations of each gene in many MAF files (one per tumour sample) at once.
+    
+    PARAMETERS:
+    - maf_files (str or list): A directory (all its ".maf" and ".maf.gz" files are used), a glob
+    pattern (like "MAF/*.maf") or a list of MAF file directories.
+    - output_file (str): A text file name for the gene by sample table of mutation counts.
+    - goa_file (str): A GOA file directory (optional). Adds the GO IDs of each gene to the table.
+    - obo_file (str): An OBO file or URL (optional, needs "goa_file"). Adds the GO terms of each gene to the table.
+    - filters (list): Filters that samples must satisfy to be counted (optional). See "mutation_samples".
+    - workers (int): The number of processes that read MAF files at the same time (optional).
+    - annotated_only (str): A character to decide if only genes found in the GOA file are counted
+    ("y") or all genes ("n") (optional).
+    - resume (str): A character to decide if MAF files already counted by an earlier interrupted
+    run with the same output file are skipped ("y") or counted again ("n") (optional).
+    - progress (str): A character to decide if a line is printed after each MAF file ("y") or not ("n") (optional).
+    - cache_dir (str): A cache directory for the GOA and OBO files (optional). See "all_goa_id".
+    
+    RETURN:
+    Saves a tab separated table with a line per gene, the mutation count of each sample (named
+    after its MAF file without the ".maf" or ".maf.gz" extension) and, if given a GOA or OBO file,
+    the gene's GO IDs and GO terms. The GOA and OBO files are read once and shared with all
+    processes. The counts of each MAF file are saved in a progress file (the output file name
+    ending in ".progress") as soon as it is counted, so an interrupted run can carry on from there. Returns the number of MAF files counted.
+    """
+    
+    maf_files = _cohort_files(maf_files)
+    
+    # Read the reference files once, before the processes are started
+    go_ids = all_goa_id(goa_file, cache_dir) if goa_file != None else None
+    terms = get_ontologies(obo_file, cache_dir) if obo_file != None and go_ids != None else None
+    genes_only = set(go_ids) if annotated_only == "y" and go_ids != None else None
+    
+    # Counts of the MAF files finished by an earlier run
+    progress_file = output_file + ".progress"
+    counts = {}
+    if resume == "y" and os.path.isfile(progress_file):
+        with open(progress_file) as file:
+            for line in file:
+                if line.endswith("\n"):                # An unfinished last line is counted again
+                    done = json.loads(line)
+                    counts[done["maf_file"]] = done["counts"]
+    
+    to_count = [m for m in maf_files if m not in counts]
+    
+    with open(progress_file, "w") as save_file:
+        for m in counts:                                # Saved again without any unfinished line
+            save_file.write(json.dumps({"maf_file": m, "counts": counts[m]}) + "\n")
+        
+        def finished(maf_file, maf_counts):
+            counts[maf_file] = maf_counts
+            save_file.write(json.dumps({"maf_file": maf_file, "counts": maf_counts}) + "\n")
+            save_file.flush()
+            if progress == "y":
+                print(str(len(counts)) + "/" + str(len(maf_files)), maf_file)
+        
+        if workers > 1 and len(to_count) > 1:
+            # Forked processes share the reference data already in memory instead of receiving a copy
+            context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+            
+            with ProcessPoolExecutor(workers, mp_context = context, initializer = _init_cohort_worker, initargs = (genes_only,)) as pool:
+                jobs = {pool.submit(_count_mutations, m, filters): m for m in to_count}
+                for job in as_completed(jobs):
+                    finished(jobs[job], job.result())
+        else:
+            _init_cohort_worker(genes_only)
+            for m in to_count:
+                finished(m, _count_mutations(m, filters))
+    
+    _save_cohort_table(output_file, maf_files, counts, go_ids, terms)
+    
+    return len(to_count)
+
+
+
+def _cohort_files(maf_files):
+    """Get the list of MAF files of a cohort from a directory, glob pattern or list."""
+    
+    if type(maf_files) is str:
+        if os.path.isdir(maf_files):
+            maf_files = [os.path.join(maf_files, f) for f in os.listdir(maf_files) if f.endswith(".maf") or f.endswith(".maf.gz")]
+        else:
+            maf_files = glob.glob(maf_files)
+        maf_files = sorted(maf_files)
+    
+    # Full paths, so a run resumed from another directory recognizes the files already counted
+    return [m if _is_url(m) else os.path.abspath(m) for m in maf_files]
+
+
+
+def _init_cohort_worker(genes_only):
+    """Keep the genes to count (or None for all genes) for the MAF files counted by this process."""
+    
+    global _COHORT_GENES
+    
+    _COHORT_GENES = genes_only
+
+
+
+def _count_mutations(maf_file, filters):
+    """Count the mutations of each gene in a MAF file.
+    
+    RETURN:
+    A dictionary of gene names as keys and their number of samples in the MAF file as values.
+    """
+    
+    counts = {}
+    
+    for sample in iter_mutation_samples(maf_file, index_list = ["Hugo_Symbol"], filters = filters):
+        gene = sample[0]
+        if _COHORT_GENES == None or gene in _COHORT_GENES:
+            counts[gene] = counts.get(gene, 0) + 1
+    
+    return counts
+
+
+
+def _save_cohort_table(output_file, maf_files, counts, go_ids, terms):
+    """Save the gene by sample table of mutation counts of "run_cohort"."""
+    
+    samples = _sample_names(maf_files)
+    genes = sorted(set(g for m in maf_files for g in counts[m]))
+    
+    titles = ["Hugo_Symbol"] + samples
+    if go_ids != None:
+        titles.append("GO_IDs")
+    if terms != None:
+        titles.append("GO_terms")
+    
+    with open(output_file, "w") as save_file:
+        save_file.write("\t".join(titles) + "\n")
+        
+        for g in genes:
+            line = [g] + [str(counts[m].get(g, 0)) for m in maf_files]
+            if go_ids != None:
+                ids = sorted(go_ids.get(g, ()))
+                line.append(";".join(ids))
+            if terms != None:
+                line.append(";".join(terms[i] for i in ids if i in terms))
+            save_file.write("\t".join(line) + "\n")
+
+
+
+def _sample_names(maf_files):
+    """Name the samples of "run_cohort" after their MAF files (without the ".maf" or ".maf.gz" extension).
+    
+    Files with the same name (in different directories, or whose names only differ by their
+    extension) get a number added to their name ("_2", "_3"...), so that every sample has its own column.
+    """
+    
+    names = []
+    for m in maf_files:
+        name = os.path.basename(m)
+        for extension in (".maf.gz", ".maf"):
+            if name.lower().endswith(extension):
+                name = name[:-len(extension)]
+                break
+        names.append(name)
+    
+    used = set(names)
+    seen = set()
+    for i, name in enumerate(names):
+        if name in seen:
+            number = 2
+            while name + "_" + str(number) in used:
+                number = number + 1
+            names[i] = name + "_" + str(number)
+            used.add(names[i])
+        seen.add(names[i])
+    
+    return names
+
+
+
+
+
+# ------------------------------ SERVICE (Queries answered from memory) ------------------------------
+
+@_instrumented
+def serve(goa_file, obo_file = None, host = "127.0.0.1", port = SERVICE_PORT, socket_file = None, cache_dir = None,
+          compact = "n", aliases = "n", reload_interval = 10, background = "n"):
+    """Keep the GO IDs of a GOA file and the GO terms of an OBO file in memory and answer queries about them.
+    
+    PARAMETERS:
+    - goa_file (str): A GOA file directory or URL.
+    - obo_file (str): An OBO file directory or URL (optional, the general OBO file by default).
+    - host (str): The address the service listens on (optional). Only programs running on the same
+    computer can connect to the default address.
+    - port (int): The port the service listens on (optional).
+    - socket_file (str): A Unix socket file to listen on instead of the host and port (optional, not
+    available on Windows).
+    - cache_dir (str): A cache directory for the GOA and OBO files (optional). See "all_goa_id".
+    - compact (str): A character to decide if the GO IDs are kept as a GOAnnotations ("y") or as a
+    dictionary ("n") (optional). See "all_goa_id".
+    - aliases (str): A character to decide if genes are also found by their synonyms and UniProt
+    accessions ("y") or only by their names ("n") (optional). See "gene_aliases".
+    - reload_interval (float): The seconds between checks of whether the GOA or OBO file changed, in
+    which case it is loaded again (optional, None to never check). URLs are only checked with a cache directory.
+    - background (str): A character to decide if queries are answered in a background thread and the
+    function returns at once ("y") or if it only returns once the service is stopped with Ctrl+C ("n") (optional).
+    
+    RETURN:
+    Answers queries from "AnnotationClient" (or any HTTP client, see the README) until it is stopped,
+    each client in its own thread. Queries are answered with the files as they were when the query
+    arrived, while they are loaded again. Returns the server, whose "shutdown" and "server_close"
+    methods stop a service running in the background.
+    """
+    
+    service = _AnnotationService(goa_file, obo_file, cache_dir, compact, aliases)
+    
+    if socket_file != None:
+        if os.path.exists(socket_file) and stat.S_ISSOCK(os.stat(socket_file).st_mode):
+            os.remove(socket_file)                   # Left behind by a service that wasn't stopped
+        server = _UnixServiceServer(socket_file, _ServiceHandler)
+    else:
+        server = _ServiceServer((host, port), _ServiceHandler)
+    server.service = service
+    
+    if reload_interval != None:
+        threading.Thread(target = service.watch, args = (reload_interval,), daemon = True).start()
+    
+    if background == "y":
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        return server
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    
+    return server
+
+
+
+class AnnotationClient:
+    """A connection to a service started with "serve", to find the GO IDs and GO terms of genes without loading the files.
+    
+    The connection is kept open between queries, so each query only takes the time to look up its
+    genes (usually under a millisecond). A client shouldn't be shared by several threads, but
+    each thread can have its own.
+    
+    METHODS:
+    - go_ids(genes, ignore_case = "n"): Gets a dictionary of the genes found and their sets of GO IDs, like "get_goa_id".
+    - terms(go_ids): Gets a dictionary of the GO IDs found and their GO terms.
+    - gene_terms(genes, ignore_case = "n"): Gets a dictionary of the genes found and their lists of GO terms, like "id_to_term".
+    - batch(queries): Sends several queries at once and gets a list of their results.
+    - status(): Gets a dictionary describing the files loaded by the service.
+    - close(): Closes the connection.
+    """
+    
+    def __init__(self, address = None, timeout = HTTP_TIMEOUT):
+        """Connect to a service started with "serve".
+        
+        PARAMETERS:
+        - address (str): The URL of the service (like "http://127.0.0.1:8765") or its Unix socket
+        file (optional, the default host and port of "serve" by default).
+        - timeout (float): The seconds to wait for an answer before giving up (optional).
+        """
+        
+        if address == None:
+            address = "http://127.0.0.1:" + str(SERVICE_PORT)
+        
+        if _is_url(address):
+            self._connection = http.client.HTTPConnection(address.split("://", 1)[1].rstrip("/"), timeout = timeout)
+        else:
+            self._connection = _UnixConnection(address, timeout)
+    
+    
+    def __enter__(self):
+        
+        return self
+    
+    
+    def __exit__(self, *exception):
+        
+        self.close()
+    
+    
+    def go_ids(self, genes, ignore_case = "n"):
+        """Get a dictionary of the genes found and their sets of GO IDs, like "get_goa_id" (with the aliases of "serve")."""
+        
+        return self._convert("go_ids", self._query("go_ids", {"genes": list(genes), "ignore_case": ignore_case}))
+    
+    
+    def terms(self, go_ids):
+        """Get a dictionary of the GO IDs found and their GO terms."""
+        
+        return self._query("terms", {"go_ids": list(go_ids)})
+    
+    
+    def gene_terms(self, genes, ignore_case = "n"):
+        """Get a dictionary of the genes found and their lists of GO terms, like "id_to_term"."""
+        
+        return self._query("gene_terms", {"genes": list(genes), "ignore_case": ignore_case})
+    
+    
+    def batch(self, queries):
+        """Send several queries at once, so they only wait for a single answer from the service.
+        
+        PARAMETERS:
+        - queries (list): A list of (query, values) tuples, where the query is "go_ids", "terms" or
+        "gene_terms" and the values are a list of gene names (or of GO IDs for "terms").
+        
+        RETURN:
+        A list with the result of each query, in the same order, as returned by the methods of the same name.
+        """
+        
+        queries = [(q, list(values)) for q, values in queries]
+        request = [{"query": q, ("go_ids" if q == "terms" else "genes"): values} for q, values in queries]
+        results = self._query("batch", {"queries": request})
+        
+        return [self._convert(q, r) for (q, values), r in zip(queries, results)]
+    
+    
+    def status(self):
+        """Get the files loaded by the service, their number of genes and GO terms, when and how many times they were loaded, and the last error loading them."""
+        
+        return self._query("status", {})
+    
+    
+    def close(self):
+        """Close the connection."""
+        
+        self._connection.close()
+    
+    
+    def _query(self, name, request):
+        
+        body = json.dumps(request).encode("utf-8")
+        
+        for attempt in range(2):
+            try:
+                self._connection.request("POST", "/" + name, body, {"Content-Type": "application/json"})
+                response = self._connection.getresponse()
+                answer = json.loads(response.read())
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The service closed the connection kept open (e.g. it was restarted), so it is opened again once
+                self._connection.close()
+                if attempt == 1:
+                    raise
+        
+        if response.status != 200:
+            raise ValueError(answer["error"])
+        
+        return answer["result"]
+    
+    
+    def _convert(self, name, result):
+        
+        if name == "go_ids":
+            return {g: set(ids) for g, ids in result.items()}
+        
+        return result
+
 
-maf = 'C:\\Users\\Roberto Bullitta\\Desktop\\PROJETO BCM\\Estágio\\MAF\\MAF_file_1.txt'
-goa = 'C:\\Users\\Roberto Bullitta\\Desktop\\PROJETO BCM\\Estágio\\goa_human.gaf'
 
+class _UnixConnection(http.client.HTTPConnection):
+    """An HTTP connection to a service listening on a Unix socket file."""
+    
+    def __init__(self, socket_file, timeout):
+        
+        super().__init__("localhost", timeout = timeout)
+        self.socket_file = socket_file
+    
+    
+    def connect(self):
+        
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_file)
 
 
-# ------------------------------ STEP 1 (Mutation samples) ------------------------------
 
-def mutation_samples(maf_file, limit = None, start = 0, index_list = [0,34,35,95,93]):
-    """Extract sample information from a MAF file.
+class _AnnotationService:
+    """The GO IDs and GO terms kept in memory by "serve", loaded again when their files change."""
     
-    PARAMETERS:
-    - maf_file (str): A MAF file directory.
-    - limit (int): A desired number of samples to be processed (optional).
-    - start (int): A desired starting index (optional).
-    - index_list (list): A list of indexes to use for information retrieval (optional). If no list is specified,
-    returns a list of lists containing the gene names (HUGO_symbol), the gene mutation suffered (HGVSc), 
-    the effect on the protein produced (HGVSp), the type of mutation (VARIANT_CLASS) and how big the impact 
-    on protein viability is (IMPACT).
+    def __init__(self, goa_file, obo_file, cache_dir, compact, aliases):
+        
+        self.sources = [goa_file, obo_file if obo_file != None else GO_OBO_URL]
+        self.cache_dir = cache_dir
+        self.compact = compact
+        self.aliases = aliases
+        self.loads = 0
+        self.error = None
+        self.stop = threading.Event()
+        self._stamps = [None, None]
+        self.data = (None, None, None)
+        self.reload()
     
-    RETURN:
-    A list of each processed sample information lists.
-    """
-
-    # Open MAF file and grab all lines
-    file = open(maf_file)
-    info = file.readlines()
     
-    # Delete the initial annotation lines that start with "#".
-    for _ in range(len(info)):
-        if info[0].startswith("#"):
-            del info[0]
-        else:
-            break
+    def reload(self, force = "y"):
+        """Load the GOA and OBO files again if they changed (or always, if forced). Returns True if any was loaded."""
+        
+        stamps = [_source_stamp(f, self.cache_dir) for f in self.sources]
+        go_ids, names, terms = self.data
+        changed = [force == "y" or stamps[i] != self._stamps[i] for i in range(2)]
+        
+        if changed[0]:
+            go_ids = all_goa_id(self.sources[0], self.cache_dir, self.compact)
+            names = gene_aliases(self.sources[0], self.cache_dir) if self.aliases == "y" else None
+        if changed[1]:
+            terms = get_ontologies(self.sources[1], self.cache_dir)
+        
+        if True in changed:
+            # Replaced all at once, so each query is answered either with the old or with the new files
+            self.data = (go_ids, names, terms)
+            self._stamps = stamps
+            self.loaded = time.time()
+            self.loads += 1
+        
+        return True in changed
     
-    # Redifine "limit" to be the full length of the file in case "limit" is None
-    if limit == None:
-        limit = len(info) - 1 - start
     
-    # Redifine "limit" in case it is larger than the number of lines left until the end of the file.
-    if len(info) - 1 - start < limit:
-        limit = len(info) - 1 - start
+    def watch(self, interval):
+        """Check the GOA and OBO files every few seconds until the service stops."""
+        
+        while not self.stop.wait(interval):
+            try:
+                self.reload("n")
+                self.error = None
+            except Exception as error:               # The files loaded before are kept until the next check
+                self.error = repr(error)
     
-
-    # Extract information stored in the chosen IDs.
-    all_samples = []
-    for i in range(limit):
-        sample = []
-        extract = info[i+1+start].strip().split("\t")
+    
+    def answer(self, name, request, data = None):
+        """Answer a query with the files loaded when it arrived."""
         
-        for i in index_list:
-            sample.append(extract[i])
-            
-        all_samples.append(sample)
+        go_ids, names, terms = self.data if data == None else data
         
-
-    return all_samples
+        if name in ("go_ids", "gene_terms"):
+            found = get_goa_id(request.get("genes", []), go_ids, names, request.get("ignore_case", "n"))
+            if name == "go_ids":
+                return {g: sorted(ids) for g, ids in found.items()}
+            return {g: [terms[i] for i in sorted(ids) if i in terms] for g, ids in found.items()}
+        
+        if name == "terms":
+            return {i: terms[i] for i in request.get("go_ids", []) if i in terms}
+        
+        if name == "batch":
+            # Every query of a batch is answered with the same files
+            data = (go_ids, names, terms)
+            return [self.answer(q.get("query"), q, data) for q in request.get("queries", []) if q.get("query") != "batch"]
+        
+        if name == "status":
+            return {"goa_file": self.sources[0], "obo_file": self.sources[1], "genes": len(go_ids), "go_terms": len(terms),
+                    "loaded": self.loaded, "loads": self.loads, "error": self.error}
+        
+        raise KeyError("Unknown query: " + str(name))
 
 
 
+def _source_stamp(file_name, cache_dir):
+    """Get the size and modification time of a file of "serve", to find out if it changed.
+    URLs are downloaded again first if they changed (or aren't checked without a cache directory)."""
+    
+    if _is_url(file_name) and cache_dir == None:
+        return None
+    
+    status = os.stat(_local_copy(file_name, cache_dir))
+    
+    return status.st_size, status.st_mtime_ns
 
 
-# ((((((((((AUXILIARY FUNCTIONS)))))))))):
 
-def maf_index(maf_file):
-    """Index each parameter of a MAF file.
+class _ServiceHandler(http.server.BaseHTTPRequestHandler):
+    """Answers the queries of a client of "serve" (a POST of a JSON object to /go_ids, /terms, /gene_terms, /batch or /status)."""
     
-    PARAMETERS:
-    - maf_file (str): A MAF file directory.
+    protocol_version = "HTTP/1.1"                    # Keeps the connection open for the next query
     
-    RETURN:
-    A dictionary of attribute titles as keys and their corresponding indexes as values.
-    """
+    def setup(self):
+        
+        # Small answers are sent at once instead of waiting to fill a packet (TCP connections only)
+        self.disable_nagle_algorithm = type(self.client_address) is tuple
+        super().setup()
     
-    # Open MAF file and grab attribute titles line
-    file = open(maf_file)
-    info = file.readlines()
     
-    # Delete the initial annotation lines that start with "#".
-    for _ in range(len(info)):
-        if info[0].startswith("#"):
-            del info[0]
-        else:
-            break
+    def do_GET(self):
+        
+        self._reply({})
+    
+    
+    def do_POST(self):
+        
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "The query isn't valid JSON"})
+        
+        self._reply(request)
+    
+    
+    def _reply(self, request):
+        
+        try:
+            self._send(200, {"result": self.server.service.answer(self.path.strip("/"), request)})
+        except KeyError as error:
+            self._send(404, {"error": error.args[0]})
+        except (AttributeError, TypeError) as error:
+            self._send(400, {"error": "The query isn't valid: " + str(error)})
     
-    titles = info[0].strip().split("\t")
+    
+    def _send(self, status, content):
+        
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    
+    def log_message(self, format, *args):
+        
+        pass                                         # Queries aren't printed
 
-    # Save titles with corresponding indexes 
-    all_indexes = {}
 
-    for i in range(len(titles)):
-        all_indexes[titles[i]] = i
+
+class _ServiceServer(http.server.ThreadingHTTPServer):
+    """The server of "serve", answering each client in its own thread."""
+    
+    block_on_close = False                           # Clients keep their connections open, so they aren't waited for
+    
+    def server_close(self):
         
-    return all_indexes
+        self.service.stop.set()
+        super().server_close()
+
+
+
+class _UnixServiceServer(_ServiceServer):
+    """The server of "serve" when listening on a Unix socket file."""
+    
+    address_family = getattr(socket, "AF_UNIX", None)     # Not available on Windows
+    allow_reuse_address = False
+    
+    def server_bind(self):
+        
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = None
+    
+    
+    def server_close(self):
+        
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
 
 
 
 
 
-# ------------------------------ STEP 2 (GO IDs) ------------------------------
+# ------------------------------ PIPELINE (All steps at once) ------------------------------
 
-def all_goa_id(goa_file):
-    """Retrieves all genes and corresponding GO IDs from a GOA file.
+class Pipeline:
+    """A lazy chain of the steps above, from the samples of a MAF file to the GO terms of their genes.
     
-    PARAMETERS:
-    - goa_file (str): A GOA file directory.
+    Each method adds a step to the chain and returns the pipeline, so steps can be written one
+    after the other, e.g. Pipeline(maf).filter(["LOW"], "n").genes().go_ids(goa).terms(obo).
+    Nothing is read until the pipeline is iterated over (or "collect" or "to_file" is used), and
+    samples then go through all the steps one at a time, so the memory used doesn't grow with the
+    size of the MAF file: only the unique gene names and the GOA and OBO dictionaries are kept.
     
-    RETURN: 
-    A dictionary containing all the gene names from the  selected GOA file as 
-    keys and a set of their respective GO IDs as values.
+    ATTRIBUTES:
+    - stage (str): What the pipeline produces: "samples" (sample information lists), "genes" (unique
+    gene names), "go_ids" ((gene name, set of GO IDs) tuples) or "terms" ((gene name, list of GO terms) tuples).
     """
     
-    # Retrieve GOA file information
-    file = open(goa_file)
-    info = file.readlines()
+    def __init__(self, maf_file, limit = None, start = 0, index_list = [0,34,35,95,93], filters = None):
+        """Start a pipeline with the samples of a MAF file.
+        
+        PARAMETERS:
+        - maf_file (str): A MAF file directory. The other parameters are the same as in "mutation_samples".
+        """
+        
+        self.maf_file = maf_file
+        self.stage = "samples"
+        self._source = (limit, start, index_list, filters)
+        self._steps = []
     
-    # Delete the initial annotation lines that start with "!".
-    for _ in range(len(info)):
-        if info[0].startswith("!"):
-            del info[0]
-        else:
-            break
     
-    # Store read genes in order to add GO IDs to their respective sets
-    check_repeats = []
+    def __iter__(self):
+        
+        items = iter_mutation_samples(self.maf_file, *self._source)
+        for step in self._steps:
+            items = step(items)
+        
+        return iter(items)
     
-    # Prepare a list of synonyms to attribute the same GO IDs to as the main gene
-    main_gene_old = None
-    gene_syn_old = None
-    first_time = "y"
     
-    # Retrieve all genes (including synonyms) and respective GO IDs in the selected GOA file.
-    complete_info = {}
+    def filter(self, filter_list, include = "y", match = "substring"):
+        """Add a step that filters what the pipeline produces so far.
+        
+        PARAMETERS:
+        - filter_list (list): A list of elements to consider for filtering.
+        - include (str): A character to decide if what is kept must contain ("y") or not ("n") the
+        given elements in the filter list (optional).
+        - match (str): "substring" or "exact" (optional). See "filter_list".
+        
+        RETURN:
+        The pipeline. Samples and genes are filtered like with "filter_list", while genes with GO IDs
+        or GO terms are filtered by their GO IDs or GO terms, like with "filter_dict".
+        """
+        
+        if self.stage in ("samples", "genes"):
+            self._steps.append(lambda items: iter_filter_list(items, filter_list, include, match))
+        elif len(filter_list) > 0:
+            contains = _compile_matcher(filter_list, match)
+            keep = include == "y"
+            self._steps.append(lambda pairs: (p for p in pairs if contains(list(p[1])) == keep))
+        
+        return self
+    
+    
+    def genes(self, gene_index = 0):
+        """Add a step that turns the samples into their unique gene names, in order of appearance.
+        
+        PARAMETERS:
+        - gene_index (int): The position of the gene names in the sample information lists (optional).
+        
+        RETURN:
+        The pipeline.
+        """
+        
+        self._check_stage("genes", ["samples"])
+        
+        def unique_genes(samples):
+            seen = set()
+            for s in samples:
+                gene = s[gene_index]
+                if gene not in seen:
+                    seen.add(gene)
+                    yield gene
+        
+        self._steps.append(unique_genes)
+        
+        return self
+    
+    
+    def go_ids(self, goa, cache_dir = None):
+        """Add a step that pairs the genes with their GO IDs (genes not in the GOA file are left out).
+        
+        PARAMETERS:
+        - goa (str or dict): A GOA file directory, or a dictionary (or GOAnnotations) made by "all_goa_id".
+        - cache_dir (str): A cache directory for the GOA file (optional). See "all_goa_id".
+        
+        RETURN:
+        The pipeline. If the pipeline still produces samples, a "genes" step is added first.
+        """
+        
+        if self.stage == "samples":
+            self.genes()
+        self._check_stage("go_ids", ["genes"])
+        
+        def gene_ids(genes):
+            # The GOA file is only read once the pipeline is run
+            id_dict = all_goa_id(goa, cache_dir) if type(goa) is str else goa
+            for g in genes:
+                if g in id_dict:
+                    yield g, id_dict[g]
+        
+        self._steps.append(gene_ids)
+        
+        return self
     
-    for i in info:
-        line = i.split("\t")
-        main_gene_new = line[2]
-        go_id = line[4]
-        gene_syn_new = line[10].split("|")  # Where synonyms are located
-        
-        if main_gene_new not in check_repeats:
-            if first_time == "n":
-                for syn in gene_syn_old:
-                    complete_info[syn] = complete_info[main_gene_old]
-                    
-            check_repeats.append(main_gene_new)
-            complete_info[main_gene_new] = set([go_id])
-            
-            first_time = "n"
-            gene_syn_old = gene_syn_new
-            main_gene_old = main_gene_new
-            
-        else:
-            complete_info[main_gene_new].add(go_id)
     
-    for syn in gene_syn_old:
-        complete_info[syn] = complete_info[main_gene_old]   # Add the synonyms of the last gene to the dictionary
+    def terms(self, obo = None, cache_dir = None):
+        """Add a step that turns the GO IDs of the genes into their GO terms.
+        
+        PARAMETERS:
+        - obo (str, dict or TermTranslator): An OBO file or URL, a dictionary made by "get_ontologies"
+        or a "TermTranslator" of one, which gives the GO terms as shared tuples (optional). See "get_ontologies".
+        - cache_dir (str): A cache directory for the OBO file (optional). See "get_ontologies".
+        
+        RETURN:
+        The pipeline.
+        """
+        
+        self._check_stage("terms", ["go_ids"])
+        
+        def gene_terms(pairs):
+            if isinstance(obo, TermTranslator):
+                for g, ids in pairs:
+                    yield g, obo.terms(ids)
+                return
             
-    return complete_info
+            id_term = obo if type(obo) is dict else get_ontologies(obo, cache_dir)
+            for g, ids in pairs:
+                yield g, [id_term[i] for i in ids if i in id_term]
+        
+        self._steps.append(gene_terms)
+        
+        return self
+    
+    
+    @_instrumented
+    def collect(self):
+        """Run the pipeline and keep all of its results.
+        
+        RETURN:
+        A list of samples, a set of genes or a dictionary of genes as keys and their GO IDs or GO
+        terms as values, like "mutation_samples", "get_genes", "get_goa_id" and "id_to_term".
+        """
+        
+        if self.stage == "samples":
+            return list(self)
+        if self.stage == "genes":
+            return set(self)
+        
+        return dict(self)
+    
+    
+    @_instrumented
+    def to_file(self, file_name):
+        """Run the pipeline and save its results to a file as they are produced.
+        
+        PARAMETERS:
+        - file_name (str): A text file name.
+        
+        RETURN:
+        Saves the results like "list_to_file" (samples and genes) or "dict_to_file" (GO IDs and GO
+        terms). Returns the number of lines saved.
+        """
+        
+        with open(file_name, "w") as save_file:
+            return self._write(save_file)
+    
+    
+    def _write(self, file):
+        
+        count = 0
+        
+        for item in self:
+            if self.stage in ("go_ids", "terms"):
+                file.write(str(item[0]) + ": " + str(item[1]) + "\n")
+            else:
+                file.write(str(item) + "\n")
+            count += 1
+        
+        return count
+    
+    
+    def _check_stage(self, stage, after):
+        
+        if self.stage not in after:
+            raise ValueError("A " + stage + " step can't follow a " + self.stage + " step")
+        
+        self.stage = stage
 
 
 
-def get_goa_id(genes, id_dict):
-    """Obtain specified genes' GO IDs.
+def main(argv = None):
+    """Run the pipeline from the command line (python MutantGene.py MAF_FILE [options]), or start
+    the service of "serve" (python MutantGene.py serve GOA_FILE [options]).
     
     PARAMETERS:
-    - genes (list): A list of gene names.
-    - id_dict (dict): A dictionary of gene names as keys and a list of GO IDs as values
+    - argv (list): The command line arguments (optional, the ones given to Python by default).
     
-    RETURN: 
-    A dictionary containing the selected gene names as keys and set of
-    their associated GO IDs as values.
+    RETURN:
+    Prints (or saves with "--output") the unique genes of the MAF file or, if given a GOA file,
+    their GO IDs or, if given an OBO file as well, their GO terms. Returns the exit code.
     """
     
-    result = {}
+    if argv == None:
+        argv = sys.argv[1:]
+    if len(argv) > 0 and argv[0] == "serve":
+        return _serve_command(argv[1:])
+    
+    parser = argparse.ArgumentParser(prog = "mutantgene", description = "Find the GO IDs and GO terms of the genes mutated in a MAF file.")
+    parser.add_argument("maf_file", help = "a MAF file (or a gzip compressed MAF file)")
+    parser.add_argument("--goa", help = "a GOA file, to get the GO IDs of the genes")
+    parser.add_argument("--obo", nargs = "?", const = GO_OBO_URL, help = "an OBO file or URL, to get the GO terms of the genes (the general OBO file if none is given)")
+    parser.add_argument("--where", nargs = 3, action = "append", metavar = ("ATTRIBUTE", "OPERATOR", "VALUE"),
+                        help = "keep only samples whose attribute is (==, in) or isn't (!=, not in) the value (comma separated values for in and not in)")
+    parser.add_argument("--include", action = "append", default = [], help = "keep only samples that contain this text (in their gene, HGVSc, HGVSp, VARIANT_CLASS or IMPACT)")
+    parser.add_argument("--exclude", action = "append", default = [], help = "leave out samples that contain this text (in their gene, HGVSc, HGVSp, VARIANT_CLASS or IMPACT)")
+    parser.add_argument("--limit", type = int, help = "the number of samples to read")
+    parser.add_argument("--start", type = int, default = 0, help = "the first sample to read")
+    parser.add_argument("--cache-dir", help = "a cache directory for the GOA and OBO files")
+    parser.add_argument("--output", help = "a text file to save the results to instead of printing them")
+    args = parser.parse_args(argv)
+    
+    if args.obo != None and args.goa == None:
+        parser.error("--obo needs --goa")
+    
+    filters = []
+    for attribute, operator, value in args.where or []:
+        filters.append((attribute, operator, value.split(",") if operator in ("in", "not in") else value))
+    
+    # The texts to include or exclude are searched in the default attributes of "mutation_samples"
+    pipeline = Pipeline(args.maf_file, args.limit, args.start, filters = filters)
+    pipeline.filter(args.include, "y").filter(args.exclude, "n").genes()
+    if args.goa != None:
+        pipeline.go_ids(args.goa, args.cache_dir)
+    if args.obo != None:
+        pipeline.terms(args.obo, args.cache_dir)
+    
+    if args.output != None:
+        pipeline.to_file(args.output)
+    else:
+        pipeline._write(sys.stdout)
+    
+    return 0
 
-    for g in genes:
-                
-        if g in id_dict.keys():
-            result[g] = id_dict[g]    
 
-    return result
-        
 
+def _serve_command(argv):
+    """Start the service of "serve" from the command line, until it is stopped with Ctrl+C."""
     
-def get_genes(samples, gene_index = 0):
-    """Filter gene names from sample information lists.
-    
-    PARAMETERS:
-    - samples (list): A list of sample information lists.
-    - gene_index (int): The index where the gene names are stored (optional).
+    parser = argparse.ArgumentParser(prog = "mutantgene serve", description = "Keep the GO IDs and GO terms of a GOA and an OBO file in memory and answer queries about them.")
+    parser.add_argument("goa_file", help = "a GOA file or URL")
+    parser.add_argument("--obo", help = "an OBO file or URL (the general OBO file if none is given)")
+    parser.add_argument("--host", default = "127.0.0.1", help = "the address to listen on")
+    parser.add_argument("--port", type = int, default = SERVICE_PORT, help = "the port to listen on")
+    parser.add_argument("--socket", help = "a Unix socket file to listen on instead of the host and port")
+    parser.add_argument("--cache-dir", help = "a cache directory for the GOA and OBO files")
+    parser.add_argument("--compact", action = "store_true", help = "keep the GO IDs in less memory")
+    parser.add_argument("--aliases", action = "store_true", help = "also find genes by their synonyms and UniProt accessions")
+    parser.add_argument("--reload-interval", type = float, default = 10, help = "the seconds between checks of whether the files changed (0 to never check)")
+    args = parser.parse_args(argv)
     
-    RETURN:
-    A set of unique gene names collected from the list of samples. 
-    """
+    server = serve(args.goa_file, args.obo, args.host, args.port, args.socket, args.cache_dir, "y" if args.compact else "n",
+                   "y" if args.aliases else "n", args.reload_interval or None, background = "y")
     
-    genes = set()
+    address = args.socket if args.socket != None else "http://%s:%d" % (args.host, server.server_port)
+    print("Answering queries at " + address + " (Ctrl+C to stop)", file = sys.stderr)
     
-    for s in samples:
-        genes.add(s[gene_index])
+    try:
+        server.service.stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
     
-    return genes
+    return 0
 
 
 
 
 
-# ------------------------------ STEP 3 (GO Terms) ------------------------------
+#-----------------------------------------UNIVERSAL AUXILIARY FUNCTIONS--------------------------------------
 
-def get_ontologies(obo_file = None):
-    """Extract all GO IDs and their corresponding GO terms from an OBO file.
+@_instrumented
+def filter_list(raw_list, filter_list, include = "y", match = "substring"):
+    """Filters a chosen list.
     
     PARAMETERS:
-    - obo_file (str): An optional text file name containing ontologies in OBO format
-    or an OBO URL (optional).
+    - raw_list (list): A list to be filtered
+    - filter_list (list): A list of elements to consider for filtering
+    - include (str): A character to decide if the list to be filtered must contain
+    ("y") or not ("n") the given elements in the filter list (optional).
+    - match (str): How the elements of the filter list are compared to the elements of the raw
+    list (or to the elements of the lists within it): "substring" if they only have to be contained
+    in them, or "exact" if they have to be equal to them (optional).
     
     RETURN:
-    A dictionary with all GO IDs as keys and their corresponding terms as values.
+    A filtered version of the list according to the parameters given.
     """
     
-    # Get ontology lines
-    if obo_file == None:
-        obo = requests.get("http://current.geneontology.org/ontology/go.obo") 
-        info = obo.text.split("\n\n")
+    return list(iter_filter_list(raw_list, filter_list, include, match))
+
+
+
+@_instrumented
+def iter_filter_list(raw_list, filter_list, include = "y", match = "substring"):
+    """Lazily filters a chosen list (or any other iterable, like "iter_mutation_samples").
     
-    else:                                  # In case another OBO URL is given
-        if obo_file.startswith("http"):
-            obo = requests.get(obo_file)
-            info = obo.text.split("\n\n")
-        else:                              # In case an OBO file is given
-            obo = open(obo_file).read()
-            info = obo.split("\n\n")
-        
-    # Find and store each GO ID in the OBO file as keys and their associated term as values
-    id_term = {}
+    PARAMETERS:
+    - raw_list (iterable): The elements to be filtered.
+    - filter_list (list): A list of elements to consider for filtering
+    - include (str): A character to decide if the elements to be kept must contain
+    ("y") or not ("n") the given elements in the filter list (optional).
+    - match (str): "substring" or "exact" (optional). See "filter_list".
+    
+    RETURN:
+    A generator of the elements kept, in their original order.
+    """
     
-    for i in info:
-        if i.startswith("[Term]"):
-            lines = i.split("\n")
-            id_term[lines[1][4::]] = lines[2][6::]   #"[4::]" to skip "id: " and "[6::]" to skip "name: "
+    # Without any elements to filter by, every element is kept
+    if len(filter_list) == 0:
+        yield from raw_list
+        return
     
-    return id_term
-            
+    # Lists within the raw list are kept (or not) if any of their elements matches the filter list
+    contains = _compile_matcher(filter_list, match)
+    keep = include == "y"
+    
+    for raw in raw_list:
+        if contains(raw) == keep:
+            yield raw
 
 
-def id_to_term(gene_ids, all_go_ids):
-    """Get the desired gene's GO terms through their GO IDs.
+
+def _compile_matcher(filter_list, match = "substring"):
+    """Compile a list of filter elements into a function that checks if they match an element.
     
     PARAMETERS:
-    - gene_ids (dict): A dictionary with gene names as keys and a list of their associated
-    GO IDs as values
-    - all_go_ids (dict): A dictionary of GO IDs as keys and their corresponding terms as values.
+    - filter_list (list): A list of elements to consider for filtering.
+    - match (str): "substring" or "exact" (optional). See "filter_list".
     
     RETURN:
-    A dictionary of gene names as keys and the terms of their corresponding GO IDs as values.  
+    A function that takes an element (or a list of elements) and returns True if any of the
+    filter list elements matches it (or any of its elements).
     """
-
-    # Prepare a dictionary to store the GO terms converted from their GO IDs
-    gene_terms = {}
-    for g in gene_ids:
-        terms = []
-        
-        for i in gene_ids[g]:
+    
+    if match == "exact":
+        elements = frozenset(filter_list)
         
-            if i in all_go_ids.keys():
-                terms.append(all_go_ids[i])
+        def contains(raw):
+            if type(raw) is list:
+                return not elements.isdisjoint(raw)
+            return raw in elements
         
-        gene_terms[g] = terms
+        return contains
     
-    return gene_terms
-
-
-
+    if match != "substring":
+        raise ValueError("Unknown match type: " + str(match))
+    
+    found_in = _substring_matcher(filter_list)
+    joinable = not any("\t" in f for f in filter_list)
+    
+    def contains(raw):
+        if type(raw) is list:
+            # Search all the elements at once, as no filter element can match across a tab
+            if joinable and all(type(r) is str for r in raw):
+                return found_in("\t".join(raw))
+            return any(found_in(r) for r in raw)
+        return found_in(raw)
+    
+    return contains
 
 
-#-----------------------------------------UNIVERSAL AUXILIARY FUNCTIONS--------------------------------------
 
-def filter_list(raw_list, filter_list, include = "y"):
-    """Filters a chosen list.
+def _substring_matcher(patterns):
+    """Build a function that checks if any of several strings is contained in a text.
     
     PARAMETERS:
-    - raw_list (list): A list to be filtered
-    - filter_list (list): A list of elements to consider for filtering
-    - include (str): A character to decide if the list to be filtered must contain
-    ("y") or not ("n") the given elements in the filter list (optional).
+    - patterns (list): The strings to search for.
     
     RETURN:
-    A filtered version of the list according to the parameters given.
+    A function that takes a text and returns True if any of the patterns is contained in it.
+    A few patterns are searched one by one, while many patterns are searched all at once with
+    an Aho-Corasick automaton (or a set of patterns), so the cost only depends on the length
+    of the text.
     """
     
-    # Choose elements to remove from raw list according the function parameters given.
-    new_list = raw_list.copy()
-    to_remove = []
+    patterns = list(set(patterns))
     
-
-    for raw in raw_list:
-        if type(raw) is list:    # Check if there are lists within the raw list
-            for r in raw:
-                check = 0    #To make sure lists to be excluded are completely searched
-                counter = 0
-                
-                for f in filter_list:
-                    counter = counter + 1
-                    
-                    if include == "y":                            # Include lists of raw list with filter list elements
-                        if f in r:
-                            check = 1
-                            break
-                        
-                        else:
-                            if counter == len(filter_list):
-                                to_remove.append(raw)
-                                check = 1
-                                continue
-                            
-                    else:                                         # Exclude lists of raw list with filter list elements
-                        if f in r:
-                            to_remove.append(raw)
-                            check = 1
-                            break
-                        
-                        else:
-                            continue
-                
-                if check == 1:
-                    break
+    if len(patterns) <= 8:
+        return lambda text: any(p in text for p in patterns)
     
-        else:
-            counter = 0
-            for f in filter_list:
-                counter = counter + 1
-                
-                if include == "y":                                # Include elements of raw list with filter list elements
-                    if f in raw:
-                        break
-                        
-                    else:
-                        if counter == len(filter_list):
-                            to_remove.append(raw)
-                            continue
-                        
-                else:                                             # Exclude elements of raw list with filter list elements
-                    if f in raw:
-                        to_remove.append(raw)
-                        break
-        
-    # Filter the raw list to obtain final filtered list
-    if to_remove != []:
-        for t in to_remove:
-            new_list.remove(t)
-            
-    return new_list
+    # A trie of the patterns ("goto"), where "done" marks states where a pattern was found
+    goto = [{}]
+    done = [False]
+    
+    for p in patterns:
+        state = 0
+        for ch in p:
+            if ch not in goto[state]:
+                goto[state][ch] = len(goto)
+                goto.append({})
+                done.append(False)
+            state = goto[state][ch]
+        done[state] = True
+    
+    # Link each state to the longest proper suffix of it that is also in the trie ("fail")
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    
+    while queue:
+        state = queue.popleft()
+        for ch, child in goto[state].items():
+            queue.append(child)
+            f = fail[state]
+            while f != 0 and ch not in goto[f]:
+                f = fail[f]
+            if state != 0 and ch in goto[f]:
+                fail[child] = goto[f][ch]
+            done[child] = done[child] or done[fail[child]]
+    
+    # Texts that are not much longer than the patterns (like GO IDs searched for GO IDs) are
+    # quicker to check by looking up each of their slices with a pattern length in a set
+    pattern_set = frozenset(patterns)
+    lengths = sorted(set(len(p) for p in patterns))
+    use_slices = {}    # Text lengths as keys and whether to look up slices as values
+    
+    def found_in(text):
+        n = len(text)
+        if n not in use_slices:
+            use_slices[n] = lengths[0] > 0 and sum(n - l + 1 for l in lengths if l <= n) <= n
+        
+        if use_slices[n]:
+            for l in lengths:
+                for i in range(n - l + 1):
+                    if text[i:i + l] in pattern_set:
+                        return True
+            return False
+        
+        state = 0
+        for ch in text:
+            while state != 0 and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if done[state]:
+                return True
+        return done[0]
+    
+    return found_in
                 
             
 
+@_instrumented
 def list_to_file(list_to_save, file_name):
     """Save a list to a file.
     
@@ -382,6 +4177,7 @@ def list_to_file(list_to_save, file_name):
 
 
 
+@_instrumented
 def file_to_list(file_name, extend = "n"):
     """Converts lines in a file to a list.
     
@@ -416,7 +4212,8 @@ def file_to_list(file_name, extend = "n"):
 
 
 
-def filter_dict(raw_dict, filter_list, key_value = "k", include = "y"):
+@_instrumented
+def filter_dict(raw_dict, filter_list, key_value = "k", include = "y", match = "substring", index = None):
     """Filters a chosen dictionary.
     
     PARAMETERS:
@@ -426,88 +4223,76 @@ def filter_dict(raw_dict, filter_list, key_value = "k", include = "y"):
     ("k") or values (not "k")
     - include (str): A character to decide if the dictionary to be filtered must contain
     ("y") or not ("n") the given elements in the filter list.
+    - match (str): How the elements of the filter list are compared to the keys or values:
+    "substring" if they only have to be contained in them, or "exact" if they have to be
+    equal to them (optional).
+    - index (dict): The index of the values of raw_dict made by "value_index" (optional). When
+    filtering the same dictionary by values many times, the index can be made once and given to
+    each call instead of being made again by each of them. It must be made again after the
+    dictionary changes (like after "update_goa_id").
     
     RETURN: 
     A filtered dictionary according to the parameters given.
     """
     
-    # Create a new dictionary to be filtered and a set to use to filter genes
-    new_dict = raw_dict.copy()
-    to_remove = set()
-    for k in new_dict:
-        if key_value == "k":               # Filter genes by comparing the genes themselves to the elements of the filter list
-            counter = 0
-            
-            for f in filter_list:
-                counter = counter + 1
-                
-                if include == "y":                                      # Include key-value pairs with specified keys
-                    if f in k:
-                        break
-                    
-                    else:                                               # Exclude key-value pairs without specified keys
-                        if counter == len(filter_list):
-                            to_remove.add(k)
-                
-                else:
-                    if f in k:                                          # Exclude key-value pairs with specified keys
-                        to_remove.add(k)
-                        break
-            
-        else:                      # Filter genes according to the values of the dictionary
-            if type(new_dict[k]) is list or type(new_dict[k]) is set:   # In case the values are lists
-                check = 0
-                counter_f = 0
-                counter_v = 0
-                for f in filter_list:
-                    counter_f = counter_f + 1
-                    for v in new_dict[k]:
-                        counter_v = counter_v + 1
-                        if include == "y":
-                            if f in v:                             # Include key-value pairs with specified elements in value lists
-                                check = 1
-                                break
-                            
-                            else:                                  # Exclude key-value pairs without specified elements in value lists
-                                if counter_f == len(filter_list) and counter_v == len(new_dict[k]):
-                                    to_remove.add(k)
-                                    check = 1
-                            
-                        else:                                      # Exclude key-value pairs with specified elements in value lists
-                            if f in v:
-                                to_remove.add(k)
-                                check = 1
-                                break
-                    if check == 1:
-                        break
+    # Without any elements to filter by, every key-value pair is kept
+    if len(filter_list) == 0:
+        return dict(raw_dict)
+    
+    if key_value == "k":                   # Filter genes by comparing the genes themselves to the elements of the filter list
+        contains = _compile_matcher(filter_list, match)
+        matched = set(k for k in raw_dict if contains(k))
+    
+    else:                                  # Filter genes according to the values of the dictionary
+        if index == None:
+            index = value_index(raw_dict)
+        
+        if match == "exact":
+            values = [f for f in set(filter_list) if f in index]
+        else:
+            contains = _compile_matcher(filter_list, match)
+            values = [v for v in index if contains(v)]    # Each distinct value is only checked once
+        
+        matched = set()
+        for v in values:
+            matched.update(index[v])
+    
+    # Keep the key-value pairs in their original order
+    if include == "y":
+        return {k: v for k, v in raw_dict.items() if k in matched}
+    
+    return {k: v for k, v in raw_dict.items() if k not in matched}
+
+
+
+def value_index(raw_dict):
+    """Get an index of the keys of a dictionary that hold each value, for "filter_dict".
+    
+    PARAMETERS:
+    - raw_dict (dict): A dictionary whose values are single values or lists, sets or tuples of
+    values (like the tuples of GO terms of "TermTranslator").
+    
+    RETURN:
+    A dictionary with each value as keys and a list of the keys holding it as values. It
+    describes the dictionary as it is when the index is made, so it must be made again after
+    the dictionary changes.
+    """
+    
+    index = {}
+    for k, v in raw_dict.items():
+        if not isinstance(v, (list, set, tuple, frozenset)):
+            v = [v]
+        for i in v:
+            if i in index:
+                index[i].append(k)
             else:
-                counter = 0
-                for f in filter_list:
-                    counter = counter + 1
-                            
-                    if include == "y":
-                        if f in raw_dict[k]:                     # Include key-value pairs with a specified value
-                            break
-                            
-                        else:                                    # Exclude key-value pairs without a specified value
-                            if counter == len(filter_list):
-                                to_remove.add(k)
-                            
-                    else:                                        # Exclude key-value pairs with a specified value
-                        if f in raw_dict[k]:
-                            to_remove.add(k)
-                            break
-                        
-    # Filter the raw list to obtain final filtered list
-    
-    if to_remove != []:
-        for t in to_remove:
-            del new_dict[t]
-            
-    return new_dict
+                index[i] = [k]
+    
+    return index
 
 
 
+@_instrumented
 def dict_to_file(dictionary, file_name):
     """Saves a dictionary to a file.
     
@@ -529,6 +4314,7 @@ def dict_to_file(dictionary, file_name):
 
 
 
+@_instrumented
 def file_to_dict(file_name):
     """Converts lines in a file to a dictionary.
     
@@ -555,4 +4341,608 @@ def file_to_dict(file_name):
             
         line_dict[k] = v
     
-    return line_dict
\ No newline at end of file
+    return line_dict
+
+
+
+@_instrumented
+def save_checkpoint(data, file_name):
+    """Saves a list, set or dictionary to a binary checkpoint file.
+    
+    PARAMETERS:
+    - data (list, set, dict or iterable): The data to be saved. Lists, tuples and sets of strings,
+    numbers, booleans and None, and dictionaries of them (nested in any way) are saved exactly.
+    Any other iterable (like "iter_mutation_samples") is saved as a list while it is being read.
+    - file_name (str): A file name.
+    
+    RETURN:
+    Saves each element (or key-value pair) of the data as a separate length-prefixed record,
+    so it can be read back with "load_checkpoint" or one element at a time with "iter_checkpoint".
+    Values of a list, set or dictionary that are the same object (like the sets of GO IDs shared
+    by synonyms in "all_goa_id") are saved once and still share the same object when loaded.
+    """
+    
+    if type(data) is dict:
+        kind = b"d"
+        records = data.items()
+    elif type(data) is set or type(data) is frozenset:
+        kind = b"S"
+        records = data
+    else:
+        kind = b"l"
+        records = data
+    
+    # Only data that is kept in memory while it is saved can have shared values
+    shared = type(data) in (dict, list, tuple, set, frozenset)
+    seen = {}
+    table = {}
+    
+    with open(file_name, "wb") as save_file:
+        save_file.write(_CHECKPOINT_MAGIC + kind)
+        
+        for number, r in enumerate(records):
+            out = []
+            if kind == b"d":
+                _encode(r[0], out, table)
+                r = r[1]
+            
+            if shared and type(r) in (list, set, dict) and id(r) in seen:
+                out.append(b"r" + _UINT.pack(seen[id(r)]))
+            else:
+                if shared and type(r) in (list, set, dict):
+                    seen[id(r)] = number
+                _encode(r, out, table)
+            
+            record = b"".join(out)
+            save_file.write(_UINT.pack(len(record)))
+            save_file.write(record)
+
+
+
+@_instrumented
+def load_checkpoint(file_name):
+    """Loads a checkpoint file saved with "save_checkpoint".
+    
+    PARAMETERS:
+    - file_name (str): A checkpoint file name.
+    
+    RETURN:
+    The saved list, set or dictionary.
+    """
+    
+    with open(file_name, "rb") as file:
+        kind = _checkpoint_kind(file)
+        records = _iter_records(file, kind)
+        
+        if kind == b"d":
+            return dict(records)
+        if kind == b"S":
+            return set(records)
+        return list(records)
+
+
+
+@_instrumented
+def iter_checkpoint(file_name):
+    """Reads a checkpoint file saved with "save_checkpoint" one element at a time.
+    
+    PARAMETERS:
+    - file_name (str): A checkpoint file name.
+    
+    RETURN:
+    A generator of the saved elements, or of (key, value) tuples for a saved dictionary.
+    """
+    
+    with open(file_name, "rb") as file:
+        yield from _iter_records(file, _checkpoint_kind(file))
+
+
+
+def _checkpoint_kind(file):
+    """Check the header of an open checkpoint file and read the kind of data saved in it."""
+    
+    header = file.read(len(_CHECKPOINT_MAGIC) + 1)
+    
+    if header[:-1] != _CHECKPOINT_MAGIC:
+        raise ValueError("Not a MutantGene checkpoint file: " + str(file.name))
+    
+    return header[-1:]
+
+
+
+def _iter_records(file, kind):
+    """Read the records of an open checkpoint file, after its header."""
+    
+    shared = {}    # Lists, sets and dictionaries by record number, in case a later record is the same object
+    table = []
+    number = 0
+    
+    while True:
+        length = file.read(4)
+        if length == b"":
+            return
+        
+        record = file.read(_UINT.unpack(length)[0])
+        position = 0
+        
+        if kind == b"d":
+            key, position = _decode(record, position, table)
+        
+        if record[position:position + 1] == b"r":
+            value = shared[_UINT.unpack_from(record, position + 1)[0]]
+        else:
+            value = _decode(record, position, table)[0]
+            if type(value) in (list, set, dict):
+                shared[number] = value
+        
+        yield (key, value) if kind == b"d" else value
+        number = number + 1
+
+
+
+def _encode(value, out, table):
+    """Add the binary form of a value to a list of byte strings (see "_decode").
+    
+    PARAMETERS:
+    - value: The value to encode.
+    - out (list): The list of byte strings.
+    - table (dict): The strings of collections saved so far as keys and their numbers as values.
+    """
+    
+    t = type(value)
+    
+    if t is str:
+        b = value.encode("utf-8")
+        out.append(b"s" + _UINT.pack(len(b)))
+        out.append(b)
+    elif t is bool:
+        out.append(b"b\x01" if value else b"b\x00")
+    elif t is int:
+        if -2 ** 63 <= value < 2 ** 63:
+            out.append(b"i" + struct.pack("<q", value))
+        else:
+            _encode(str(value), out, table)
+            out[-2] = b"I" + out[-2][1:]
+    elif t is float:
+        out.append(b"f" + struct.pack("<d", value))
+    elif value is None:
+        out.append(b"n")
+    elif t in _CONTAINER_TAGS:
+        tag = _CONTAINER_TAGS[t]
+        
+        # Collections of strings refer to a table of all the strings saved so far, so repeated
+        # strings (like GO IDs) are only saved and read once
+        if t is not dict and all(type(v) is str and "\0" not in v for v in value):
+            new = []
+            for v in value:
+                if v not in table:
+                    table[v] = len(table)
+                    new.append(v)
+            b = "\0".join(new).encode("utf-8")
+            out.append(tag.upper() + _UINT.pack(len(new)) + _UINT.pack(len(b)))
+            out.append(b)
+            out.append(_UINT.pack(len(value)))
+            out.append(_pack_array([table[v] for v in value]))
+            return
+        
+        out.append(tag + _UINT.pack(len(value)))
+        if t is dict:
+            for k, v in value.items():
+                _encode(k, out, table)
+                _encode(v, out, table)
+        else:
+            for v in value:
+                _encode(v, out, table)
+    else:
+        raise TypeError("Can't save values of type " + t.__name__ + " in a checkpoint")
+
+
+
+def _decode(record, position, table):
+    """Read a value written by "_encode" from a byte string.
+    
+    PARAMETERS:
+    - record (bytes): A byte string.
+    - position (int): The position of the value in the byte string.
+    - table (list): The strings of collections read so far.
+    
+    RETURN:
+    A tuple with the value and the position after it.
+    """
+    
+    tag = record[position:position + 1]
+    position = position + 1
+    
+    if tag == b"s" or tag == b"I":
+        length = _UINT.unpack_from(record, position)[0]
+        value = record[position + 4:position + 4 + length].decode("utf-8")
+        return (value if tag == b"s" else int(value)), position + 4 + length
+    if tag == b"i":
+        return struct.unpack_from("<q", record, position)[0], position + 8
+    if tag == b"f":
+        return struct.unpack_from("<d", record, position)[0], position + 8
+    if tag == b"b":
+        return record[position] == 1, position + 1
+    if tag == b"n":
+        return None, position
+    
+    count = _UINT.unpack_from(record, position)[0]
+    position = position + 4
+    
+    if tag.isupper():                                  # A collection of strings (the first count is of new strings)
+        length = _UINT.unpack_from(record, position)[0]
+        position = position + 4
+        if count > 0:
+            table.extend(record[position:position + length].decode("utf-8").split("\0"))
+        position = position + length
+        
+        count = _UINT.unpack_from(record, position)[0]
+        position = position + 4
+        numbers = _unpack_array(record[position:position + 4 * count])
+        return _CONTAINER_TYPES[tag.lower()](map(table.__getitem__, numbers)), position + 4 * count
+    
+    if tag == b"d":
+        value = {}
+        for _ in range(count):
+            k, position = _decode(record, position, table)
+            value[k], position = _decode(record, position, table)
+        return value, position
+    
+    values = []
+    for _ in range(count):
+        v, position = _decode(record, position, table)
+        values.append(v)
+    
+    return _CONTAINER_TYPES[tag](values), position
+
+
+
+
+
+#-----------------------------------------CACHE FUNCTIONS--------------------------------------
+
+def _cached(source, cache_dir, kind, build, dump, load):
+    """Load a parsed reference file from the cache, rebuilding the cache entry if it is out of date.
+    
+    PARAMETERS:
+    - source (str): The directory of the file the result was parsed from.
+    - cache_dir (str): The cache directory.
+    - kind (str): A name for the type of result (used in the cache entry name).
+    - build (function): A function that parses the source file.
+    - dump (function): A function that turns the parsed result into a list of byte strings.
+    - load (function): A function that turns that list of byte strings back into the parsed result.
+    
+    RETURN:
+    The parsed result. A cache entry is used while the source file keeps the same size and
+    modification time, or the same size and content hash.
+    """
+    
+    os.makedirs(cache_dir, exist_ok = True)
+    
+    stat = os.stat(source)
+    entry = _cache_entry(source, cache_dir, kind)
+    digest = None
+    
+    if os.path.isfile(entry) and os.path.getsize(entry) >= _CACHE_HEADER.size:
+        with open(entry, "r+b") as file:
+            magic, size, mtime, entry_digest = _CACHE_HEADER.unpack(file.read(_CACHE_HEADER.size))
+            fresh = magic == _CACHE_MAGIC and size == stat.st_size
+            
+            # A file with a new modification time but the same content (e.g. copied again) is still fresh
+            if fresh and mtime != stat.st_mtime_ns:
+                digest = _file_digest(source)
+                fresh = digest == entry_digest
+                if fresh:
+                    file.seek(0)
+                    file.write(_CACHE_HEADER.pack(_CACHE_MAGIC, size, stat.st_mtime_ns, digest))
+            
+            if fresh:
+                with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                    result = load(_unpack_sections(data, _CACHE_HEADER.size))
+                os.utime(entry)    # Keep track of the most recently used entries
+                _cache_event(kind, True)
+                return result
+    
+    _cache_event(kind, False)
+    result = build()
+    _save_cached(source, cache_dir, kind, result, dump, stat, digest)
+    
+    return result
+
+
+
+def _save_cached(source, cache_dir, kind, result, dump, stat = None, digest = None):
+    """Write the cache entry of a parsed reference file, replacing any earlier one (see "_cached").
+    
+    PARAMETERS:
+    - source, cache_dir, kind, dump: See "_cached".
+    - result: The parsed result.
+    - stat (os.stat_result): The status of the source file when it was parsed (optional, its current status by default).
+    - digest (bytes): The SHA-256 of the source file (optional, worked out if not given).
+    """
+    
+    os.makedirs(cache_dir, exist_ok = True)
+    
+    if stat == None:
+        stat = os.stat(source)
+    if digest == None:
+        digest = _file_digest(source)
+    entry = _cache_entry(source, cache_dir, kind)
+    
+    # Write to a temporary file first so that an interrupted write never leaves a broken entry behind
+    with open(entry + ".tmp", "wb") as save_file:
+        save_file.write(_CACHE_HEADER.pack(_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, digest))
+        for section in dump(result):
+            save_file.write(struct.pack("<Q", len(section)))
+            save_file.write(section)
+    
+    os.replace(entry + ".tmp", entry)
+    _evict_cache(cache_dir, entry)
+
+
+
+def _cached_sections(source, cache_dir, kind):
+    """Read the sections of the cache entry of a file as they were written, even if the file changed
+    since or is gone (see "_cached"), or get None if there is no entry."""
+    
+    entry = _cache_entry(source, cache_dir, kind)
+    if not os.path.isfile(entry) or os.path.getsize(entry) < _CACHE_HEADER.size:
+        return None
+    
+    with open(entry, "rb") as file:
+        if _CACHE_HEADER.unpack(file.read(_CACHE_HEADER.size))[0] != _CACHE_MAGIC:
+            return None
+        with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+            sections = _unpack_sections(data, _CACHE_HEADER.size)
+    
+    _cache_event(kind, True)
+    
+    return sections
+
+
+
+def _cache_entry(source, cache_dir, kind):
+    """Get the file name of the cache entry of a kind of result parsed from a file."""
+    
+    name = hashlib.sha256(os.path.abspath(source).encode("utf-8")).hexdigest()[:16]
+    
+    return os.path.join(cache_dir, kind + "-" + name + ".mgc")
+
+
+
+def _evict_cache(cache_dir, keep):
+    """Delete the least recently used cache entries and downloads until the cache fits its size limit.
+    
+    PARAMETERS:
+    - cache_dir (str): The cache directory.
+    - keep (str): A cache entry or downloaded file that must not be deleted.
+    """
+    
+    entries = []
+    for f in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, f)
+        if f.endswith(".mgc"):
+            entries.append((os.path.getmtime(path), os.path.getsize(path), path, [path]))
+        elif f.startswith("download-") and not f.endswith((".json", ".tmp")):
+            # A downloaded file goes together with the validators of its download
+            paths = [path, path + ".json"]
+            size = sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+            entries.append((os.path.getmtime(path), size, path, paths))
+    
+    total = sum(e[1] for e in entries)
+    
+    for _, size, path, paths in sorted(entries):
+        if total <= CACHE_SIZE_LIMIT:
+            break
+        if path != keep:
+            for p in paths:
+                if os.path.isfile(p):
+                    os.remove(p)
+            total = total - size
+
+
+
+def _file_digest(file_name):
+    """Compute the SHA-256 digest of a file's content, reading it in blocks."""
+    
+    digest = hashlib.sha256()
+    
+    with open(file_name, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    
+    return digest.digest()
+
+
+
+def _unpack_sections(data, position):
+    """Split a buffer of length-prefixed sections into a list of byte strings."""
+    
+    sections = []
+    view = memoryview(data)
+    
+    while position < len(data):
+        length = struct.unpack_from("<Q", data, position)[0]
+        sections.append(bytes(view[position + 8:position + 8 + length]))
+        position = position + 8 + length
+    
+    view.release()
+    
+    return sections
+
+
+
+def _pack_strings(strings):
+    """Turn a list of strings into a byte string (the inverse of "_unpack_strings")."""
+    
+    return "\n".join(strings).encode("utf-8")
+
+
+
+def _unpack_strings(section):
+    """Turn a byte string made by "_pack_strings" back into a list of strings."""
+    
+    if section == b"":
+        return []
+    
+    return section.decode("utf-8").split("\n")
+
+
+
+def _pack_array(values, typecode = "I"):
+    """Turn a list of unsigned integers (of 4 bytes, or 8 bytes with typecode "Q") into a little-endian byte string."""
+    
+    values = array(typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    
+    return values.tobytes()
+
+
+
+def _unpack_array(section, typecode = "I"):
+    """Turn a byte string made by "_pack_array" back into an array of unsigned integers."""
+    
+    values = array(typecode)
+    values.frombytes(section)
+    if sys.byteorder != "little":
+        values.byteswap()
+    
+    return values
+
+
+
+def _dump_goa(complete_info):
+    """Lay out the result of "all_goa_id" as byte string sections.
+    
+    Genes are stored once with the indexes of their GO IDs, and every name that shares
+    its set of GO IDs with an earlier name (a synonym) is stored as a link to that gene.
+    """
+    
+    if isinstance(complete_info, GOAnnotations):
+        complete_info = complete_info.to_dict()
+    
+    genes = []
+    sets = []
+    gene_of_set = {}
+    synonyms = []
+    targets = []
+    
+    for name, ids in complete_info.items():
+        if id(ids) in gene_of_set:
+            synonyms.append(name)
+            targets.append(gene_of_set[id(ids)])
+        else:
+            gene_of_set[id(ids)] = len(genes)
+            genes.append(name)
+            sets.append(ids)
+    
+    # Number the GO IDs in the order they are first found
+    go_ids = dict(zip(dict.fromkeys(chain.from_iterable(sets)), count()))
+    indexes = list(map(go_ids.__getitem__, chain.from_iterable(sets)))
+    offsets = list(accumulate(map(len, sets), initial = 0))
+    
+    return [_pack_strings(list(go_ids)), _pack_strings(genes), _pack_array(offsets), _pack_array(indexes),
+            _pack_strings(synonyms), _pack_array(targets)]
+
+
+
+def _load_goa_compact(sections):
+    """Rebuild the result of "all_goa_id" with compact="y" from the sections made by "_dump_goa"."""
+    
+    go_numbers = [_go_number(i) for i in _unpack_strings(sections[0])]
+    genes = _unpack_strings(sections[1])
+    offsets = _unpack_array(sections[2])
+    indexes = _unpack_array(sections[3])
+    
+    numbers = array("I")
+    for g in range(len(genes)):
+        numbers.extend(sorted([go_numbers[i] for i in indexes[offsets[g]:offsets[g + 1]]]))
+    
+    rows = {name: row for row, name in enumerate(genes)}
+    for name, target in zip(_unpack_strings(sections[4]), _unpack_array(sections[5])):
+        rows[name] = target
+    
+    annotations = GOAnnotations.__new__(GOAnnotations)
+    annotations._build(genes, rows, array("I", offsets), numbers)
+    
+    return annotations
+
+
+
+def _load_goa(sections):
+    """Rebuild the result of "all_goa_id" from the sections made by "_dump_goa"."""
+    
+    go_ids = _unpack_strings(sections[0])
+    genes = _unpack_strings(sections[1])
+    offsets = _unpack_array(sections[2])
+    indexes = _unpack_array(sections[3])
+    
+    sets = [set([go_ids[i] for i in indexes[offsets[g]:offsets[g + 1]]]) for g in range(len(genes))]
+    complete_info = dict(zip(genes, sets))
+    
+    for name, target in zip(_unpack_strings(sections[4]), _unpack_array(sections[5])):
+        complete_info[name] = sets[target]
+    
+    return complete_info
+
+
+
+def _dump_goa_release(release):
+    """Lay out the result of "all_goa_id" and the _GOARelease of "update_goa_id" as byte string
+    sections: those of "_dump_goa", followed by those of the release."""
+    
+    # The tables start with an empty string, so a table of a single empty string isn't packed as an empty table
+    return _dump_goa(release.complete_info) + [
+        release.separator, _pack_array(release.chunks, "Q"), _pack_array(release.chunk_lines), _pack_array(release.hashes, "Q"),
+        _pack_array(release.line_genes), _pack_array(release.line_go), _pack_array(release.line_fields),
+        _pack_strings([""] + release.genes), _pack_strings([""] + release.go_ids), _pack_strings([""] + release.fields),
+        _pack_array(release.go_counts, "Q"), _pack_array(release.go_counts.values()),
+        _pack_array(release.field_counts, "Q"), _pack_array(release.field_counts.values()),
+        _pack_array(release.gene_sizes), _pack_array([release.size])]
+
+
+
+def _load_goa_release(sections):
+    """Rebuild the _GOARelease of "update_goa_id" (without its result) from the sections made by
+    "_dump_goa_release", or get None for a cache entry of "all_goa_id" that doesn't keep one."""
+    
+    if len(sections) == 6:
+        return None
+    
+    sections = sections[6:]
+    release = _GOARelease(sections[0], _unpack_strings(sections[7])[1:], _unpack_strings(sections[8])[1:],
+                          _unpack_strings(sections[9])[1:])
+    release.chunks = _unpack_array(sections[1], "Q")
+    release.chunk_lines = _unpack_array(sections[2])
+    release.hashes = _unpack_array(sections[3], "Q")
+    release.line_genes = _unpack_array(sections[4])
+    release.line_go = _unpack_array(sections[5])
+    release.line_fields = _unpack_array(sections[6])
+    release.go_counts = dict(zip(_unpack_array(sections[10], "Q"), _unpack_array(sections[11])))
+    release.field_counts = dict(zip(_unpack_array(sections[12], "Q"), _unpack_array(sections[13])))
+    release.gene_sizes = _unpack_array(sections[14])
+    release.size = _unpack_array(sections[15])[0]
+    
+    return release
+
+
+
+def _dump_terms(id_term):
+    """Lay out the result of "get_ontologies" as byte string sections."""
+    
+    return [_pack_strings(list(id_term)), _pack_strings(list(id_term.values()))]
+
+
+
+def _load_terms(sections):
+    """Rebuild the result of "get_ontologies" from the sections made by "_dump_terms"."""
+    
+    return dict(zip(_unpack_strings(sections[0]), _unpack_strings(sections[1])))
+
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
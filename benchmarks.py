@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the MutantGene library, run on synthetic files so no real data is needed.
+
+Usage: python benchmarks.py [--sizes 1000,10000,100000] [--cases all_goa_id,filter_list]
+                            [--json results.json] [--compare old_results.json] [--data-dir DIR] [--modes]
+
+Every case is run in a new process on files of each size (in rows: MAF samples, GOA annotation
+lines and OBO terms) and its wall time, peak memory (RSS) and rows per second are printed. The
+results can be saved with "--json" and compared with an earlier run with "--compare".
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource                                   # Not available on Windows, where peak memory isn't reported
+except ImportError:
+    resource = None
+
+import MutantGene as mg
+
+
+# Column layout of the GDC MAF files used in "examples.py"
+MAF_COLUMNS = 120
+MAF_SPECIAL = {0: "Hugo_Symbol", 34: "HGVSc", 35: "HGVSp", 93: "IMPACT", 95: "VARIANT_CLASS"}
+
+
+
+def write_maf(file_name, samples, seed = 0):
+    """Write a synthetic MAF file.
+
+    PARAMETERS:
+    - file_name (str): A file name for the MAF file.
+    - samples (int): The number of sample lines to write.
+    - seed (int): A seed for the random number generator, so the same file is always written (optional).
+
+    RETURN:
+    Saves a MAF file with comment lines, attribute titles and the given number of samples.
+    """
+
+    rand = random.Random(seed)
+    genes = ["TP53", "KRAS", "EGFR", "BRCA1", "PIK3CA", "PTEN"] + ["GENE" + str(i) for i in range(20000)]
+    impacts = ["LOW", "MODERATE", "HIGH", "MODIFIER"]
+    classes = ["SNV", "deletion", "insertion", "substitution"]
+    amino_acids = ["Ala", "Arg", "Asn", "Asp", "Cys", "Gln", "Glu", "Gly", "His", "Ile", "Leu", "Lys", "Met", "Phe", "Pro", "Ser", "Thr", "Trp", "Tyr", "Val"]
+
+    titles = [MAF_SPECIAL.get(i, "Attribute_" + str(i)) for i in range(MAF_COLUMNS)]
+    filler = ["value" + str(i) for i in range(MAF_COLUMNS)]
+
+    with open(file_name, "w") as save_file:
+        save_file.write("#version 2.4\n#synthetic MAF file\n")
+        save_file.write("\t".join(titles) + "\n")
+
+        for _ in range(samples):
+            row = list(filler)
+            position = rand.randint(1, 1500)
+            row[0] = rand.choice(genes[:200]) if rand.random() < 0.5 else rand.choice(genes)
+            row[34] = "c." + str(position * 3) + "G>A"
+            row[35] = "p." + rand.choice(amino_acids) + str(position) + rand.choice(amino_acids)
+            row[93] = rand.choice(impacts)
+            row[95] = rand.choice(classes)
+            save_file.write("\t".join(row) + "\n")
+
+
+
+def go_id_pool(rand, terms = 45000):
+    """Draw the GO IDs shared by "write_gaf" and "write_obo" (the first draw of their random generator)."""
+
+    return ["GO:" + str(i).zfill(7) for i in rand.sample(range(1, max(2000000, terms * 10)), terms)]
+
+
+
+def write_gaf(file_name, genes = 20000, annotations = 600000, seed = 0, terms = 45000):
+    """Write a synthetic GOA file in GAF 2.2 format.
+
+    PARAMETERS:
+    - file_name (str): A file name for the GOA file.
+    - genes (int): The number of genes to annotate (optional, the size of a human GOA release by default).
+    - annotations (int): The number of annotation lines to write (optional).
+    - seed (int): A seed for the random number generator, so the same file is always written (optional).
+    - terms (int): The number of GO IDs to annotate genes with (optional, about as many as there are
+    GO terms). The same seed and number of terms give the GO IDs of "write_obo".
+
+    RETURN:
+    Saves a GOA file whose annotation lines come in random gene order.
+    """
+
+    rand = random.Random(seed)
+    go_ids = go_id_pool(rand, terms)
+    synonyms = ["|".join("GENE" + str(g) + "_SYN" + str(s) for s in range(rand.randint(0, 3))) for g in range(genes)]
+
+    with open(file_name, "w") as save_file:
+        save_file.write("!gaf-version: 2.2\n!synthetic GOA file\n")
+
+        for _ in range(annotations):
+            g = rand.randrange(genes)
+            line = ["UniProtKB", "P" + str(g).zfill(5), "GENE" + str(g), rand.choice(["enables", "located_in", "involved_in", "NOT|enables"]),
+                    rand.choice(go_ids), "PMID:" + str(rand.randint(1, 30000000)),
+                    rand.choice(["IDA", "IMP", "IEA", "TAS", "ISS", "IBA"]), "", rand.choice("PFC"), "Protein " + str(g),
+                    synonyms[g], "protein", "taxon:9606", "20200101", "UniProt", "", ""]
+            save_file.write("\t".join(line) + "\n")
+
+
+
+def write_obo(file_name, terms = 45000, seed = 0):
+    """Write a synthetic OBO file.
+
+    PARAMETERS:
+    - file_name (str): A file name for the OBO file.
+    - terms (int): The number of GO terms to write (optional, about as many as there are GO terms).
+    - seed (int): A seed for the random number generator, so the same file is always written (optional).
+
+    RETURN:
+    Saves an OBO file whose terms (with the GO IDs of "write_gaf") form a graph of "is_a" and
+    "part_of" relations, with some alternative GO IDs and obsolete terms, like the general OBO file.
+    """
+
+    rand = random.Random(seed)
+    go_ids = go_id_pool(rand, terms)
+    namespaces = ["biological_process", "molecular_function", "cellular_component"]
+    used = set(go_ids)
+
+    with open(file_name, "w") as save_file:
+        save_file.write("format-version: 1.2\ndata-version: synthetic\nontology: go\n\n")
+
+        for i, go_id in enumerate(go_ids):
+            save_file.write("[Term]\nid: " + go_id + "\nname: synthetic term " + str(i) + "\nnamespace: " + namespaces[i % 3] + "\n")
+
+            if rand.random() < 0.02:
+                alt_id = "GO:" + str(rand.randrange(10000000)).zfill(7)
+                if alt_id not in used:
+                    used.add(alt_id)
+                    save_file.write("alt_id: " + alt_id + "\n")
+
+            save_file.write("def: \"A synthetic term.\" [GOC:synthetic]\n")
+
+            if i > 0 and rand.random() < 0.03:
+                save_file.write("is_obsolete: true\n")
+            elif i > 0:
+                # Parents are always earlier terms, so the relations never form a cycle
+                for parent in set(rand.randrange(i) for _ in range(rand.randint(1, 2))):
+                    save_file.write("is_a: " + go_ids[parent] + " ! synthetic term " + str(parent) + "\n")
+                if rand.random() < 0.15:
+                    parent = rand.randrange(i)
+                    save_file.write("relationship: part_of " + go_ids[parent] + " ! synthetic term " + str(parent) + "\n")
+
+            save_file.write("\n")
+
+        save_file.write("[Typedef]\nid: part_of\nname: part of\n")
+
+
+
+def write_release(file_name, new_file_name, seed = 0):
+    """Write a new release of a synthetic GOA or OBO file.
+
+    PARAMETERS:
+    - file_name (str): The GOA or OBO file of the old release.
+    - new_file_name (str): A file name for the new release.
+    - seed (int): A seed for the random number generator, so the same file is always written (optional).
+
+    RETURN:
+    Saves a copy of the file where about 1 in 1000 annotation lines is removed and 1 in 1000 gets
+    another last column, and about 1 in 1000 GO terms gets another name.
+    """
+
+    rand = random.Random(seed)
+
+    with open(file_name) as file, open(new_file_name, "w") as save_file:
+        for line in file:
+            draw = rand.random()
+            if line.startswith("UniProtKB") and draw < 0.001:
+                continue
+            if line.startswith("UniProtKB") and draw < 0.002:
+                line = line[:-1] + "new\n"
+            elif line.startswith("name: ") and draw < 0.001:
+                line = line[:-1] + " (renamed)\n"
+            save_file.write(line)
+
+
+
+def synthetic_files(directory, rows, seed = 0):
+    """Write (or reuse) the synthetic files of a benchmark size.
+
+    PARAMETERS:
+    - directory (str): The directory to write the files to. Files already there are reused, as the
+    same size and seed always give the same files.
+    - rows (int): The number of MAF samples, GOA annotation lines and OBO terms.
+    - seed (int): A seed for the random number generators (optional).
+
+    RETURN:
+    A dictionary with the "maf", "goa", "obo" and "cohort" (a directory of 4 MAF files) file names,
+    a "cache" directory and an "out" file name for the cases, and the number of "rows" and OBO "terms".
+    """
+
+    name = os.path.join(directory, str(rows) + "_" + str(seed))
+    terms = max(min(rows, 45000), rows // 10)
+    files = {"rows": rows, "terms": terms, "maf": name + ".maf", "goa": name + ".gaf", "obo": name + ".obo",
+             "cohort": name + "_cohort", "cache": name + "_cache", "out": name + ".out"}
+
+    if not os.path.isfile(files["maf"]):
+        write_maf(files["maf"], rows, seed)
+    if not os.path.isfile(files["goa"]):
+        write_gaf(files["goa"], max(rows // 30, 10), rows, seed, terms)
+    if not os.path.isfile(files["obo"]):
+        write_obo(files["obo"], terms, seed)
+    if not os.path.isdir(files["cohort"]):
+        os.mkdir(files["cohort"])
+        for i in range(4):
+            write_maf(os.path.join(files["cohort"], "sample" + str(i) + ".maf"), rows // 4, seed + i)
+
+    return files
+
+
+
+def timed(function, *args, **kwargs):
+    """Time a function call.
+
+    RETURN:
+    A tuple with the function result and the elapsed time in seconds.
+    """
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+
+    return result, time.perf_counter() - start
+
+
+
+def bench_parallel_mutation_samples(maf_file):
+    """Compare the single process "mutation_samples" with its parallel mode."""
+
+    index_list = [93, 0, 34, 35, 95]
+
+    single, single_time = timed(mg.mutation_samples, maf_file, index_list = index_list)
+    print("mutation_samples, 1 worker: %.2fs (%d samples/s)" % (single_time, len(single) / single_time))
+
+    # Worker counts above the number of cores are still timed, but they can't show a speedup
+    cores = os.cpu_count() or 1
+
+    for workers in (2, 4, 8):
+        parallel, parallel_time = timed(mg.mutation_samples, maf_file, index_list = index_list, workers = workers)
+        assert parallel == single
+        print("mutation_samples, %d workers: %.2fs (%.1fx speedup%s)" % (workers, parallel_time, single_time / parallel_time,
+                                                                        "" if workers <= cores else ", only %d cores" % cores))
+
+
+
+
+def bench_all_goa_id(goa_file):
+    """Time "all_goa_id" on a GOA file."""
+
+    with open(goa_file) as file:
+        lines = sum(1 for _ in file)
+
+    all_ids, goa_time = timed(mg.all_goa_id, goa_file)
+    print("all_goa_id: %.2fs (%d lines/s, %d genes and synonyms)" % (goa_time, lines / goa_time, len(all_ids)))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        mg.all_goa_id(goa_file, cache_dir)
+        cached, cached_time = timed(mg.all_goa_id, goa_file, cache_dir)
+        assert cached == all_ids
+        print("all_goa_id, from the cache: %.2fs" % cached_time)
+
+
+
+
+def bench_filter_list(maf_file, terms = 500):
+    """Time "filter_list" on the samples of a MAF file against many filter elements."""
+
+    samples = mg.mutation_samples(maf_file, index_list = [93, 0, 34, 35, 95])
+    filters = ["GENE" + str(i) for i in range(terms)]
+
+    for match in ("substring", "exact"):
+        kept, filter_time = timed(mg.filter_list, samples, filters, "n", match)
+        print("filter_list, %d %s terms: %.2fs (%d samples/s, %d kept)" % (terms, match, filter_time, len(samples) / filter_time, len(kept)))
+
+
+
+
+# Each case prepares its input from the synthetic files (not timed) and returns the function to
+# time and the number of rows it processes
+def case_mutation_samples(files):
+    return lambda: mg.mutation_samples(files["maf"]), files["rows"]
+
+def case_mutation_samples_filtered(files):
+    index_list = ["IMPACT", "Hugo_Symbol", "HGVSc", "HGVSp", "VARIANT_CLASS"]
+    return lambda: mg.mutation_samples(files["maf"], index_list = index_list, filters = [("IMPACT", "!=", "LOW")]), files["rows"]
+
+def case_maf_index(files):
+    return lambda: mg.maf_index(files["maf"]), 1
+
+def case_build_maf_index(files):
+    def run():
+        mg.build_maf_index(files["maf"])
+        os.remove(files["maf"] + ".idx")                  # Later cases read the MAF file without it
+    return run, files["rows"]
+
+def case_get_genes(files):
+    samples = mg.mutation_samples(files["maf"])
+    return lambda: mg.get_genes(samples), len(samples)
+
+def case_parse_variants(files):
+    samples = mg.mutation_samples(files["maf"])
+    return lambda: mg.parse_variants(samples), len(samples)
+
+def case_find_hotspots(files):
+    variants = mg.parse_variants(mg.mutation_samples(files["maf"]))
+    return lambda: mg.find_hotspots(variants, 10), len(variants)
+
+def case_all_goa_id(files):
+    return lambda: mg.all_goa_id(files["goa"]), files["rows"]
+
+def case_all_goa_id_compact(files):
+    return lambda: mg.all_goa_id(files["goa"], compact = "y"), files["rows"]
+
+def case_all_goa_id_filtered(files):
+    return lambda: mg.all_goa_id(files["goa"], aspects = "C", evidence = mg.EXPERIMENTAL_EVIDENCE, negated = "n"), files["rows"]
+
+def case_all_goa_id_cached(files):
+    mg.all_goa_id(files["goa"], files["cache"])
+    return lambda: mg.all_goa_id(files["goa"], files["cache"]), files["rows"]
+
+def case_update_goa_id(files):
+    new_goa = files["goa"][:-4] + "_new.gaf"
+    if not os.path.isfile(new_goa):
+        write_release(files["goa"], new_goa)
+    all_ids = mg.all_goa_id(files["goa"], files["cache"])      # Keeps the state the update starts from
+    return lambda: mg.update_goa_id(all_ids, files["goa"], new_goa, files["cache"]), files["rows"]
+
+def case_get_goa_id(files):
+    genes = mg.get_genes(mg.mutation_samples(files["maf"], index_list = [0]))
+    all_ids = mg.all_goa_id(files["goa"])
+    return lambda: mg.get_goa_id(genes, all_ids), len(genes)
+
+def case_get_goa_id_compact_first(files):
+    genes = mg.get_genes(mg.mutation_samples(files["maf"], index_list = [0]))
+    all_ids = mg.all_goa_id(files["goa"], compact = "y")
+    return lambda: mg.get_goa_id(genes, all_ids), len(genes)
+
+def case_get_goa_id_compact(files):
+    genes = mg.get_genes(mg.mutation_samples(files["maf"], index_list = [0]))
+    all_ids = mg.all_goa_id(files["goa"], compact = "y")
+    mg.get_goa_id(genes, all_ids)                         # Later lookups reuse the sets of GO IDs made by the first
+    return lambda: mg.get_goa_id(genes, all_ids), len(genes)
+
+def case_gene_ontology_matrix(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    return lambda: mg.GeneOntologyMatrix(all_ids), len(all_ids)
+
+def case_go_enrichment(files):
+    background = mg.GeneOntologyMatrix(mg.all_goa_id(files["goa"]))
+    genes = background.genes[:200]
+    return lambda: mg.go_enrichment(genes, background), background.shape[1]
+
+def case_get_ontologies(files):
+    return lambda: mg.get_ontologies(files["obo"]), files["terms"]
+
+def case_get_ontologies_cached(files):
+    mg.get_ontologies(files["obo"], files["cache"])
+    return lambda: mg.get_ontologies(files["obo"], files["cache"]), files["terms"]
+
+def case_update_ontologies(files):
+    new_obo = files["obo"][:-4] + "_new.obo"
+    if not os.path.isfile(new_obo):
+        write_release(files["obo"], new_obo)
+    all_terms = mg.get_ontologies(files["obo"])
+    return lambda: mg.update_ontologies(all_terms, files["obo"], new_obo), files["terms"]
+
+def case_go_graph(files):
+    return lambda: mg.go_graph(files["obo"]), files["terms"]
+
+def case_id_to_term(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    all_terms = mg.get_ontologies(files["obo"])
+    return lambda: mg.id_to_term(all_ids, all_terms), len(all_ids)
+
+def case_term_translator(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    translator = mg.TermTranslator(mg.get_ontologies(files["obo"]))
+    return lambda: translator.translate(all_ids), len(all_ids)
+
+def case_filter_list(files):
+    samples = mg.mutation_samples(files["maf"])
+    filters = ["GENE" + str(i) for i in range(500)]
+    return lambda: mg.filter_list(samples, filters, "n"), len(samples)
+
+def case_filter_dict(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    filters = sorted(set(i for ids in all_ids.values() for i in ids))[:500]
+    return lambda: mg.filter_dict(all_ids, filters, "v", "y", "exact"), len(all_ids)
+
+def case_filter_dict_indexed(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    filters = sorted(set(i for ids in all_ids.values() for i in ids))[:500]
+    index = mg.value_index(all_ids)
+    return lambda: mg.filter_dict(all_ids, filters, "v", "y", "exact", index), len(all_ids)
+
+def case_list_to_file(files):
+    samples = mg.mutation_samples(files["maf"])
+    return lambda: mg.list_to_file(samples, files["out"]), len(samples)
+
+def case_file_to_list(files):
+    samples = mg.mutation_samples(files["maf"])
+    mg.list_to_file(samples, files["out"])
+    return lambda: mg.file_to_list(files["out"]), len(samples)
+
+def case_dict_to_file(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    return lambda: mg.dict_to_file(all_ids, files["out"]), len(all_ids)
+
+def case_file_to_dict(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    mg.dict_to_file(all_ids, files["out"])
+    return lambda: mg.file_to_dict(files["out"]), len(all_ids)
+
+def case_save_checkpoint(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    return lambda: mg.save_checkpoint(all_ids, files["out"]), len(all_ids)
+
+def case_load_checkpoint(files):
+    all_ids = mg.all_goa_id(files["goa"])
+    mg.save_checkpoint(all_ids, files["out"])
+    return lambda: mg.load_checkpoint(files["out"]), len(all_ids)
+
+def case_pipeline(files):
+    pipeline = mg.Pipeline(files["maf"]).filter(["LOW"], "n").go_ids(files["goa"]).terms(files["obo"])
+    return lambda: pipeline.to_file(files["out"]), files["rows"]
+
+def case_run_cohort(files):
+    return lambda: mg.run_cohort(files["cohort"], files["out"], files["goa"], resume = "n", progress = "n"), files["rows"] // 4 * 4
+
+
+CASES = {name[5:]: case for name, case in list(globals().items()) if name.startswith("case_")}
+
+
+
+def peak_rss():
+    """Get the peak memory (resident set size) of the current process in MB, or None if it can't be measured."""
+
+    if resource == None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024     # Bytes on macOS, KB elsewhere
+
+
+
+def run_case(name, files):
+    """Run a benchmark case in the current process.
+
+    RETURN:
+    A dictionary with the case name, the number of rows, the wall time in seconds, the rows per
+    second and the peak memory in MB (including the case's input, as prepared before timing).
+    """
+
+    run, rows = CASES[name](files)
+
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    return {"case": name, "rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds > 0 else None, "peak_rss_mb": peak_rss()}
+
+
+
+def run_isolated(name, files):
+    """Run a benchmark case in a new process, so its peak memory isn't mixed with other cases."""
+
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+
+    with ProcessPoolExecutor(1, mp_context = context) as pool:
+        return pool.submit(run_case, name, files).result()
+
+
+
+def report(result, previous = None):
+    """Print a benchmark result, and how it compares to a previous result with the same case and rows."""
+
+    peak = "n/a" if result["peak_rss_mb"] == None else "%.0f" % result["peak_rss_mb"]
+    speed = "n/a" if result["rows_per_second"] == None else "%.0f" % result["rows_per_second"]
+    line = "%-26s %10d %10.4f %14s %10s" % (result["case"], result["rows"], result["seconds"], speed, peak)
+
+    if previous != None and result["seconds"] > 0:
+        ratio = previous["seconds"] / result["seconds"]
+        line += "   %.2fx %s" % (ratio if ratio >= 1 else 1 / ratio, "faster" if ratio >= 1 else "slower")
+
+    print(line)
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the MutantGene functions on synthetic files.")
+    parser.add_argument("--sizes", default = "1000,10000,100000", help = "comma separated numbers of rows (up to 10000000)")
+    parser.add_argument("--cases", default = ",".join(CASES), help = "comma separated cases to run (all by default): " + ", ".join(CASES))
+    parser.add_argument("--seed", type = int, default = 0, help = "the seed of the synthetic files")
+    parser.add_argument("--data-dir", help = "a directory to keep the synthetic files in between runs")
+    parser.add_argument("--json", help = "a file to save the results to")
+    parser.add_argument("--compare", help = "a file with the results of an earlier run to compare with")
+    parser.add_argument("--modes", action = "store_true", help = "also compare the modes of some functions (parallel, cached...) on the largest size")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cases = args.cases.split(",")
+    for name in cases:
+        if name not in CASES:
+            parser.error("unknown case: " + name)
+
+    previous = {}
+    if args.compare != None:
+        with open(args.compare) as file:
+            previous = {(r["case"], r["rows"]): r for r in json.load(file)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = args.data_dir or directory
+        os.makedirs(data_dir, exist_ok = True)
+        results = []
+
+        print("%-26s %10s %10s %14s %10s" % ("case", "rows", "seconds", "rows/s", "peak MB"))
+
+        for size in sizes:
+            files = synthetic_files(data_dir, size, args.seed)
+            for name in cases:
+                result = run_isolated(name, files)
+                results.append(result)
+                report(result, previous.get((result["case"], result["rows"])))
+
+        if args.json != None:
+            with open(args.json, "w") as save_file:
+                json.dump(results, save_file, indent = 1)
+
+        if args.modes:
+            bench_parallel_mutation_samples(files["maf"])
+            bench_filter_list(files["maf"])
+            bench_all_goa_id(files["goa"])
@@ -47,6 +47,20 @@ mg.list_to_file(raw_samples, "mutation_samples.txt")
 samples = mg.filter_list(raw_samples, ["LOW"], "n")
 mg.list_to_file(samples, "filtered_samples.txt")      #77 samples
 
+# Both steps can also be done in a single pass over the MAF file by using attribute titles instead
+# of indexes and letting "mutation_samples" filter the samples while the file is being read.
+
+
+samples = mg.mutation_samples(maf, 100, 39, ["IMPACT", "Hugo_Symbol", "HGVSc", "HGVSp", "VARIANT_CLASS"],
+                              filters = [("IMPACT", "!=", "LOW")])     #the same 77 samples
+
+
+# The HGVSp changes of the samples (index 3 of each list) can also be turned into protein positions and
+# amino acids with "parse_variants", to find the positions of each gene mutated in several samples.
+
+
+variants = mg.parse_variants(samples, 1, 2, 3)
+hotspots = mg.find_hotspots(variants, min_count = 2)
 
 
 # Next, GO IDs need to be generated. The GOA file defined at the start of this file will be used
@@ -75,6 +89,12 @@ mg.list_to_file(genes, "genes.txt")
 gene_ids = mg.get_goa_id(genes, all_ids)     #72 genes (not all genes are stored in the GOA file of choice)
 mg.dict_to_file(gene_ids, "get_goa_id.txt")
 
+# Some of the missing genes are written in the MAF file with another name (a synonym or an older
+# gene name). The aliases of the GOA file, found with "gene_aliases", let "get_goa_id" find them too.
+
+aliases = mg.gene_aliases(goa)
+gene_ids = mg.get_goa_id(genes, all_ids, aliases, ignore_case = "y")
+
 # Here is a good opportunity to use the "filter_dict" function. A text file containing
 # the GO IDs that are "Child Terms" to the GO ID of the cytoplasm (meaning they are present
 # or their function is in some way related to elements of the cytoplasm) has been created, 
@@ -85,6 +105,12 @@ cyto_ids = mg.file_to_list("cytoplasm_ids.txt", "y")
 cyto_genes = mg.filter_dict(gene_ids, cyto_ids, "v", "y")    #24 genes
 mg.dict_to_file(cyto_genes, "cyto_genes.txt")
 
+# The same GO IDs can also be found without the text file, by building the graph of all GO terms
+# with "go_graph" and asking it for every term that descends from the cytoplasm (GO:0005737).
+
+graph = mg.go_graph()
+cyto_ids = graph.descendants("GO:0005737", "y")
+
 
 
 
@@ -109,6 +135,13 @@ mg.dict_to_file(all_terms, "all_terms.txt")
 gene_terms = mg.id_to_term(cyto_genes, all_terms)
 mg.dict_to_file(gene_terms, "gene_terms.txt")
 
+# When the GO terms of the genes of many samples are needed, a "TermTranslator" remembers the terms
+# of the genes already translated, so each gene found again (or any gene with the same GO IDs)
+# gets the same tuple of terms instead of a new list.
+
+translator = mg.TermTranslator(all_terms)
+sample_terms = [translator.translate(all_ids, sample_genes) for sample_genes in [genes, sorted(genes)[:10]]]
+
 
 
 
@@ -121,5 +154,40 @@ mg.dict_to_file(gene_terms, "gene_terms.txt")
 terms_dict = mg.file_to_dict("gene_terms.txt")
 
 
+# Text files are easy to read, but they lose information (the sets of GO IDs come back as lists
+# and spaces inside GO terms are removed). To save the results of a step and load them back exactly
+# (and much faster), the "save_checkpoint" and "load_checkpoint" functions can be used instead.
+
+
+mg.save_checkpoint(all_ids, "all_goa_id.ckpt")
+all_ids = mg.load_checkpoint("all_goa_id.ckpt")
+
+
+
+# When a new release of the GOA file comes out, the GO IDs of "all_goa_id" can be brought up to date
+# with "update_goa_id" instead of reading the whole file again. The state of each release is kept in a
+# cache directory (by "all_goa_id" with a cache directory, or by the first update), so only the lines
+# that aren't in the old release are read as annotations, and the annotations added, removed or
+# changed in the new release are returned.
+
+
+new_goa = None #DEFINE THE DIRECTORY OF A NEWER RELEASE OF THE GOA FILE
+changes = mg.update_goa_id(all_ids, goa, new_goa, "cache")
+mg.dict_to_file(changes, "goa_changes.txt")
+
+
+
+# Programs that look up the GO IDs and GO terms of genes many times can leave the GOA and OBO files
+# loaded by the "serve" function (or by "python MutantGene.py serve") and send it their genes with
+# an "AnnotationClient", instead of loading the files each time they start.
+
+
+server = mg.serve(goa, background = "y")
+with mg.AnnotationClient() as client:
+    gene_terms = client.gene_terms(genes)
+server.shutdown()
+server.server_close()
+
+
 
 
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for "save_checkpoint", "load_checkpoint" and "iter_checkpoint": saved data must be loaded
+back exactly, with the same types and the same shared objects.
+
+Usage: python -m pytest tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MutantGene as mg
+
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "checkpoint.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def round_trip(self, data):
+        mg.save_checkpoint(data, self.file_name)
+        return mg.load_checkpoint(self.file_name)
+
+    def assertSameValue(self, loaded, expected):
+        # Equal values of another type (like a list for a tuple, or 1 for True) don't count
+        self.assertEqual(loaded, expected)
+        self.assertIs(type(loaded), type(expected))
+        if type(expected) is dict:
+            for key in expected:
+                self.assertSameValue(loaded[key], expected[key])
+        elif type(expected) in (list, tuple):
+            for l, e in zip(loaded, expected):
+                self.assertSameValue(l, e)
+
+    def test_values(self):
+        data = {"tuple": ("GENE1", "GO:0000001", 3),
+                "strings": ("a", "b", "a"),
+                "frozenset": frozenset(["GO:0000001", "GO:0000002"]),
+                "numbers": frozenset([1, 2 ** 80]),
+                "big": 2 ** 100,
+                "negative": -2 ** 70,
+                "limits": [2 ** 63 - 1, -2 ** 63, 2 ** 63],
+                "nul": "a\0b",
+                "nul list": ["a\0b", "c", "\0"],
+                "empty": ["", "", "x"],
+                "empties": [[], (), set(), {}, ""],
+                "others": [1.5, True, False, None, 0],
+                "unicode": ["α-synuclein", "Ωmega"],
+                ("key", 1): {"nested": [("x", frozenset()), {2 ** 90: "big key"}]},
+                2 ** 70: "big int key"}
+
+        self.assertSameValue(self.round_trip(data), data)
+
+    def test_kinds(self):
+        self.assertSameValue(self.round_trip(["a", ("b", "c"), 2 ** 64]), ["a", ("b", "c"), 2 ** 64])
+        self.assertSameValue(self.round_trip({"a\0", 2 ** 65, ("t",)}), {"a\0", 2 ** 65, ("t",)})
+        self.assertSameValue(self.round_trip(frozenset(["a", "b"])), {"a", "b"})
+        self.assertSameValue(self.round_trip(iter([("a", 1), ("b", 2)])), [("a", 1), ("b", 2)])
+        self.assertSameValue(self.round_trip([]), [])
+
+    def test_iter_checkpoint(self):
+        data = {"GENE1": {"GO:0000001"}, "GENE2": ("a\0", 2 ** 70)}
+        mg.save_checkpoint(data, self.file_name)
+        self.assertEqual(list(mg.iter_checkpoint(self.file_name)), list(data.items()))
+
+        mg.save_checkpoint(["a", frozenset(["b"])], self.file_name)
+        self.assertEqual(list(mg.iter_checkpoint(self.file_name)), ["a", frozenset(["b"])])
+
+    def test_shared_values(self):
+        # Synonyms share the set of GO IDs of their gene, like in "all_goa_id"
+        go_ids = {"GO:0000001", "GO:0000002"}
+        loaded = self.round_trip({"GENE1": go_ids, "SYNONYM1": go_ids, "GENE2": {"GO:0000001"}})
+        self.assertIs(loaded["GENE1"], loaded["SYNONYM1"])
+        self.assertIsNot(loaded["GENE1"], loaded["GENE2"])
+        self.assertEqual(loaded["SYNONYM1"], go_ids)
+
+    def test_errors(self):
+        with open(self.file_name, "wb") as save_file:
+            save_file.write(b"not a checkpoint")
+        with self.assertRaises(ValueError):
+            mg.load_checkpoint(self.file_name)
+
+        with self.assertRaises(TypeError):
+            mg.save_checkpoint([b"bytes"], self.file_name)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for reading MAF, GOA and OBO files from URLs, against a local stand-in HTTP server (no
+network is needed): results must be the same as for the local files, and cached downloads must
+only be downloaded again when the server reports a change.
+
+Usage: python -m pytest tests
+"""
+
+import gzip
+import hashlib
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmarks
+import MutantGene as mg
+
+
+
+class FileHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the files of the server by path, with an "ETag" header and "304 Not Modified" responses."""
+
+    def do_GET(self):
+        data = self.server.files.get(self.path)
+        status = 200
+
+        if data == None:
+            status = 404
+        elif self.server.failures.get(self.path, 0) > 0:
+            self.server.failures[self.path] -= 1
+            status = 503
+        else:
+            etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                status = 304
+
+        self.server.requests.append((self.path, status))
+        self.send_response(status)
+
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+
+class TestDownloads(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, "cache")
+        self.maf_file = os.path.join(self.directory, "samples.maf")
+        self.goa_file = os.path.join(self.directory, "annotations.gaf")
+        self.obo_file = os.path.join(self.directory, "terms.obo")
+        self.new_obo_file = os.path.join(self.directory, "new_terms.obo")
+
+        benchmarks.write_maf(self.maf_file, 300)
+        benchmarks.write_gaf(self.goa_file, genes = 100, annotations = 2000, terms = 200)
+        benchmarks.write_obo(self.obo_file, terms = 200)
+        with open(self.obo_file) as file, open(self.new_obo_file, "w") as save_file:
+            save_file.write(file.read().replace("name: synthetic term 1\n", "name: renamed term 1\n"))
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FileHandler)
+        self.server.files = {}
+        self.server.failures = {}
+        self.server.requests = []
+        for name in [self.maf_file, self.goa_file, self.obo_file]:
+            with open(name, "rb") as file:
+                self.server.files["/" + os.path.basename(name)] = file.read()
+        self.server.files["/annotations.gaf.gz"] = gzip.compress(self.server.files["/annotations.gaf"])
+
+        self.thread = threading.Thread(target = self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.directory)
+
+    def url(self, path):
+        return "http://127.0.0.1:" + str(self.server.server_address[1]) + path
+
+    def statuses(self, path):
+        return [status for p, status in self.server.requests if p == path]
+
+    def test_same_results_as_local_files(self):
+        self.assertEqual(mg.get_ontologies(self.url("/terms.obo")), mg.get_ontologies(self.obo_file))
+        self.assertEqual(mg.all_goa_id(self.url("/annotations.gaf")), mg.all_goa_id(self.goa_file))
+        self.assertEqual(mg.all_goa_id(self.url("/annotations.gaf.gz")), mg.all_goa_id(self.goa_file))
+        self.assertEqual(mg.mutation_samples(self.url("/samples.maf")), mg.mutation_samples(self.maf_file))
+
+    def test_conditional_download(self):
+        expected = mg.get_ontologies(self.obo_file)
+        self.assertEqual(mg.get_ontologies(self.url("/terms.obo"), self.cache_dir), expected)
+        self.assertEqual(mg.get_ontologies(self.url("/terms.obo"), self.cache_dir), expected)
+        self.assertEqual(self.statuses("/terms.obo"), [200, 304])
+
+        # A new release on the server is downloaded again
+        with open(self.new_obo_file, "rb") as file:
+            self.server.files["/terms.obo"] = file.read()
+        self.assertEqual(mg.get_ontologies(self.url("/terms.obo"), self.cache_dir), mg.get_ontologies(self.new_obo_file))
+        self.assertEqual(self.statuses("/terms.obo"), [200, 304, 200])
+
+    def test_cached_gzip_download(self):
+        expected = mg.all_goa_id(self.goa_file)
+        for _ in range(2):
+            self.assertEqual(mg.all_goa_id(self.url("/annotations.gaf.gz"), self.cache_dir), expected)
+        self.assertEqual(self.statuses("/annotations.gaf.gz"), [200, 304])
+
+    def test_load_sources(self):
+        samples, go_ids, terms = mg.load_sources([self.url("/samples.maf")], self.url("/annotations.gaf"),
+                                                 self.url("/terms.obo"), cache_dir = self.cache_dir)
+        self.assertEqual(samples, {self.url("/samples.maf"): mg.mutation_samples(self.maf_file)})
+        self.assertEqual(go_ids, mg.all_goa_id(self.goa_file))
+        self.assertEqual(terms, mg.get_ontologies(self.obo_file))
+
+    def test_server_errors(self):
+        # A server error is tried again, a missing file isn't
+        self.server.failures["/terms.obo"] = 1
+        self.assertEqual(mg.get_ontologies(self.url("/terms.obo")), mg.get_ontologies(self.obo_file))
+        self.assertEqual(self.statuses("/terms.obo"), [503, 200])
+
+        with self.assertRaises(requests.HTTPError):
+            mg.get_ontologies(self.url("/missing.obo"))
+        self.assertEqual(self.statuses("/missing.obo"), [404])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the substring matcher used by "filter_list": the Aho-Corasick automaton (and the set of
+patterns used for short texts) must find the same matches as searching each pattern one by one.
+
+Usage: python -m pytest tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MutantGene as mg
+
+
+
+def random_text(rand, length, alphabet = "abc"):
+    """Draw a random text from a small alphabet, so patterns overlap and are often found."""
+
+    return "".join(rand.choice(alphabet) for _ in range(length))
+
+
+
+class TestSubstringMatcher(unittest.TestCase):
+
+    def assertSameMatches(self, patterns, texts):
+        found_in = mg._substring_matcher(patterns)
+        for text in texts:
+            self.assertEqual(found_in(text), any(p in text for p in patterns), (patterns, text))
+
+    def test_overlapping_patterns(self):
+        patterns = ["he", "she", "his", "hers", "ushe", "sh", "rs", "hi", "xyz", "yzx"]
+        texts = ["ushers", "ahishers", "h", "", "shx", "xy", "zxyzx", "abcdefg", "s", "yz", "husband"]
+        self.assertSameMatches(patterns, texts)
+
+    def test_random_patterns(self):
+        rand = random.Random(0)
+        for _ in range(50):
+            patterns = [random_text(rand, rand.randint(1, 6)) for _ in range(rand.randint(9, 40))]
+            texts = [random_text(rand, rand.randint(0, 30)) for _ in range(40)]
+            self.assertSameMatches(patterns, texts)
+
+    def test_few_patterns(self):
+        self.assertSameMatches(["ab", "ca"], ["abc", "bca", "cb", ""])
+
+    def test_empty_pattern(self):
+        patterns = [""] + ["p" + str(i) for i in range(10)]
+        self.assertSameMatches(patterns, ["", "x", "p3", "abc"])
+
+    def test_go_ids(self):
+        # Texts about as long as the patterns are checked by looking up their slices
+        go_ids = ["GO:" + str(i).zfill(7) for i in range(0, 500, 7)]
+        texts = ["GO:" + str(i).zfill(7) for i in range(500)] + ["GO:000007", "xGO:0000014x", "GO:0000014|GO:0000015"]
+        self.assertSameMatches(go_ids, texts)
+
+
+
+class TestFilterList(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(1)
+        self.patterns = [random_text(rand, rand.randint(2, 4)) for _ in range(20)]
+        self.raw_list = [random_text(rand, 12) for _ in range(100)]
+        self.raw_list += [[random_text(rand, 5) for _ in range(3)] for _ in range(100)]
+
+    def contains(self, raw):
+        elements = raw if type(raw) is list else [raw]
+        return any(p in e for p in self.patterns for e in elements)
+
+    def test_substring(self):
+        self.assertEqual(mg.filter_list(self.raw_list, self.patterns), [r for r in self.raw_list if self.contains(r)])
+        self.assertEqual(mg.filter_list(self.raw_list, self.patterns, "n"), [r for r in self.raw_list if not self.contains(r)])
+
+    def test_no_match_across_elements(self):
+        # The elements of a list are searched together, but a pattern can't match across two of them
+        patterns = ["ab", "cd"] + ["p" + str(i) for i in range(10)]
+        self.assertEqual(mg.filter_list([["xa", "bx"], ["xc", "dx"], ["xab"]], patterns), [["xab"]])
+        self.assertEqual(mg.filter_list([["xa", "bx"], ["a\tb"]], ["a\tb"] + patterns), [["a\tb"]])
+
+    def test_exact(self):
+        raw_list = ["ab", "abc", ["ab", "x"], ["abc"]]
+        self.assertEqual(mg.filter_list(raw_list, ["ab"], match = "exact"), ["ab", ["ab", "x"]])
+
+    def test_unknown_match(self):
+        with self.assertRaises(ValueError):
+            mg.filter_list(["ab"], ["a"], match = "prefix")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for "update_goa_id" and "update_ontologies": an updated dictionary must be the same (with
+the same key order) as the dictionary read from the new release.
+
+Usage: python -m pytest tests
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmarks
+import MutantGene as mg
+
+
+
+def write_lines(file_name, lines):
+    """Write the lines of a release to a file."""
+
+    with open(file_name, "w") as save_file:
+        save_file.writelines(lines)
+
+
+
+def read_lines(file_name):
+    """Read the lines of a release from a file."""
+
+    with open(file_name) as file:
+        return file.readlines()
+
+
+
+def new_release(lines, seed):
+    """Make the lines of a new release of a synthetic GOA file: some annotation lines are removed, some
+    get another evidence code, a block of lines is moved to the end and a new gene is annotated."""
+
+    rand = random.Random(seed)
+    header = [l for l in lines if l.startswith("!")]
+    annotations = [l for l in lines if not l.startswith("!")]
+
+    new_lines = []
+    for line in annotations:
+        columns = line.split("\t")
+        draw = rand.random()
+        if draw < 0.01:
+            continue
+        if draw < 0.02:
+            columns[6] = "EXP" if columns[6] != "EXP" else "IDA"
+        new_lines.append("\t".join(columns))
+
+    start = rand.randrange(len(new_lines) - 50)
+    new_lines = new_lines[:start] + new_lines[start + 50:] + new_lines[start:start + 50]
+
+    new_gene = "\t".join(["UniProtKB", "Q99999", "NEWGENE" + str(seed), "enables", "GO:0000001", "PMID:1", "IDA", "", "F",
+                          "New protein", "NEWSYN" + str(seed), "protein", "taxon:9606", "20200101", "UniProt", "", ""]) + "\n"
+    return header + new_lines + [new_gene]
+
+
+
+class TestUpdateGoaId(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, "cache")
+        self.files = [os.path.join(self.directory, "release" + str(i) + ".gaf") for i in range(3)]
+
+        benchmarks.write_gaf(self.files[0], genes = 200, annotations = 3000, terms = 300)
+        write_lines(self.files[1], new_release(read_lines(self.files[0]), 1))
+        write_lines(self.files[2], new_release(read_lines(self.files[1]), 2))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameResult(self, id_dict, goa_file, *filters):
+        expected = mg.all_goa_id(goa_file, None, "n", *filters)
+        self.assertEqual(id_dict, expected)
+        self.assertEqual(list(id_dict), list(expected))
+
+    def test_chained_updates(self):
+        # The first update reads the old release, the second one starts from the state the first one kept
+        id_dict = mg.all_goa_id(self.files[0])
+        changes = mg.update_goa_id(id_dict, self.files[0], self.files[1], self.cache_dir)
+        self.assertSameResult(id_dict, self.files[1])
+        self.assertIn(("NEWGENE1", "GO:0000001"), changes["added"])
+
+        changes = mg.update_goa_id(id_dict, self.files[1], self.files[2], self.cache_dir)
+        self.assertSameResult(id_dict, self.files[2])
+        self.assertIn(("NEWGENE2", "GO:0000001"), changes["added"])
+        self.assertTrue(changes["removed"])
+        self.assertTrue(changes["changed"])
+
+    def test_update_from_cached_load(self):
+        id_dict = mg.all_goa_id(self.files[0], self.cache_dir)
+        mg.update_goa_id(id_dict, self.files[0], self.files[1], self.cache_dir)
+        self.assertSameResult(id_dict, self.files[1])
+
+    def test_filtered_update(self):
+        filters = ("PF", ["IDA", "IMP", "EXP"], "n")
+        id_dict = mg.all_goa_id(self.files[0], self.cache_dir, "n", *filters)
+        mg.update_goa_id(id_dict, self.files[0], self.files[1], self.cache_dir, *filters)
+        self.assertSameResult(id_dict, self.files[1], *filters)
+
+        mg.update_goa_id(id_dict, self.files[1], self.files[2], self.cache_dir, *filters)
+        self.assertSameResult(id_dict, self.files[2], *filters)
+
+    def test_removed_gene(self):
+        lines = read_lines(self.files[0])
+        write_lines(self.files[1], [l for l in lines if "\tGENE7\t" not in l])
+
+        id_dict = mg.all_goa_id(self.files[0], self.cache_dir)
+        self.assertIn("GENE7", id_dict)
+        changes = mg.update_goa_id(id_dict, self.files[0], self.files[1], self.cache_dir)
+        self.assertSameResult(id_dict, self.files[1])
+        self.assertNotIn("GENE7", id_dict)
+        self.assertEqual(sorted(go for gene, go in changes["removed"] if gene == "GENE7"),
+                         sorted(mg.all_goa_id(self.files[0])["GENE7"]))
+
+    def test_file_replaced_in_place(self):
+        goa_file = os.path.join(self.directory, "current.gaf")
+        shutil.copy(self.files[0], goa_file)
+        id_dict = mg.all_goa_id(goa_file, self.cache_dir)
+
+        shutil.copy(self.files[1], goa_file)
+        mg.update_goa_id(id_dict, goa_file, goa_file, self.cache_dir)
+        self.assertSameResult(id_dict, self.files[1])
+
+    def test_mismatched_dictionary(self):
+        mg.all_goa_id(self.files[0], self.cache_dir)
+        id_dict = mg.all_goa_id(self.files[0], None, "n", "C")
+        with self.assertRaises(ValueError):
+            mg.update_goa_id(id_dict, self.files[0], self.files[1], self.cache_dir)
+
+
+
+class TestUpdateOntologies(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.old_file = os.path.join(self.directory, "old.obo")
+        self.new_file = os.path.join(self.directory, "new.obo")
+        benchmarks.write_obo(self.old_file, terms = 2000)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+        benchmarks.write_release(self.old_file, self.new_file)
+        id_term = mg.get_ontologies(self.old_file)
+        changes = mg.update_ontologies(id_term, self.old_file, self.new_file)
+        expected = mg.get_ontologies(self.new_file)
+        self.assertEqual(list(id_term.items()), list(expected.items()))
+        self.assertTrue(changes["changed"])
+
+    def test_moved_and_removed_terms(self):
+        with open(self.old_file) as file:
+            stanzas = ("\n" + file.read()).split("\n[")
+        terms = stanzas[1:-1]
+        random.Random(0).shuffle(terms)
+        with open(self.new_file, "w") as save_file:
+            save_file.write(stanzas[0][1:] + "".join("\n[" + s for s in terms[10:] + stanzas[-1:]))
+
+        id_term = mg.get_ontologies(self.old_file)
+        changes = mg.update_ontologies(id_term, self.old_file, self.new_file)
+        expected = mg.get_ontologies(self.new_file)
+        self.assertEqual(list(id_term.items()), list(expected.items()))
+        self.assertEqual(len(changes["removed"]), 10)
+        self.assertEqual(changes["added"], [])
+
+    def test_mismatched_dictionary(self):
+        with self.assertRaises(ValueError):
+            mg.update_ontologies({}, self.old_file, self.old_file)
+
+
+
+if __name__ == "__main__":
+    unittest.main()